@@ -4,11 +4,36 @@
 此模块管理各种七牛云API接口的调用
 """
 
+import os
 import time
+import datetime
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 import requests
+from requests.adapters import HTTPAdapter
 from qiniu import Auth, QiniuMacAuth
-from config import QINIU_CONFIG, DATA_STAT_API, DEFAULT_PARAMS
+from qiniu.http.single_flight import SingleFlight
+from config import (
+    QINIU_CONFIG, DATA_STAT_API, CDN_STAT_API, DEFAULT_PARAMS, HTTP_CONFIG, CACHE_CONFIG, STORE_CONFIG,
+    INVENTORY_CONFIG, CDN_LOG_CONFIG
+)
+from stats_cache import StatsCache, is_closed_window, is_closed_date
+from stats_store import StatsStore
+
+
+class InventoryUnavailable(RuntimeError):
+    """本地文件清单未启用，或当前安装的 qiniu SDK 不支持"""
+
+
+# 各统计接口返回数据的格式，用于本地存储按数据点拆分与拼接
+STAT_CODECS = {
+    'space': 'times_datas',
+    'count': 'times_datas',
+    'blob_io': 'blob_io',
+    'rs_put': 'blob_io'
+}
 
 
 class QiniuAPIManager:
@@ -21,14 +46,169 @@ class QiniuAPIManager:
         self.auth = Auth(self.access_key, self.secret_key)
         self.mac_auth = QiniuMacAuth(self.access_key, self.secret_key)
         self.base_url = QINIU_CONFIG['base_url']
-    
+        self.fusion_url = QINIU_CONFIG.get('fusion_url', 'http://fusion.qiniuapi.com')
+        self.timeout = (HTTP_CONFIG['connect_timeout'], HTTP_CONFIG['read_timeout'])
+        self.session = self._create_session()
+        # 合并并发的相同查询，同一时刻只向上游发出一次请求
+        self.single_flight = SingleFlight()
+        self._flight_lock = threading.Lock()
+        self._flight_requests = 0
+        self._flight_upstream = 0
+        self.cache = StatsCache(
+            max_entries=CACHE_CONFIG['max_entries'],
+            open_ttl=CACHE_CONFIG['open_ttl']
+        )
+        # 当前线程的预热刷新设置（见 refresh_open_windows）
+        self._local = threading.local()
+        # 拆分后的 CDN 查询窗口并发请求使用的线程池
+        self.window_executor = ThreadPoolExecutor(
+            max_workers=HTTP_CONFIG['window_workers'],
+            thread_name_prefix='qiniu-cdn-window'
+        )
+        self.store = None
+        if STORE_CONFIG.get('enabled'):
+            store_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), STORE_CONFIG['path'])
+            self.store = StatsStore(store_path, settle_seconds=CACHE_CONFIG['settle_seconds'])
+        self.inventory = None
+        self.inventory_error = '本地文件清单未启用'
+        # 文件清单在后台线程中同步，(存储空间, 前缀) -> 最近一次同步的 Future
+        self.inventory_executor = ThreadPoolExecutor(
+            max_workers=INVENTORY_CONFIG['sync_workers'],
+            thread_name_prefix='qiniu-inventory'
+        )
+        self._inventory_syncs = {}
+        self._inventory_lock = threading.Lock()
+        if INVENTORY_CONFIG.get('enabled'):
+            try:
+                # 文件清单只在项目内的 python-sdk 中提供，PyPI 版本的 qiniu 没有该模块时只停用文件清单
+                from qiniu.services.storage.inventory import Inventory
+            except ImportError as e:
+                self.inventory_error = f'当前安装的 qiniu SDK 不支持本地文件清单（{e}），请按 requirements.txt 安装项目内的 python-sdk'
+            else:
+                inventory_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), INVENTORY_CONFIG['path'])
+                self.inventory = Inventory(inventory_path)
+                self.inventory_error = None
+
+    @staticmethod
+    def _create_session():
+        """
+        创建长连接会话，每个上游主机（api.qiniuapi.com / fusion.qiniuapi.com）各自维护一个连接池，
+        连接在请求之间保持复用，避免每次请求都重新进行 TCP+TLS 握手。
+        连接池本身是线程安全的，同一会话可在并发查询线程间共享。
+        """
+        session = requests.Session()
+        # 不使用环境变量中的代理设置
+        session.trust_env = False
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_CONFIG['pool_connections'],
+            pool_maxsize=HTTP_CONFIG['pool_maxsize']
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _coalesce(self, key, func, *args):
+        """
+        相同 key 的并发请求共享一次上游调用的结果
+        """
+        with self._flight_lock:
+            self._flight_requests += 1
+
+        def call():
+            with self._flight_lock:
+                self._flight_upstream += 1
+            return func(*args)
+
+        return self.single_flight.do(key, call)
+
+    def coalescing_stats(self):
+        """返回请求合并统计，dedup_ratio 为被合并（未实际发往上游）的请求占比"""
+        with self._flight_lock:
+            requests_count, upstream = self._flight_requests, self._flight_upstream
+        return {
+            'requests': requests_count,
+            'upstream_calls': upstream,
+            'coalesced': requests_count - upstream,
+            'dedup_ratio': round((requests_count - upstream) / requests_count, 4) if requests_count else 0.0
+        }
+
+    @contextmanager
+    def refresh_open_windows(self, since=None):
+        """
+        在当前线程内跳过 since（time.monotonic() 时间，默认为进入时）之前写入的未结束时间窗口缓存，
+        重新向上游查询并写回缓存，供后台预热任务在缓存过期前刷新“今天”等热门查询
+        """
+        previous = getattr(self._local, 'refresh_before', None)
+        self._local.refresh_before = time.monotonic() if since is None else since
+        try:
+            yield
+        finally:
+            self._local.refresh_before = previous
+
+    def _cache_get(self, cache_key):
+        return self.cache.get(cache_key, refresh_before=getattr(self._local, 'refresh_before', None))
+
+    def close(self):
+        """关闭会话并释放连接池"""
+        self.window_executor.shutdown(wait=False)
+        self.inventory_executor.shutdown(wait=False)
+        self.session.close()
+
     def _make_request(self, api_endpoint, params=None, method='GET'):
         """
-        通用API请求方法，使用官方SDK进行认证
+        通用API请求方法，成功的查询结果按时间窗口缓存
         """
         if params is None:
             params = {}
-        
+
+        # 缓存键包含接口、存储空间、区域、指标、粒度和时间窗口等全部查询参数
+        cache_key = (api_endpoint, method.upper(), tuple(sorted(params.items())))
+        result = self._cache_get(cache_key)
+        if result is not None:
+            return result
+
+        result = self._coalesce(cache_key, self._send_request, api_endpoint, params, method)
+        if result['status_code'] == 200:
+            self.cache.set(cache_key, result, closed=is_closed_window(params.get('end'), CACHE_CONFIG['settle_seconds']))
+        return result
+
+    def _query_stat(self, api_endpoint, params):
+        """
+        查询 /v6 统计接口，启用本地存储时只向上游请求缺失的日期
+        """
+        begin_time, end_time = str(params['begin']), str(params['end'])
+        try:
+            begin_day = datetime.datetime.strptime(begin_time, '%Y%m%d%H%M%S').date()
+            end_dt = datetime.datetime.strptime(end_time, '%Y%m%d%H%M%S')
+        except ValueError:
+            return self._make_request(api_endpoint, params)
+        # 结束时间为开区间，恰为零点时不包含当天
+        end_day = end_dt.date() - datetime.timedelta(days=1) if end_time.endswith('000000') else end_dt.date()
+        # 只有从零点开始的查询才能按自然日拼接
+        if self.store is None or not begin_time.endswith('000000') or end_day < begin_day:
+            return self._make_request(api_endpoint, params)
+
+        series = StatsStore.series_key(
+            f'{self.access_key}:{api_endpoint}',
+            {k: v for k, v in params.items() if k not in ('begin', 'end')}
+        )
+
+        def fetch(start, stop):
+            return self._make_request(api_endpoint, dict(
+                params,
+                begin=start.strftime('%Y%m%d000000'),
+                end=(stop + datetime.timedelta(days=1)).strftime('%Y%m%d000000')
+            ))
+
+        return self.store.query(
+            series, STAT_CODECS[api_endpoint], begin_day, end_day, fetch,
+            end_ts=int(time.mktime(end_dt.timetuple()))
+        )
+
+    def _send_request(self, api_endpoint, params, method='GET'):
+        """
+        发送统计接口请求，使用官方SDK进行认证
+        """
         # 构建完整URL，保留$符号不被编码
         query_parts = []
         for key, value in params.items():
@@ -59,16 +239,10 @@ class QiniuAPIManager:
 
         # 发送请求
         try:
-            # 设置不使用代理
-            proxies = {
-                'http': '',
-                'https': ''
-            }
-            
             if method.upper() == 'GET':
-                response = requests.get(full_url, headers=headers, timeout=30, proxies=proxies)
+                response = self.session.get(full_url, headers=headers, timeout=self.timeout)
             else:
-                response = requests.post(full_url, headers=headers, json=params, timeout=30, proxies=proxies)
+                response = self.session.post(full_url, headers=headers, json=params, timeout=self.timeout)
             
             return {
                 'status_code': response.status_code,
@@ -109,7 +283,7 @@ class QiniuAPIManager:
         if file_type is not None:
             params['$ftype'] = str(file_type)
 
-        return self._make_request('space', params)
+        return self._query_stat('space', params)
     
     def get_file_count(self, bucket_name=None, region=None, begin_time=None, end_time=None, granularity='day', file_type=None):
         """获取文件数量统计"""
@@ -138,7 +312,7 @@ class QiniuAPIManager:
         if file_type is not None:
             params['$ftype'] = str(file_type)
 
-        return self._make_request('count', params)
+        return self._query_stat('count', params)
     
 
     
@@ -191,7 +365,7 @@ class QiniuAPIManager:
         if file_type is not None:
             params['$ftype'] = file_type
 
-        return self._make_request('blob_io', params)
+        return self._query_stat('blob_io', params)
     
     def get_put_requests_stats(self, bucket_name=None, region=None, begin_time=None, end_time=None, granularity='day', file_type=None):
         """获取PUT请求次数统计
@@ -231,65 +405,39 @@ class QiniuAPIManager:
         if file_type is not None:
             params['$ftype'] = str(file_type)
 
-        return self._make_request('rs_put', params)
+        return self._query_stat('rs_put', params)
 
-    def get_cdn_traffic_stats(self, domains=None, start_date=None, end_date=None, granularity='day'):
+    def _fusion_request(self, api_path, payload):
         """
-        获取CDN流量统计
-        
-        Args:
-            domains (list): 域名列表
-            start_date (str): 开始日期 YYYY-MM-DD
-            end_date (str): 结束日期 YYYY-MM-DD
-            granularity (str): 时间粒度，'day', 'hour', '5min'
+        CDN 统计接口（fusion.qiniuapi.com）请求方法，成功的查询结果按时间窗口缓存
         """
-        import datetime
-        import requests
-        from config import QINIU_CONFIG
-        
-        # 初始化认证
-        q = self.auth
-        
-        # 如果未提供日期，则使用默认值
-        if start_date is None:
-            start_date = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime('%Y-%m-%d')
-        if end_date is None:
-            end_date = datetime.datetime.now().strftime('%Y-%m-%d')
-        
-        # 设置域名
-        if domains is None:
-            domains = QINIU_CONFIG.get('cdn_domains', [])
-        
-        # 域名列表转为字符串，用分号分割
-        domains_str = ';'.join(domains) if isinstance(domains, list) else domains
-        
-        # CDN流量API基础配置
-        base_url = 'http://fusion.qiniuapi.com'
-        flux_url = f"{base_url}/v2/tune/flux"
-        flux_payload = {
-            "startDate": start_date,
-            "endDate": end_date,
-            "granularity": granularity,
-            "domains": domains_str
-        }
-        
+        cache_key = (api_path, tuple(sorted(payload.items())))
+        result = self._cache_get(cache_key)
+        if result is not None:
+            return result
+
+        result = self._coalesce(cache_key, self._send_fusion_request, api_path, payload)
+        # CDN 接口出错时 HTTP 状态码仍可能为 200，需同时检查返回体中的 code
+        if result['status_code'] == 200 and (result['data'] or {}).get('code') == 200:
+            self.cache.set(cache_key, result, closed=is_closed_date(payload.get('endDate'), CACHE_CONFIG['settle_seconds']))
+        return result
+
+    def _send_fusion_request(self, api_path, payload):
+        """
+        发送 CDN 统计接口（fusion.qiniuapi.com）请求，使用 QBox 认证
+        """
+        url = f"{self.fusion_url}{api_path}"
         try:
             # 生成认证token
-            token = q.token_of_request(flux_url, body=str(flux_payload))
-            
+            token = self.auth.token_of_request(url, body=str(payload))
+
             headers = {
                 'Authorization': f'QBox {token}',
                 'Content-Type': 'application/json'
             }
-            
-            # 设置不使用代理
-            proxies = {
-                'http': '',
-                'https': ''
-            }
-            
-            response = requests.post(flux_url, headers=headers, json=flux_payload, proxies=proxies)
-            
+
+            response = self.session.post(url, headers=headers, json=payload, timeout=self.timeout)
+
             return {
                 'status_code': response.status_code,
                 'headers': dict(response.headers),
@@ -302,74 +450,113 @@ class QiniuAPIManager:
                 'data': None
             }
 
-    def get_cdn_bandwidth_stats(self, domains=None, start_date=None, end_date=None, granularity='day'):
+    def _query_cdn(self, name, payload):
         """
-        获取CDN计费带宽统计
-        
-        Args:
-            domains (list): 域名列表
-            start_date (str): 开始日期 YYYY-MM-DD
-            end_date (str): 结束日期 YYYY-MM-DD
-            granularity (str): 时间粒度，'day', 'hour', '5min'
+        查询 CDN 统计接口，启用本地存储时只向上游请求缺失的日期
         """
-        import datetime
-        import requests
-        from config import QINIU_CONFIG
-        
-        # 初始化认证
-        q = self.auth
-        
+        try:
+            begin_day = datetime.date.fromisoformat(payload['startDate'])
+            end_day = datetime.date.fromisoformat(payload['endDate'])
+        except ValueError:
+            return self._fusion_request(CDN_STAT_API[name]['endpoint'], payload)
+
+        def fetch(start, stop):
+            return self._fetch_cdn_windows(name, payload, start, stop)
+
+        if self.store is None:
+            return fetch(begin_day, end_day)
+
+        series = StatsStore.series_key(
+            f'{self.access_key}:{name}',
+            {'domains': payload['domains'], 'granularity': payload['granularity']}
+        )
+        return self.store.query(series, 'cdn', begin_day, end_day, fetch)
+
+    def _fetch_cdn_windows(self, name, payload, begin_day, end_day):
+        """
+        将超过接口单次最大天数的时间范围拆分为多个窗口并发请求，再按时间拼接结果
+
+        任一窗口失败时返回该窗口的错误结果，避免返回缺少部分日期的数据
+        """
+        api_path = CDN_STAT_API[name]['endpoint']
+        max_days = datetime.timedelta(days=CDN_STAT_API[name]['max_days'])
+        windows = []
+        start = begin_day
+        while start <= end_day:
+            stop = min(start + max_days - datetime.timedelta(days=1), end_day)
+            windows.append(dict(payload, startDate=start.isoformat(), endDate=stop.isoformat()))
+            start = stop + datetime.timedelta(days=1)
+
+        if len(windows) == 1:
+            return self._fusion_request(api_path, windows[0])
+
+        refresh_before = getattr(self._local, 'refresh_before', None)
+
+        def fetch_window(window):
+            # 窗口在其他线程中请求，需沿用调用线程的预热刷新设置
+            if refresh_before is None:
+                return self._fusion_request(api_path, window)
+            with self.refresh_open_windows(refresh_before):
+                return self._fusion_request(api_path, window)
+
+        results = list(self.window_executor.map(fetch_window, windows))
+        for result in results:
+            if result['status_code'] != 200 or (result['data'] or {}).get('code') != 200:
+                return result
+        return {
+            'status_code': 200,
+            'headers': results[-1].get('headers', {}),
+            'data': merge_cdn_data([result['data'] for result in results])
+        }
+
+    @staticmethod
+    def _cdn_payload(domains, start_date, end_date, granularity):
+        """构建 CDN 统计接口的请求体"""
         # 如果未提供日期，则使用默认值
         if start_date is None:
             start_date = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime('%Y-%m-%d')
         if end_date is None:
             end_date = datetime.datetime.now().strftime('%Y-%m-%d')
-        
+
         # 设置域名
         if domains is None:
             domains = QINIU_CONFIG.get('cdn_domains', [])
-        
+
         # 域名列表转为字符串，用分号分割
         domains_str = ';'.join(domains) if isinstance(domains, list) else domains
-        
-        # CDN带宽API基础配置
-        base_url = 'http://fusion.qiniuapi.com'
-        bandwidth_url = f"{base_url}/v2/tune/bandwidth"
-        bandwidth_payload = {
+
+        return {
             "startDate": start_date,
             "endDate": end_date,
             "granularity": granularity,
             "domains": domains_str
         }
+
+    def get_cdn_traffic_stats(self, domains=None, start_date=None, end_date=None, granularity='day'):
+        """
+        获取CDN流量统计
         
-        try:
-            # 生成认证token
-            token = q.token_of_request(bandwidth_url, body=str(bandwidth_payload))
-            
-            headers = {
-                'Authorization': f'QBox {token}',
-                'Content-Type': 'application/json'
-            }
-            
-            # 设置不使用代理
-            proxies = {
-                'http': '',
-                'https': ''
-            }
-            
-            response = requests.post(bandwidth_url, headers=headers, json=bandwidth_payload, proxies=proxies)
-            
-            return {
-                'status_code': response.status_code,
-                'headers': dict(response.headers),
-                'data': response.json() if response.content else None
-            }
-        except Exception as e:
-            return {
-                'status_code': 0,
-                'error': str(e),
-                'data': None
-            }
+        Args:
+            domains (list): 域名列表
+            start_date (str): 开始日期 YYYY-MM-DD
+            end_date (str): 结束日期 YYYY-MM-DD
+            granularity (str): 时间粒度，'day', 'hour', '5min'
+        """
+        flux_payload = self._cdn_payload(domains, start_date, end_date, granularity)
+        return self._query_cdn('flux', flux_payload)
+
+    def get_cdn_bandwidth_stats(self, domains=None, start_date=None, end_date=None, granularity='day'):
+        """
+        获取CDN计费带宽统计
+        
+        Args:
+            domains (list): 域名列表
+            start_date (str): 开始日期 YYYY-MM-DD
+            end_date (str): 结束日期 YYYY-MM-DD
+            granularity (str): 时间粒度，'day', 'hour', '5min'
+        """
+        bandwidth_payload = self._cdn_payload(domains, start_date, end_date, granularity)
+        return self._query_cdn('bandwidth', bandwidth_payload)
 
     def get_bucket_info(self, bucket_name=None):
         """
@@ -391,6 +578,143 @@ class QiniuAPIManager:
             'info': info
         }
 
+    def sync_inventory(self, bucket_name=None, prefix=''):
+        """
+        重新列举前缀下的文件，更新本地文件清单
+
+        Returns:
+            dict: listed、added、updated、deleted
+        """
+        from qiniu import BucketManager
+
+        if self.inventory is None:
+            raise InventoryUnavailable(self.inventory_error)
+        bucket_name = bucket_name or QINIU_CONFIG['bucket_name']
+        bucket_manager = BucketManager(self.auth)
+        # 同一前缀的并发同步只列举一次
+        return self._coalesce(
+            ('inventory', bucket_name, prefix),
+            self.inventory.sync, bucket_manager, bucket_name, prefix
+        )
+
+    def start_inventory_sync(self, bucket_name=None, prefix=''):
+        """
+        在后台重新列举前缀下的文件，该前缀正在同步时不重复提交
+
+        Returns:
+            Future: 同步任务，结果同 sync_inventory
+        """
+        if self.inventory is None:
+            raise InventoryUnavailable(self.inventory_error)
+        key = (bucket_name or QINIU_CONFIG['bucket_name'], prefix)
+        with self._inventory_lock:
+            future = self._inventory_syncs.get(key)
+            if future is None or future.done():
+                future = self.inventory_executor.submit(self.sync_inventory, *key)
+                self._inventory_syncs[key] = future
+        return future
+
+    def get_prefix_inventory(self, bucket_name=None, prefix='', refresh=False):
+        """
+        从本地文件清单统计前缀下的文件数与存储量，以及下一级各目录的统计
+
+        只读取已保存的清单，不等待列举：清单超过 INVENTORY_CONFIG['max_age'] 未同步、从未同步或 refresh 为 True 时
+        在后台重新列举该前缀，syncing 表示正在同步，完成后再次查询即可得到新的统计
+
+        Args:
+            bucket_name (str): 存储空间名称
+            prefix (str): 前缀，为空时统计整个空间
+            refresh (bool): 是否强制重新列举
+        """
+        if self.inventory is None:
+            raise InventoryUnavailable(self.inventory_error)
+        bucket_name = bucket_name or QINIU_CONFIG['bucket_name']
+        synced_at = self.inventory.synced_at(bucket_name, prefix)
+        if refresh or synced_at is None or time.time() - synced_at > INVENTORY_CONFIG['max_age']:
+            future = self.start_inventory_sync(bucket_name, prefix)
+        else:
+            with self._inventory_lock:
+                future = self._inventory_syncs.get((bucket_name, prefix))
+
+        # 最近一次已完成的同步结果，失败时为错误信息
+        sync_result = None
+        if future is not None and future.done():
+            try:
+                sync_result = future.result()
+            except Exception as e:
+                sync_result = {'error': str(e)}
+        return {
+            'bucket': bucket_name,
+            'prefix': prefix,
+            'synced_at': synced_at,
+            'syncing': future is not None and not future.done(),
+            'sync': sync_result,
+            'summary': self.inventory.summary(bucket_name, prefix),
+            'children': self.inventory.children(bucket_name, prefix, INVENTORY_CONFIG['delimiter'])
+        }
+
+    def _analyze_cdn_logs(self, domains, day):
+        """下载并统计各域名一天的 CDN 日志，返回 域名 -> 统计结果"""
+        from qiniu import CdnManager
+
+        results = CdnManager(self.auth).analyze_logs(
+            domains, day.isoformat(),
+            max_workers=CDN_LOG_CONFIG['max_workers'],
+            top_n=CDN_LOG_CONFIG['top_n'],
+            strip_query=CDN_LOG_CONFIG['strip_query']
+        )
+        stats = {}
+        for domain, result in results.items():
+            stats[domain] = dict(result['aggregator'].result(), files=result['files'], failed=result['failed'])
+        return stats
+
+    def get_cdn_log_stats(self, domains=None, day=None, refresh=False):
+        """
+        统计 CDN 日志：Top URL、状态码与来源域名分布、每小时请求数与流量、独立 IP 数
+
+        日志并发下载、流式解压与聚合，结果按域名保存在本地存储中，已稳定的日期不再重新下载
+
+        Args:
+            domains (list): 域名列表，默认为 QINIU_CONFIG['cdn_domains']
+            day (date): 日志日期，默认为昨天
+            refresh (bool): 是否忽略本地存储重新统计
+        """
+        domains = domains or QINIU_CONFIG.get('cdn_domains', [])
+        day = day or datetime.date.today() - datetime.timedelta(days=1)
+        day_start = int(time.mktime(day.timetuple()))
+        series = {
+            domain: StatsStore.series_key(f'{self.access_key}:cdn_log', {'domain': domain})
+            for domain in domains
+        }
+
+        stats = {}
+        missing = list(domains)
+        if self.store is not None and not refresh:
+            missing = []
+            for domain in domains:
+                points = self.store.load(series[domain], day_start, day_start + 1)
+                if points and self.store.covered_days(series[domain], day, day):
+                    stats[domain] = points[0][1]
+                else:
+                    missing.append(domain)
+
+        if missing:
+            # 同一天同一组域名的并发请求只统计一次
+            analyzed = self._coalesce(('cdn_log', day, tuple(missing)), self._analyze_cdn_logs, missing, day)
+            # 上游日志按小时陆续生成，日志未全部生成时的结果不完整，不保存
+            day_end = int(time.mktime((day + datetime.timedelta(days=1)).timetuple()))
+            settled = day_end + CDN_LOG_CONFIG['settle_seconds'] <= time.time()
+            for domain in missing:
+                stats[domain] = analyzed[domain]
+                # 没有日志文件或有文件下载失败时也不保存，下次查询重新统计
+                result = analyzed[domain]
+                if self.store is not None and settled and result['files'] and not result['failed']:
+                    self.store.save(series[domain], [(day_start, result)], day, day)
+        return {
+            'day': day.isoformat(),
+            'domains': stats
+        }
+
     def get_bucket_domains(self, bucket_name=None):
         """
         获取存储空间绑定的域名
@@ -412,12 +736,67 @@ class QiniuAPIManager:
         }
 
 
+def merge_cdn_data(parts):
+    """
+    按时间顺序拼接多个 CDN 统计窗口的返回数据，重复的时间点只保留一次
+
+    Args:
+        parts (list): 各窗口接口返回的 data 字段，按时间先后排列
+    """
+    times = []
+    seen = set()
+    domains = {}
+    for part in parts:
+        part_times = part.get('time') or []
+        part_data = part.get('data') or {}
+        for domain in part_data:
+            # 之前窗口中没有该域名时用 0 补齐
+            domains.setdefault(domain, {'china': [0] * len(times), 'oversea': [0] * len(times)})
+        for i, time_point in enumerate(part_times):
+            if time_point in seen:
+                continue
+            seen.add(time_point)
+            times.append(time_point)
+            for domain, series in domains.items():
+                domain_data = part_data.get(domain) or {}
+                for region in ('china', 'oversea'):
+                    values = domain_data.get(region) or []
+                    series[region].append(values[i] if i < len(values) else 0)
+    return {
+        'code': 200,
+        'time': times,
+        'data': domains
+    }
+
+
 # 便捷函数
 def get_default_api_manager():
     """获取默认的API管理器实例"""
     return QiniuAPIManager()
 
 
+# 按密钥共享的API管理器实例，复用其连接池
+_shared_managers = {}
+_shared_managers_lock = threading.Lock()
+
+
+def get_shared_api_manager(access_key=None, secret_key=None):
+    """
+    获取共享的API管理器实例
+
+    同一组密钥在进程内只创建一个管理器，后续调用复用其长连接会话
+    """
+    access_key = access_key or QINIU_CONFIG['access_key']
+    secret_key = secret_key or QINIU_CONFIG['secret_key']
+    key = (access_key, secret_key)
+    with _shared_managers_lock:
+        manager = _shared_managers.get(key)
+        if manager is None:
+            manager = QiniuAPIManager(access_key, secret_key)
+            _shared_managers[key] = manager
+    return manager
+
+
 # 测试函数
 def test_api_connection():
     """测试API连接"""
@@ -0,0 +1,79 @@
+"""
+CDN 多域名聚合基准测试
+
+构造 1000 个域名、31 天 5 分钟粒度的模拟返回数据，对比逐点累加（旧实现）与一次聚合（NumPy / 纯 Python）的耗时。
+
+用法：
+    python benchmarks/bench_cdn_aggregate.py [域名数] [天数]
+"""
+
+import os
+import sys
+import time
+import random
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cdn_aggregate  # noqa: E402
+
+
+def make_payload(domain_count, days):
+    start = datetime.datetime(2026, 1, 1)
+    points = days * 288
+    times = [(start + datetime.timedelta(minutes=5 * i)).strftime('%Y-%m-%d %H:%M:%S') for i in range(points)]
+    rng = random.Random(0)
+    data = {
+        f'cdn{i}.example.com': {
+            'china': [rng.randrange(1 << 20) for _ in range(points)],
+            'oversea': [rng.randrange(1 << 16) for _ in range(points)]
+        }
+        for i in range(domain_count)
+    }
+    return {'code': 200, 'time': times, 'data': data}
+
+
+def aggregate_loop(api_data):
+    """旧实现：逐域名逐点累加"""
+    time_points = api_data.get('time') or []
+    total_values = [0] * len(time_points)
+    for domain, domain_data in (api_data.get('data') or {}).items():
+        china_data = (domain_data or {}).get('china') or []
+        oversea_data = (domain_data or {}).get('oversea') or []
+        for i in range(min(len(total_values), len(china_data))):
+            total_values[i] += china_data[i]
+        for i in range(min(len(total_values), len(oversea_data))):
+            if i < len(total_values):
+                total_values[i] += oversea_data[i]
+    return total_values
+
+
+def measure(label, func, payload):
+    started = time.perf_counter()
+    result = func(payload)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}{elapsed * 1000:>12.1f}")
+    return result
+
+
+def main():
+    domain_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 31
+    payload = make_payload(domain_count, days)
+    print(f"域名数: {domain_count}，数据点: {len(payload['time'])}")
+    print(f"{'实现':<26}{'耗时(ms)':>10}")
+
+    expected = measure('逐点累加', aggregate_loop, payload)
+
+    numpy_module = cdn_aggregate.np
+    if numpy_module is not None:
+        result = measure('一次聚合（NumPy）', cdn_aggregate.aggregate_cdn, payload)
+        assert result['total'] == expected
+    cdn_aggregate.np = None
+    result = measure('一次聚合（纯 Python）', cdn_aggregate.aggregate_cdn, payload)
+    assert result['total'] == expected
+    cdn_aggregate.np = numpy_module
+
+
+if __name__ == '__main__':
+    main()
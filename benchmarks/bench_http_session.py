@@ -0,0 +1,82 @@
+"""
+连接复用基准测试
+
+在本地启动一个模拟统计接口的 HTTP 服务，统计服务端接受的新连接数（即握手次数），
+对比逐次调用 requests.get（旧实现）与 QiniuAPIManager 共享会话（新实现）的差异。
+
+用法：
+    python benchmarks/bench_http_session.py [请求次数] [并发数]
+"""
+
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from config import QINIU_CONFIG  # noqa: E402
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """返回固定统计数据，并记录新建连接数"""
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with CountingHandler.lock:
+            CountingHandler.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        body = b'{"times": [1700000000], "datas": [1]}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, call, total, concurrency):
+    CountingHandler.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: call(), range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24}{total:>8}{CountingHandler.connections:>10}{elapsed * 1000:>12.1f}")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    QINIU_CONFIG['base_url'] = base_url
+
+    from api_manager import QiniuAPIManager
+    manager = QiniuAPIManager()
+
+    url = f"{base_url}/v6/space?begin=20260101000000&end=20260102000000&g=day"
+    proxies = {'http': '', 'https': ''}
+
+    print(f"{'模式':<22}{'请求数':>6}{'握手次数':>6}{'耗时(ms)':>10}")
+    run('requests.get（每次新连接）', lambda: requests.get(url, timeout=30, proxies=proxies), total, concurrency)
+    run('共享会话', lambda: manager.get_storage_usage(begin_time='20260101000000', end_time='20260102000000'),
+        total, concurrency)
+
+    manager.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+CDN 流量/带宽多域名聚合
+
+一次遍历接口返回数据，同时得到所有域名的合计序列、按区域（国内/海外）的序列和每个域名的合计值。
+安装了 NumPy 时按矩阵整体求和，否则用 map 逐序列累加，均不逐点在 Python 层循环。
+"""
+
+from operator import add
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖
+    np = None
+
+REGIONS = ('china', 'oversea')
+
+
+def _region_matrix(data_points, domains, region, length):
+    """将各域名某一区域的序列转换为 域名数 x 时间点数 的 float64 矩阵"""
+    rows = [((data_points[domain] or {}).get(region) or []) for domain in domains]
+    if all(len(values) == length for values in rows):
+        # 常见情况：各域名序列长度一致，一次整体转换
+        return np.array(rows, dtype=np.float64).reshape(len(domains), length)
+    matrix = np.zeros((len(domains), length), dtype=np.float64)
+    for d, values in enumerate(rows):
+        values = values[:length]
+        if values:
+            matrix[d, :len(values)] = values
+    return matrix
+
+
+def _to_list(values):
+    """
+    转换为 Python 列表；合计值均为整数（流量字节数、带宽 bps）时还原为整数。
+    float64 可精确表示 2^53 以内的整数，足以覆盖流量与带宽数值
+    """
+    if (np.mod(values, 1) == 0).all():
+        return values.astype(np.int64).tolist()
+    return values.tolist()
+
+
+def _aggregate_numpy(data_points, length):
+    domains = list(data_points)
+    matrices = [_region_matrix(data_points, domains, region, length) for region in REGIONS]
+    region_series = [matrix.sum(axis=0) for matrix in matrices]
+    domain_totals = matrices[0].sum(axis=1) + matrices[1].sum(axis=1)
+    return {
+        'total': _to_list(region_series[0] + region_series[1]),
+        'regions': {region: _to_list(series) for region, series in zip(REGIONS, region_series)},
+        'domains': dict(zip(domains, _to_list(domain_totals)))
+    }
+
+
+def _aggregate_python(data_points, length):
+    region_series = {}
+    domain_totals = {}
+    for region in REGIONS:
+        sums = [0] * length
+        for domain, domain_data in data_points.items():
+            values = ((domain_data or {}).get(region) or [])[:length]
+            # map 逐元素相加在 C 层完成，较短的序列只累加到其长度
+            sums[:len(values)] = map(add, sums, values)
+            domain_totals[domain] = domain_totals.get(domain, 0) + sum(values)
+        region_series[region] = sums
+    return {
+        'total': list(map(add, region_series['china'], region_series['oversea'])),
+        'regions': region_series,
+        'domains': domain_totals
+    }
+
+
+def aggregate_cdn(api_data):
+    """
+    聚合 CDN 流量/带宽接口返回的多域名数据
+
+    Args:
+        api_data (dict): 接口返回的 data 字段，形如 {'code': 200, 'time': [...], 'data': {域名: {'china': [...], 'oversea': [...]}}}
+
+    Returns:
+        dict: time 为时间点列表，total 为所有域名合计序列，regions 为按区域的合计序列，domains 为每个域名在整个时间范围内的合计值
+    """
+    time_points = (api_data or {}).get('time') or []
+    data_points = (api_data or {}).get('data') or {}
+    length = len(time_points)
+    if np is not None and data_points:
+        aggregated = _aggregate_numpy(data_points, length)
+    else:
+        aggregated = _aggregate_python(data_points, length)
+    aggregated['time'] = time_points
+    return aggregated
@@ -11,6 +11,7 @@ QINIU_CONFIG = {
     'bucket_name': 'recordingmini',
     'region': 'z2',  # 华南-广东
     'base_url': 'https://api.qiniuapi.com',
+    'fusion_url': 'http://fusion.qiniuapi.com',  # CDN 统计接口地址
     'cdn_domains': [
         'cdn.mshcodeadventure.top',
         'cdnv.mshcodeadventure.top'
@@ -37,6 +38,59 @@ DATA_STAT_API = {
     }
 }
 
+# CDN统计API配置，max_days 为单次请求允许的最大天数
+CDN_STAT_API = {
+    'flux': {
+        'endpoint': '/v2/tune/flux',
+        'description': 'CDN计费流量',
+        'max_days': 30
+    },
+    'bandwidth': {
+        'endpoint': '/v2/tune/bandwidth',
+        'description': 'CDN计费带宽',
+        'max_days': 31
+    }
+}
+
+# HTTP 连接配置
+HTTP_CONFIG = {
+    'pool_connections': 4,  # 连接池数量（每个上游主机一个连接池）
+    'pool_maxsize': 16,  # 每个连接池保持的最大连接数，应不小于并发查询线程数
+    'connect_timeout': 5,  # 建立连接超时时间（秒）
+    'read_timeout': 30,  # 读取响应超时时间（秒）
+    'window_workers': 4  # 长时间范围拆分为多个窗口后并发请求的线程数
+}
+
+# 查询结果缓存配置
+CACHE_CONFIG = {
+    'max_entries': 512,  # 最多缓存的查询结果数，超出时淘汰最久未使用的
+    'open_ttl': 60,  # 未结束时间段的查询结果缓存时间（秒），已结束的时间段长期缓存
+    'settle_seconds': 3 * 3600  # 时间段结束后多久视为数据已稳定（上游统计存在延迟）
+}
+
+# 本地时间序列存储配置
+STORE_CONFIG = {
+    'enabled': True,
+    'path': 'data/stats_store.sqlite3'  # SQLite 数据库文件路径，相对路径基于项目目录
+}
+
+# 本地文件清单配置（按前缀统计文件数与存储量）
+INVENTORY_CONFIG = {
+    'enabled': True,
+    'path': 'data/inventory.sqlite3',  # SQLite 数据库文件路径，相对路径基于项目目录
+    'max_age': 3600,  # 前缀的清单超过该时间（秒）未同步时，查询时在后台重新列举该前缀
+    'sync_workers': 2,  # 同时在后台列举的前缀数
+    'delimiter': '/'  # 划分目录的分隔符
+}
+
+# CDN 日志分析配置
+CDN_LOG_CONFIG = {
+    'max_workers': 4,  # 同时下载的日志文件数
+    'top_n': 100,  # 返回请求数最多的 URL 与来源域名个数
+    'strip_query': True,  # 统计 URL 时去掉查询参数
+    'settle_seconds': 12 * 3600  # 自然日结束后多久日志视为已全部生成，之前的统计结果不保存，查询时重新下载
+}
+
 # 时间格式配置
 TIME_FORMAT = {
     'date_format': '%Y-%m-%d',
@@ -49,3 +103,21 @@ DEFAULT_PARAMS = {
     'granularity': 'day',  # 默认时间粒度
     'region': 'z1'  # 默认区域
 }
+
+# 仪表盘查询配置
+DASHBOARD_CONFIG = {
+    'max_workers': 8,  # 并发查询上游接口的线程数上限
+    'request_deadline': 20,  # 单次 /api/get_stats 请求的总超时时间（秒）
+    'compress_min_bytes': 1024  # JSON 响应超过该大小时按浏览器支持压缩（brotli/gzip），设为 None 关闭压缩
+}
+
+# 热门查询后台预热配置
+PREWARM_CONFIG = {
+    'enabled': True,
+    'interval': 40,  # 每轮预热间隔（秒），应小于 CACHE_CONFIG['open_ttl']，在缓存过期前刷新
+    'jitter': 5,  # 间隔的随机抖动范围（秒）
+    'max_workers': 2,  # 预热同时执行的查询数上限
+    'max_backoff': 600,  # 上游出错时指数退避的最长间隔（秒）
+    'days': [1, 7, 30],  # 预热的时间范围：今天、最近 7 天、最近 30 天
+    'buckets': []  # [{'bucket_name': ..., 'region': ...}]，为空时使用 QINIU_CONFIG 中的存储空间
+}
@@ -0,0 +1,116 @@
+"""
+时间序列降采样
+
+长时间范围的高精度数据（如 31 天 5 分钟粒度约 9000 个点）在服务端降采样后再返回给图表。
+min/max 分桶保证每个桶内的最大值与最小值都被保留（首尾点也保留，图表时间范围不变），计费带宽峰值不会因降采样而消失；
+LTTB（Largest-Triangle-Three-Buckets）保留整体形状，点数相同时曲线更平滑。
+"""
+
+
+def summarize(series):
+    """
+    计算降采样前序列的合计、峰值和最新值，供统计卡片使用
+
+    Args:
+        series (dict): {'times': [...], 'values': [...]}
+    """
+    times, values = series['times'], series['values']
+    if not values:
+        return {'total': 0, 'peak': None, 'peak_time': None, 'latest': None, 'points': 0}
+    peak_index = max(range(len(values)), key=values.__getitem__)
+    return {
+        'total': sum(values),
+        'peak': values[peak_index],
+        'peak_time': times[peak_index],
+        'latest': values[-1],
+        'points': len(values)
+    }
+
+
+def minmax(times, values, max_points):
+    """
+    min/max 分桶降采样：保留首尾点，将其余的点分为 (max_points - 2)/2 个桶，每个桶按时间顺序保留最小值和最大值；
+    max_points 小于 4 时无法同时保留首尾点和桶内极值，原样返回
+
+    Returns:
+        tuple: (降采样后的时间列表, 数值列表)
+    """
+    count = len(values)
+    if count <= max_points or max_points < 4:
+        return list(times), list(values)
+    bucket_count = (max_points - 2) // 2
+    inner = count - 2
+    indexes = [0]
+    for bucket in range(bucket_count):
+        start = 1 + bucket * inner // bucket_count
+        stop = 1 + (bucket + 1) * inner // bucket_count
+        if start >= stop:
+            continue
+        bucket_range = range(start, stop)
+        low = min(bucket_range, key=values.__getitem__)
+        high = max(bucket_range, key=values.__getitem__)
+        indexes.extend(sorted({low, high}))
+    indexes.append(count - 1)
+    return [times[i] for i in indexes], [values[i] for i in indexes]
+
+
+def lttb(times, values, max_points):
+    """
+    LTTB 降采样：保留首尾点，其余每个桶选出与相邻桶构成三角形面积最大的点
+
+    Returns:
+        tuple: (降采样后的时间列表, 数值列表)
+    """
+    count = len(values)
+    if count <= max_points or max_points < 3:
+        return list(times), list(values)
+
+    indexes = [0]
+    bucket_size = (count - 2) / (max_points - 2)
+    previous = 0
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        stop = int((bucket + 1) * bucket_size) + 1
+
+        # 下一个桶的平均点
+        next_start = stop
+        next_stop = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_stop:
+            next_start, next_stop = count - 1, count
+        avg_time = sum(times[next_start:next_stop]) / (next_stop - next_start)
+        avg_value = sum(values[next_start:next_stop]) / (next_stop - next_start)
+
+        prev_time, prev_value = times[previous], values[previous]
+        best, best_area = start, -1.0
+        for i in range(start, stop):
+            area = abs(
+                (prev_time - avg_time) * (values[i] - prev_value)
+                - (prev_time - times[i]) * (avg_value - prev_value)
+            )
+            if area > best_area:
+                best, best_area = i, area
+        indexes.append(best)
+        previous = best
+    indexes.append(count - 1)
+    return [times[i] for i in indexes], [values[i] for i in indexes]
+
+
+METHODS = {
+    'minmax': minmax,
+    'lttb': lttb
+}
+
+
+def downsample(series, max_points, method='minmax'):
+    """
+    对 {'times': [...], 'values': [...]} 序列降采样，点数不超过 max_points 时原样返回
+
+    Args:
+        series (dict): 时间序列
+        max_points (int): 降采样后的最大点数
+        method (str): 'minmax' 或 'lttb'
+    """
+    if not max_points or len(series['values']) <= max_points:
+        return series
+    times, values = METHODS[method](series['times'], series['values'], max_points)
+    return {'times': times, 'values': values}
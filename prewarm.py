@@ -0,0 +1,165 @@
+"""
+热门查询后台预热
+
+按固定间隔在后台重新查询“今天”“最近 7 天”“最近 30 天”等热门时间范围，
+在缓存过期前刷新结果，用户打开页面时直接命中缓存和本地存储，不必等待上游接口。
+"""
+
+import time
+import random
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def hot_views(buckets, days_list, today=None):
+    """
+    生成需要预热的查询视图
+
+    Args:
+        buckets (list): [{'bucket_name': ..., 'region': ...}]
+        days_list (list): 以今天为结束日期的天数，如 [1, 7, 30]
+        today (date): 可选，默认为本地当天
+
+    Returns:
+        list: 每个视图为 dict，包含 bucket_name、region、begin_time、end_time（开区间，次日零点）和 granularity
+    """
+    today = today or datetime.date.today()
+    end_time = (today + datetime.timedelta(days=1)).strftime('%Y%m%d000000')
+    views = []
+    for bucket in buckets:
+        for days in days_list:
+            begin = today - datetime.timedelta(days=days - 1)
+            views.append({
+                'bucket_name': bucket['bucket_name'],
+                'region': bucket['region'],
+                'begin_time': begin.strftime('%Y%m%d000000'),
+                'end_time': end_time,
+                'granularity': 'day'
+            })
+    return views
+
+
+class PrewarmScheduler:
+    """
+    后台预热调度器
+
+    每轮为所有视图生成查询任务，在独立的小线程池中执行（并发数有上限，不挤占页面请求）；
+    任一任务失败时按指数退避推迟下一轮，恢复后回到正常间隔。每轮间隔叠加随机抖动，
+    多个进程同时运行时不会在同一时刻集中请求上游。
+
+    Args:
+        make_views (callable): make_views() -> 本轮需要预热的视图列表，每轮调用一次以跟随日期变化
+        make_jobs (callable): make_jobs(视图) -> 任务列表，每个任务为无参函数，成功时返回 True
+        interval (float): 正常情况下两轮之间的间隔（秒），应小于缓存有效期
+        jitter (float): 间隔的随机抖动范围（秒）
+        max_workers (int): 同时执行的任务数上限
+        max_backoff (float): 失败退避的最长间隔（秒）
+        clock (callable): 返回当前时间戳（秒）的函数，默认为 time.time
+    """
+    def __init__(self, make_views, make_jobs, interval=40, jitter=5, max_workers=2, max_backoff=600, clock=time.time):
+        self.make_views = make_views
+        self.make_jobs = make_jobs
+        self.interval = interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='qiniu-prewarm')
+        self._stop = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.consecutive_failures = 0
+        self.last_run = None
+        self.last_duration_ms = None
+        self.last_failed_jobs = 0
+        self.next_run = None
+
+    def next_delay(self):
+        """下一轮之前的等待时间：失败时按 interval * 2^失败次数 退避，不超过 max_backoff"""
+        with self._lock:
+            failures = self.consecutive_failures
+        delay = self.interval if not failures else min(self.interval * 2 ** failures, self.max_backoff)
+        return max(delay + random.uniform(-self.jitter, self.jitter), 1)
+
+    def run_once(self):
+        """
+        执行一轮预热
+
+        Returns:
+            int: 失败的任务数
+        """
+        started = self._clock()
+        jobs = [job for view in self.make_views() for job in self.make_jobs(view)]
+        futures = [self._executor.submit(job) for job in jobs]
+        failed = 0
+        for future in futures:
+            try:
+                ok = future.result()
+            except Exception:
+                ok = False
+            if not ok:
+                failed += 1
+
+        with self._lock:
+            self.runs += 1
+            self.last_run = self._clock()
+            self.last_duration_ms = round((self.last_run - started) * 1000, 1)
+            self.last_failed_jobs = failed
+            self.consecutive_failures = self.consecutive_failures + 1 if failed else 0
+        return failed
+
+    def schedule_next(self):
+        """
+        按当前的失败次数安排下一轮
+
+        Returns:
+            float: 距下一轮的秒数
+        """
+        delay = self.next_delay()
+        with self._lock:
+            self.next_run = self._clock() + delay
+        return delay
+
+    def _loop(self):
+        # 启动后立即预热一轮，之后按间隔刷新
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"预热任务出错: {e}")
+                with self._lock:
+                    self.consecutive_failures += 1
+            if self._stop.wait(self.schedule_next()):
+                break
+
+    def start(self):
+        """启动后台预热线程，重复调用或停止后调用无效"""
+        if self._stopped or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='qiniu-prewarm', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止预热线程并释放线程池，正在执行的一轮会执行完毕；停止后不能再次启动"""
+        self._stopped = True
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """返回预热运行状态"""
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'runs': self.runs,
+                'consecutive_failures': self.consecutive_failures,
+                'last_run': self.last_run,
+                'last_duration_ms': self.last_duration_ms,
+                'last_failed_jobs': self.last_failed_jobs,
+                'next_run': self.next_run
+            }
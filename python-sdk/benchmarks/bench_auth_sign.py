@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Auth signing benchmark: ops/sec of private download URLs and management tokens.
+
+legacy repeats what Auth and QiniuMacAuth did before the keyed HMAC state was cached:
+hmac.new with the secret key per signature, urlparse per request and a signing string
+built with +=. The other rows use the current Auth / QiniuMacAuth.
+
+Usage:
+    python benchmarks/bench_auth_sign.py [ops]
+"""
+import hmac
+import sys
+import time
+from hashlib import sha1
+
+from qiniu import Auth, QiniuMacAuth
+from qiniu.compat import b, urlparse
+from qiniu.utils import urlsafe_base64_encode
+
+ACCESS_KEY = 'abcdefghklmnopq'
+SECRET_KEY = 'dxVQk8gyk3WswArbNhdKIwmwibJ9nFsQhMNUmtIM'
+
+
+def legacy_token(data):
+    return '{0}:{1}'.format(ACCESS_KEY, urlsafe_base64_encode(hmac.new(b(SECRET_KEY), b(data), sha1).digest()))
+
+
+def legacy_private_download_url(url, deadline):
+    url += '&' if '?' in url else '?'
+    url = '{0}e={1}'.format(url, str(deadline))
+    return '{0}&token={1}'.format(url, legacy_token(url))
+
+
+def legacy_mac_token(method, host, url, qheaders, content_type=None, body=None):
+    parsed_url = urlparse(url)
+    path_with_query = parsed_url.path
+    if parsed_url.query != '':
+        path_with_query = ''.join([path_with_query, '?', parsed_url.query])
+    data = ''.join(["%s %s" % (method, path_with_query), "\n", "Host: %s" % (host or parsed_url.netloc)])
+    if content_type:
+        data += "\n"
+        data += "Content-Type: %s" % content_type
+    if qheaders:
+        data += "\n"
+        data += qheaders
+    data += "\n\n"
+    if content_type and content_type != "application/octet-stream" and body:
+        data += body
+    return legacy_token(data)
+
+
+def timed(func, ops):
+    started = time.time()
+    func()
+    return ops / (time.time() - started)
+
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    urls = ['http://cdn.example.com/videos/{0:08d}.mp4'.format(i) for i in range(ops)]
+    deadline = int(time.time()) + 3600
+    auth = Auth(ACCESS_KEY, SECRET_KEY)
+    mac_auth = QiniuMacAuth(ACCESS_KEY, SECRET_KEY)
+    qheaders = 'X-Qiniu-Date: 20260101T000000Z'
+    mac_args = [('POST', None, 'http://rs.qbox.me/stat/' + url[-12:] + '?a=1', qheaders, 'application/x-www-form-urlencoded', 'k=v')
+                for url in urls]
+
+    signed = auth.private_download_urls(urls[:1])[0]
+    assert signed == legacy_private_download_url(urls[0], int(signed.split('e=')[1].split('&')[0]))
+    assert mac_auth.token_of_request(*mac_args[0]) == legacy_mac_token(*mac_args[0])
+
+    rows = [
+        ('private_download_url', 'legacy', lambda: [legacy_private_download_url(url, deadline) for url in urls]),
+        ('private_download_url', 'cached', lambda: [auth.private_download_url(url) for url in urls]),
+        ('private_download_url', 'bulk', lambda: auth.private_download_urls(urls)),
+        ('mac token_of_request', 'legacy', lambda: [legacy_mac_token(*args) for args in mac_args]),
+        ('mac token_of_request', 'cached', lambda: [mac_auth.token_of_request(*args) for args in mac_args]),
+    ]
+    print('{0:<24}{1:<10}{2:>12}'.format('operation', 'mode', 'ops/sec'))
+    for operation, mode, func in rows:
+        print('{0:<24}{1:<10}{2:>12.0f}'.format(operation, mode, timed(func, ops)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Connection reuse benchmark for qiniu.http.default_client.
+
+Runs small ``BucketManager.stat`` calls, interleaved with requests sent by
+``qn_http_client`` (the client used by uploaders and region queries), against
+a local rs stub and counts the TCP connections accepted by the stub.
+
+* remount: the previous behaviour, a new HTTPAdapter is mounted before every
+  ``qn_http_client`` request, dropping the pooled connections.
+* persistent: the adapter is rebuilt only when qiniu.config pool settings change.
+
+The stub is kept in process because tests/mock_server speaks HTTP/1.0 and
+closes every connection, which would hide the difference.
+
+Usage:
+    python benchmarks/bench_default_client.py [calls]
+"""
+import sys
+import time
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+from requests.adapters import HTTPAdapter
+
+from qiniu import Auth, BucketManager, config
+from qiniu.http import default_client
+from qiniu.http.endpoint import Endpoint
+from qiniu.http.region import Region, ServiceName
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StatHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with StatHandler.lock:
+            StatHandler.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = b'{"fsize": 1024, "hash": "FgAgNanwkBpVRtF1cmA5F1Bj5uAd", "mimeType": "text/plain", "putTime": 1, "type": 0}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Reqid', 'bench-req-id')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def _remount_every_time():
+    adapter = HTTPAdapter(
+        pool_connections=config.get_default('connection_pool'),
+        pool_maxsize=config.get_default('connection_pool'),
+        max_retries=config.get_default('connection_retries'))
+    default_client.qn_http_client.session.mount('http://', adapter)
+
+
+def run(label, bucket_manager, url, calls):
+    StatHandler.connections = 0
+    started = time.time()
+    for i in range(calls):
+        ret, info = bucket_manager.stat('bench', 'key-{0}'.format(i))
+        assert ret and info.status_code == 200, info
+        ret, info = default_client.qn_http_client.get(url)
+        assert info.status_code == 200, info
+    elapsed = time.time() - started
+    print('{0:<12}{1:>8}{2:>14}{3:>12.1f}'.format(label, calls, StatHandler.connections, elapsed * 1000))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    server = ThreadingServer(('127.0.0.1', 0), StatHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    host = '127.0.0.1:{0}'.format(server.server_address[1])
+
+    region = Region(region_id='bench', services={ServiceName.RS: [Endpoint(host)]})
+    bucket_manager = BucketManager(Auth('bench-ak', 'bench-sk'), regions=[region])
+    url = 'http://{0}/ping'.format(host)
+    default_client.qn_http_client.session.trust_env = False
+
+    print('{0:<12}{1:>8}{2:>14}{3:>12}'.format('mode', 'calls', 'connections', 'ms'))
+
+    persistent = default_client._init_http_adapter
+    default_client._init_http_adapter = _remount_every_time
+    try:
+        run('remount', bucket_manager, url, calls)
+    finally:
+        default_client._init_http_adapter = persistent
+    # start from a fresh adapter, as a new process would
+    default_client._adapter_settings = None
+    run('persistent', bucket_manager, url, calls)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
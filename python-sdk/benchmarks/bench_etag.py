@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Etag benchmark: sequential qiniu.utils.etag vs the threaded etag_parallel.
+
+Usage:
+    python benchmarks/bench_etag.py [size_mb] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from qiniu.utils import etag, etag_parallel
+
+
+def timed(func, *args, **kwargs):
+    started = time.time()
+    result = func(*args, **kwargs)
+    return result, (time.time() - started) * 1000
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    fd, file_path = tempfile.mkstemp(prefix='qiniu-bench-etag-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            chunk = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                f.write(chunk)
+
+        # warm the page cache so both runs measure hashing rather than disk
+        etag(file_path)
+        expect, sequential_ms = timed(etag, file_path)
+        result, parallel_ms = timed(etag_parallel, file_path, max_workers=workers)
+        assert result == expect
+
+        print('{0:<16}{1:>10}{2:>12}'.format('mode', 'size(MB)', 'ms'))
+        print('{0:<16}{1:>10}{2:>12.1f}'.format('etag', size_mb, sequential_ms))
+        print('{0:<16}{1:>10}{2:>12.1f}'.format('etag_parallel', size_mb, parallel_ms))
+    finally:
+        os.remove(file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+ResponseInfo benchmark: decoding a large RSF list response.
+
+legacy repeats what ResponseInfo did before bodies were decoded lazily: decode the text in
+__init__, then decode it again and parse it with requests' json() in HTTPClient.send_request.
+The other rows build a ResponseInfo and call json() with each installed JSON backend.
+
+Usage:
+    python benchmarks/bench_response_json.py [items] [rounds]
+"""
+import json
+import sys
+import time
+
+import requests
+
+from qiniu.compat import json_backends
+from qiniu.config import _config
+from qiniu.http import ResponseInfo
+
+
+def list_payload(items):
+    return json.dumps({
+        'marker': 'eyJjIjowLCJrIjoiZmlsZXMvMDAwMDk5OTkuanBnIn0=',
+        'items': [
+            {
+                'key': 'files/{0:08d}.jpg'.format(i),
+                'hash': 'Fh8xVqod2MQ1mocfI4S4KpRL6D98',
+                'fsize': 1024 + i,
+                'mimeType': 'image/jpeg',
+                'putTime': 17000000000000000 + i,
+                'type': 0,
+                'status': 0,
+                'md5': 'a4f3bb5e1b3c8f3e61a4a1c7b0d1e5f2'
+            }
+            for i in range(items)
+        ]
+    }).encode('utf-8')
+
+
+def new_response(payload):
+    resp = requests.Response()
+    resp._content = payload
+    resp.status_code = 200
+    resp.url = 'http://rsf.qbox.me/list'
+    resp.headers['Content-Type'] = 'application/json'
+    resp.headers['X-Reqid'] = 'bench-reqid'
+    return resp
+
+
+def legacy(resp):
+    resp.text
+    resp.encoding = 'utf-8'
+    return resp.json()
+
+
+def lazy(resp):
+    return ResponseInfo(resp).json()
+
+
+def timed(func, payload, rounds):
+    started = time.time()
+    for _ in range(rounds):
+        ret = func(new_response(payload))
+    return ret, (time.time() - started) * 1000 / rounds
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    payload = list_payload(items)
+
+    expect, legacy_ms = timed(legacy, payload, rounds)
+    print('payload {0:.2f} MB, {1} items'.format(len(payload) / 1024.0 / 1024, items))
+    print('{0:<16}{1:>12}'.format('mode', 'ms/response'))
+    print('{0:<16}{1:>12.2f}'.format('legacy', legacy_ms))
+    try:
+        for backend in sorted(json_backends):
+            _config['json_backend'] = backend
+            ret, ms = timed(lazy, payload, rounds)
+            assert ret == expect
+            print('{0:<16}{1:>12.2f}'.format('lazy+' + backend, ms))
+    finally:
+        _config['json_backend'] = None
+
+
+if __name__ == '__main__':
+    main()
@@ -17,11 +17,13 @@ from .config import set_default
 from .zone import Zone
 from .region import LegacyRegion as Region
 
+from .services.storage.listing import ListError
 from .services.storage.bucket import BucketManager, build_batch_copy, build_batch_rename, build_batch_move, \
     build_batch_stat, build_batch_delete, build_batch_restoreAr, build_batch_restore_ar
 from .services.storage.uploader import put_data, put_file, put_file_v2, put_stream, put_stream_v2
 from .services.storage.upload_progress_recorder import UploadProgressRecorder
 from .services.cdn.manager import CdnManager, DataType, create_timestamp_anti_leech_url, DomainManager
+from .services.cdn.logs import LogError
 from .services.processing.pfop import PersistentFop
 from .services.processing.cmd import build_op, pipe_cmd, op_save
 from .services.compute.app import AccountClient
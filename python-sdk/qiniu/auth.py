@@ -50,6 +50,73 @@ _policy_fields = {
 }
 
 
+_SCHEME_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.')
+
+
+def _path_with_query(url):
+    """
+    Returns:
+        (netloc, path_with_query): 与 urlparse 的 netloc 和 path?query 相同
+    """
+    scheme_end = url.find('://')
+    if (
+        scheme_end <= 0 or not url[0].isalpha() or not _SCHEME_CHARS.issuperset(url[:scheme_end])
+        or ';' in url or '[' in url or '\t' in url or '\r' in url or '\n' in url or url[0] <= ' '
+    ):
+        # 没有 scheme 或少见的格式交给 urlparse 处理
+        parsed_url = urlparse(url)
+        if parsed_url.query != '':
+            return parsed_url.netloc, ''.join([parsed_url.path, '?', parsed_url.query])
+        return parsed_url.netloc, parsed_url.path
+    url = url.split('#', 1)[0]
+    start = scheme_end + 3
+    end = len(url)
+    for sep in '/?':
+        i = url.find(sep, start)
+        if 0 <= i < end:
+            end = i
+    path_with_query = url[end:]
+    # 查询参数为空时不带 ?
+    if path_with_query.find('?') == len(path_with_query) - 1:
+        path_with_query = path_with_query[:-1]
+    return url[start:end], path_with_query
+
+
+class HmacSigner(object):
+    """
+    HMAC-SHA1 签名类
+
+    创建时计算一次密钥的 HMAC 状态，每次签名复制该状态后只处理待签名数据，
+    不再重复处理密钥，可在多个线程间共享。
+
+    Attributes:
+        secret_key: 密钥，bytes
+    """
+
+    def __init__(self, secret_key):
+        self.secret_key = b(secret_key)
+        self.__hmac = hmac.new(self.secret_key, digestmod=sha1)
+
+    def digest(self, data):
+        hashed = self.__hmac.copy()
+        hashed.update(b(data))
+        return hashed.digest()
+
+    def sign(self, data):
+        """
+        Returns:
+            urlsafe base64 编码的签名
+        """
+        return urlsafe_base64_encode(self.digest(data))
+
+    def __getstate__(self):
+        # HMAC 对象不能序列化，反序列化时重新计算
+        return {'secret_key': self.secret_key}
+
+    def __setstate__(self, state):
+        self.__init__(state['secret_key'])
+
+
 class Auth(object):
     """七牛安全机制类
 
@@ -65,6 +132,7 @@ class Auth(object):
         self.__checkKey(access_key, secret_key)
         self.__access_key = access_key
         self.__secret_key = b(secret_key)
+        self.__signer = HmacSigner(self.__secret_key)
         self.disable_qiniu_timestamp_signature = disable_qiniu_timestamp_signature
 
     def get_access_key(self):
@@ -74,9 +142,7 @@ class Auth(object):
         return self.__secret_key
 
     def __token(self, data):
-        data = b(data)
-        hashed = hmac.new(self.__secret_key, data, sha1)
-        return urlsafe_base64_encode(hashed.digest())
+        return self.__signer.sign(data)
 
     def token(self, data):
         return '{0}:{1}'.format(self.__access_key, self.__token(data))
@@ -97,20 +163,11 @@ class Auth(object):
         Returns:
             管理凭证
         """
-        parsed_url = urlparse(url)
-        query = parsed_url.query
-        path = parsed_url.path
-        data = path
-        if query != '':
-            data = ''.join([data, '?', query])
-        data = ''.join([data, "\n"])
-
-        if body:
-            mimes = [
-                'application/x-www-form-urlencoded'
-            ]
-            if content_type in mimes:
-                data += body
+        _, path_with_query = _path_with_query(url)
+        if body and content_type == 'application/x-www-form-urlencoded':
+            data = ''.join([path_with_query, '\n', body])
+        else:
+            data = path_with_query + '\n'
 
         return '{0}:{1}'.format(self.__access_key, self.__token(data))
 
@@ -129,15 +186,26 @@ class Auth(object):
         Returns:
             私有资源的下载链接
         """
-        deadline = int(time.time()) + expires
-        if '?' in url:
-            url += '&'
-        else:
-            url += '?'
-        url = '{0}e={1}'.format(url, str(deadline))
+        return self.private_download_urls([url], expires)[0]
+
+    def private_download_urls(self, urls, expires=3600):
+        """批量生成私有资源下载链接，所有链接使用相同的过期时间
+
+        Args:
+            urls:    私有空间资源的原始URL的可迭代对象
+            expires: 下载凭证有效期，默认为3600s
 
-        token = self.token(url)
-        return '{0}&token={1}'.format(url, token)
+        Returns:
+            list: 与 urls 一一对应的下载链接
+        """
+        deadline = str(int(time.time()) + expires)
+        access_key = self.__access_key
+        sign = self.__signer.sign
+        signed = []
+        for url in urls:
+            url = ''.join([url, '&' if '?' in url else '?', 'e=', deadline])
+            signed.append(''.join([url, '&token=', access_key, ':', sign(url)]))
+        return signed
 
     def upload_token(
             self,
@@ -288,12 +356,11 @@ class QiniuMacAuth(object):
         self.__checkKey(access_key, secret_key)
         self.__access_key = access_key
         self.__secret_key = b(secret_key)
+        self.__signer = HmacSigner(self.__secret_key)
         self.disable_qiniu_timestamp_signature = disable_qiniu_timestamp_signature
 
     def __token(self, data):
-        data = b(data)
-        hashed = hmac.new(self.__secret_key, data, sha1)
-        return urlsafe_base64_encode(hashed.digest())
+        return self.__signer.sign(data)
 
     @property
     def should_sign_with_timestamp(self):
@@ -320,39 +387,23 @@ class QiniuMacAuth(object):
         [<Body>] #这里的 <Body> 只有在 <ContentType> 存在且不为 application/octet-stream 时才签进去。
 
         """
-        parsed_url = urlparse(url)
-        netloc = parsed_url.netloc
-        path = parsed_url.path
-        query = parsed_url.query
-
+        netloc, path_with_query = _path_with_query(url)
         if not host:
             host = netloc
 
-        path_with_query = path
-        if query != '':
-            path_with_query = ''.join([path_with_query, '?', query])
-        data = ''.join([
-            "%s %s" % (method, path_with_query),
-            "\n",
-            "Host: %s" % host
-        ])
-
+        parts = [method, ' ', path_with_query, '\nHost: ', host]
         if content_type:
-            data += "\n"
-            data += "Content-Type: %s" % content_type
-
+            parts.extend(['\nContent-Type: ', content_type])
         if qheaders:
-            data += "\n"
-            data += qheaders
-
-        data += "\n\n"
+            parts.extend(['\n', qheaders])
+        parts.append('\n\n')
 
         if content_type and content_type != "application/octet-stream" and body:
             if isinstance(body, bytes):
-                data += body.decode(encoding='UTF-8')
+                parts.append(body.decode(encoding='UTF-8'))
             else:
-                data += body
-        return '{0}:{1}'.format(self.__access_key, self.__token(data))
+                parts.append(body)
+        return '{0}:{1}'.format(self.__access_key, self.__token(''.join(parts)))
 
     def qiniu_headers(self, headers):
         qiniu_fields = [
@@ -94,3 +94,58 @@ elif is_py3:
 
     def is_seekable(data):
         return data.seekable()
+
+# ------------
+# JSON backend
+# ------------
+# 解码响应体的 JSON 后端，参数为 UTF-8 编码的 bytes 或 str
+
+
+def _stdlib_json_loads(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+json_backends = {'json': _stdlib_json_loads}
+
+try:
+    import ujson
+    json_backends['ujson'] = ujson.loads
+except ImportError:
+    pass
+
+try:
+    import orjson
+    json_backends['orjson'] = orjson.loads
+except ImportError:
+    pass
+
+
+def get_json_loads(backend=None):
+    """
+    Parameters
+    ----------
+    backend: str, optional
+        orjson、ujson 或 json，为 None 时使用标准库 json
+
+    Returns
+    -------
+    function
+        orjson、ujson 解析失败时（如超过 64 位的整数）改用标准库 json 解析；
+        部分版本的 orjson 会将超过 64 位的整数解析为 float 而不报错，因此默认不使用
+    """
+    if backend is None:
+        backend = 'json'
+    if backend not in json_backends:
+        raise ValueError('json backend {0} is not available'.format(backend))
+    loads = json_backends[backend]
+    if backend == 'json':
+        return loads
+
+    def loads_with_fallback(data):
+        try:
+            return loads(data)
+        except ValueError:
+            return _stdlib_json_loads(data)
+    return loads_with_fallback
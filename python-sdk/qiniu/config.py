@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from .compat import get_json_loads
+
 RS_HOST = 'http://rs.qiniu.com'  # 管理操作Host
 RSF_HOST = 'http://rsf.qbox.me'  # 列举操作Host
 API_HOST = 'http://api.qiniuapi.com'  # 数据处理操作Host
@@ -25,7 +27,8 @@ _config = {
     'connection_timeout': 30,  # 链接超时为时间为30s
     'connection_retries': 3,  # 链接重试次数为3次
     'connection_pool': 10,  # 链接池个数为10
-    'default_upload_threshold': 2 * _BLOCK_SIZE  # put_file上传方式的临界默认值
+    'default_upload_threshold': 2 * _BLOCK_SIZE,  # put_file上传方式的临界默认值
+    'json_backend': None  # 解码响应体的 JSON 后端 orjson、ujson 或 json，默认使用标准库 json
 }
 
 _is_customized_default = {
@@ -51,7 +54,7 @@ def set_default(
         connection_timeout=None, default_rs_host=None, default_uc_host=None,
         default_rsf_host=None, default_api_host=None, default_upload_threshold=None,
         default_query_region_host=None, default_query_region_backup_hosts=None,
-        default_backup_hosts_retry_times=None, default_uc_backup_hosts=None):
+        default_backup_hosts_retry_times=None, default_uc_backup_hosts=None, json_backend=None):
     if default_zone:
         _config['default_zone'] = default_zone
         _is_customized_default['default_zone'] = True
@@ -101,3 +104,7 @@ def set_default(
     if default_upload_threshold:
         _config['default_upload_threshold'] = default_upload_threshold
         _is_customized_default['default_upload_threshold'] = True
+    if json_backend:
+        get_json_loads(json_backend)
+        _config['json_backend'] = json_backend
+        _is_customized_default['json_backend'] = True
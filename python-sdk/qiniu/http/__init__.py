@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import logging
 import platform
 
 import requests
@@ -25,12 +24,8 @@ def __return_wrapper(resp):
     if resp.status_code != 200 or resp.headers.get('X-Reqid') is None:
         return None, ResponseInfo(resp)
     resp.encoding = 'utf-8'
-    try:
-        ret = resp.json()
-    except ValueError:
-        logging.debug("response body decode error: %s" % resp.text)
-        ret = {}
-    return ret, ResponseInfo(resp)
+    info = ResponseInfo(resp)
+    return info.json(), info
 
 
 def _init():
@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-import logging
-
 import requests
 
 from qiniu.config import get_default
@@ -73,12 +71,7 @@ class HTTPClient:
         if not resp_info.ok():
             return None, resp_info
 
-        try:
-            ret = resp_info.json()
-        except ValueError:
-            logging.debug("response body decode error: %s" % resp_info.text_body)
-            ret = {}
-        return ret, resp_info
+        return resp_info.json(), resp_info
 
     def get(
         self,
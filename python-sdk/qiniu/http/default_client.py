@@ -1,4 +1,5 @@
 import functools
+import threading
 
 from requests.adapters import HTTPAdapter
 
@@ -13,6 +14,10 @@ qn_http_client = HTTPClient(
     ]
 )
 
+# pool settings of the adapter currently mounted on qn_http_client.session
+_adapter_settings = None
+_adapter_lock = threading.Lock()
+
 
 # compatibility with some config from qiniu.config
 def _before_send(func):
@@ -28,10 +33,31 @@ qn_http_client.send_request = _before_send(qn_http_client.send_request)
 
 
 def _init_http_adapter():
-    # may be optimized:
-    # only called when config changed, not every time before send request
-    adapter = HTTPAdapter(
-        pool_connections=config.get_default('connection_pool'),
-        pool_maxsize=config.get_default('connection_pool'),
-        max_retries=config.get_default('connection_retries'))
-    qn_http_client.session.mount('http://', adapter)
+    """
+    mount an adapter built from qiniu.config pool settings on qn_http_client.session.
+
+    the adapter is rebuilt only when the settings changed, so the per host
+    connection pools of the adapter (up/rs/rsf/uc...) are kept across requests
+    instead of reconnecting on every request.
+    """
+    global _adapter_settings
+    settings = (
+        config.get_default('connection_pool'),
+        config.get_default('connection_retries')
+    )
+    if settings == _adapter_settings:
+        return
+    with _adapter_lock:
+        if settings == _adapter_settings:
+            return
+        pool_size, retries = settings
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retries)
+        previous = qn_http_client.session.adapters.get('http://')
+        qn_http_client.session.mount('http://', adapter)
+        if _adapter_settings is not None and previous is not None:
+            # requests still using the previous adapter finish on their own connections
+            previous.close()
+        _adapter_settings = settings
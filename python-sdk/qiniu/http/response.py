@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
-from qiniu.compat import is_py2, is_py3
+import logging
+
+from qiniu.compat import is_py2, is_py3, get_json_loads
+from qiniu.config import get_default
+
+_UNPARSED = object()
+_INVALID_JSON = object()
 
 
 class ResponseInfo(object):
@@ -16,8 +22,12 @@ class ResponseInfo(object):
     """
 
     def __init__(self, response, exception=None):
-        """用响应包和异常信息初始化ResponseInfo类"""
+        """用响应包和异常信息初始化ResponseInfo类
+
+        响应体在第一次访问 text_body、error 或调用 json() 时才解码，且只解码一次
+        """
         self.__response = response
+        self.__json = _UNPARSED
         self.exception = exception
         if response is None:
             self.url = None
@@ -29,21 +39,22 @@ class ResponseInfo(object):
         else:
             self.url = response.url
             self.status_code = response.status_code
-            self.text_body = response.text
             self.req_id = response.headers.get('X-Reqid')
             self.x_log = response.headers.get('X-Log')
-            if self.status_code >= 400:
-                if self.__check_json(response):
-                    ret = response.json() if response.text != '' else None
-                    if ret is None:
-                        self.error = 'unknown'
-                    else:
-                        self.error = response.text
-                else:
-                    self.error = response.text
             if self.req_id is None and self.status_code == 200:
                 self.error = 'server is not qiniu'
 
+    def __getattr__(self, name):
+        # 只在实例上还没有该属性时调用，结果保存到实例上
+        if name == 'text_body' and '_ResponseInfo__response' in self.__dict__:
+            self.text_body = self.__response.text
+            return self.text_body
+        if name == 'error' and self.__dict__.get('status_code', 0) >= 400:
+            # 响应体为 JSON 的 null 时没有错误信息
+            self.error = 'unknown' if self.__parse_json() is None else self.text_body
+            return self.error
+        raise AttributeError(name)
+
     def ok(self):
         return self.status_code // 100 == 2
 
@@ -67,27 +78,37 @@ class ResponseInfo(object):
     def connect_failed(self):
         return self.__response is None or self.req_id is None
 
+    def __parse_json(self):
+        """
+        Returns:
+            解析得到的值，无法解析时为 _INVALID_JSON
+        """
+        if self.__json is _UNPARSED:
+            try:
+                self.__json = get_json_loads(get_default('json_backend'))(self.__response.content)
+            except Exception:
+                self.__json = _INVALID_JSON
+        return self.__json
+
     def json(self):
-        try:
-            self.__response.encoding = "utf-8"
-            return self.__response.json()
-        except Exception:
+        if self.__response is None:
+            return {}
+        ret = self.__parse_json()
+        if ret is _INVALID_JSON:
+            logging.debug('response body decode error: %s', self.text_body)
             return {}
+        return ret
 
     def __str__(self):
+        # 输出前先解码响应体
+        self.text_body
+        getattr(self, 'error', None)
         if is_py2:
             return ', '.join(
-                ['%s:%s' % item for item in self.__dict__.items()]).encode('utf-8')
+                ['%s:%s' % item for item in self.__dict__.items() if item[0] != '_ResponseInfo__json']).encode('utf-8')
         elif is_py3:
             return ', '.join(
-                ['%s:%s' % item for item in self.__dict__.items()])
+                ['%s:%s' % item for item in self.__dict__.items() if item[0] != '_ResponseInfo__json'])
 
     def __repr__(self):
         return self.__str__()
-
-    def __check_json(self, response):
-        try:
-            response.json()
-            return True
-        except Exception:
-            return False
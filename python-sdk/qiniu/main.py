@@ -2,8 +2,105 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import glob
+import os
+import sqlite3
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from qiniu import etag
+from qiniu.auth import Auth
+from qiniu.compat import json, is_py2
+from qiniu.services.storage.dir_sync import DirectorySync
+from qiniu.services.storage.etag_cache import EtagCache
+from qiniu.utils import etag_parallel, etag_v2
+
+
+def _walk_files(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def _glob(pattern):
+    if is_py2:
+        return glob.glob(pattern)
+    return glob.glob(pattern, recursive=True)
+
+
+def iter_etag_files(patterns):
+    """
+    展开命令行参数中的文件、目录（递归）和通配符
+
+    不存在且不匹配任何文件的参数原样返回，由计算 etag 时报告错误
+    """
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths = [pattern]
+        elif os.path.exists(pattern):
+            yield pattern
+            continue
+        else:
+            paths = sorted(_glob(pattern)) or [pattern]
+        for path in paths:
+            if os.path.isdir(path):
+                for file_path in _walk_files(path):
+                    yield file_path
+            else:
+                yield path
+
+
+def _file_etag(file_path, part_size, cache, hash_workers):
+    """
+    Returns:
+        dict: path、etag、size、cached，出错时为 path 和 error
+    """
+    try:
+        st = os.stat(file_path)
+        etag = cache.get(file_path, st=st, part_size=part_size) if cache else None
+        cached = etag is not None
+        if not cached:
+            if part_size:
+                etag = etag_v2(file_path, part_size=part_size, max_workers=hash_workers)
+            else:
+                etag = etag_parallel(file_path, max_workers=hash_workers)
+            if cache:
+                cache.set(file_path, etag, st=st, part_size=part_size)
+        return {'path': file_path, 'etag': etag, 'size': st.st_size, 'cached': cached}
+    except (IOError, OSError) as e:
+        return {'path': file_path, 'error': str(e)}
+
+
+def iter_etags(file_paths, jobs=1, part_size=None, cache=None):
+    """
+    并发计算多个文件的 etag，按输入顺序返回结果
+
+    Args:
+        file_paths: 文件路径的可迭代对象，按需读取
+        jobs: 同时计算的文件数
+        part_size: 可选，v2 分片上传的分片大小
+        cache: 可选，EtagCache
+
+    Yields:
+        dict: 见 _file_etag
+    """
+    jobs = max(1, jobs)
+    # 多个文件并发时每个文件单线程计算，避免线程数成倍增加
+    hash_workers = 1 if jobs > 1 else None
+    if jobs == 1:
+        for file_path in file_paths:
+            yield _file_etag(file_path, part_size, cache, hash_workers)
+        return
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for file_path in file_paths:
+            pending.append(executor.submit(_file_etag, file_path, part_size, cache, hash_workers))
+            if len(pending) >= 4 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def main():
@@ -18,22 +115,144 @@ def main():
         'etag_files',
         metavar='N',
         nargs='+',
-        help='the file list for calculate')
+        help='the file list for calculate, directories are walked recursively and glob patterns are expanded')
+    parser_etag.add_argument(
+        '--part-size',
+        type=int,
+        default=None,
+        help='part size in bytes used by the v2 resumable upload, default 4MB')
+    parser_etag.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='number of files to hash concurrently, default 1')
+    parser_etag.add_argument(
+        '--json',
+        action='store_true',
+        help='print one JSON object per file (NDJSON): path, etag, size, cached or path, error')
+    parser_etag.add_argument(
+        '--cache',
+        metavar='PATH',
+        help='etag cache file, unchanged files (same inode, size and mtime) are not hashed again; no cache is used by default')
+
+    parser_sync = sub_parsers.add_parser(
+        'sync',
+        description='upload new and changed files of a local directory to a bucket, '
+                    'credentials are read from QINIU_ACCESS_KEY and QINIU_SECRET_KEY',
+        help='sync local_dir bucket')
+    parser_sync.add_argument('local_dir', help='the local directory')
+    parser_sync.add_argument('bucket', help='the bucket name')
+    parser_sync.add_argument(
+        '--prefix',
+        default='',
+        help='key prefix in the bucket, the key of a file is the prefix followed by its relative path')
+    parser_sync.add_argument(
+        '--delete',
+        action='store_true',
+        help='delete files under the prefix in the bucket that do not exist locally')
+    parser_sync.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=4,
+        help='number of files to upload concurrently, default 4')
+    parser_sync.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='only count the files to upload and delete')
+    parser_sync.add_argument(
+        '--cache',
+        metavar='PATH',
+        help='etag cache file, unchanged files are not hashed again; no cache is used by default')
+    parser_etag.set_defaults(command=etag_command)
+    parser_sync.set_defaults(command=sync_command)
 
     args = parser.parse_args()
+    command = getattr(args, 'command', None)
+    if command:
+        command(args)
 
+
+def _open_cache(args):
+    if not args.cache:
+        return None
     try:
-        etag_files = args.etag_files
+        return EtagCache(args.cache)
+    except (IOError, OSError, sqlite3.Error) as e:
+        sys.stderr.write('etag cache {0} is not available: {1}\n'.format(args.cache, e))
+        return None
+
 
-    except AttributeError:
-        etag_files = None
+def etag_command(args):
+    etag_files = args.etag_files
+    if not etag_files:
+        return
 
-    if etag_files:
-        r = [etag(file) for file in etag_files]
-        if len(r) == 1:
-            print(r[0])
+    cache = _open_cache(args)
+    failed = False
+    try:
+        results = iter_etags(
+            iter_etag_files(etag_files),
+            jobs=args.jobs,
+            part_size=args.part_size,
+            cache=cache
+        )
+        if args.json:
+            for result in results:
+                failed = failed or 'error' in result
+                sys.stdout.write(json.dumps(result) + '\n')
         else:
-            print(' '.join(r))
+            r = []
+            for result in results:
+                if 'error' in result:
+                    failed = True
+                    sys.stderr.write('{0}: {1}\n'.format(result['path'], result['error']))
+                else:
+                    r.append(result['etag'])
+            if len(r) == 1:
+                print(r[0])
+            elif r:
+                print(' '.join(r))
+    finally:
+        if cache:
+            cache.close()
+
+    if failed:
+        sys.exit(1)
+
+
+def sync_command(args):
+    access_key = os.environ.get('QINIU_ACCESS_KEY')
+    secret_key = os.environ.get('QINIU_SECRET_KEY')
+    if not access_key or not secret_key:
+        sys.stderr.write('QINIU_ACCESS_KEY and QINIU_SECRET_KEY are required\n')
+        sys.exit(2)
+    if not os.path.isdir(args.local_dir):
+        sys.stderr.write('{0} is not a directory\n'.format(args.local_dir))
+        sys.exit(2)
+
+    cache = _open_cache(args)
+    try:
+        result = DirectorySync(
+            Auth(access_key, secret_key),
+            args.bucket,
+            args.local_dir,
+            prefix=args.prefix,
+            delete=args.delete,
+            max_workers=args.jobs,
+            etag_cache=cache,
+            dry_run=args.dry_run
+        ).run()
+    finally:
+        if cache:
+            cache.close()
+
+    for key, error in result['failed']:
+        sys.stderr.write('{0}: {1}\n'.format(key, error))
+    print('uploaded {0} ({1} bytes), skipped {2}, deleted {3}, failed {4}'.format(
+        result['uploaded'], result['uploaded_bytes'], result['skipped'], result['deleted'], len(result['failed'])
+    ))
+    if result['failed']:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
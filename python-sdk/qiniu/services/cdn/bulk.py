@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from qiniu.utils import RateLimiter
+
+# 单次请求的数量上限，参考 https://developer.qiniu.com/fusion/api/1229/cache-refresh
+MAX_REFRESH_URLS = 100
+MAX_REFRESH_DIRS = 10
+MAX_PREFETCH_URLS = 100
+
+# 任务的最终状态
+_DONE_STATES = ('success', 'failure')
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable or []:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkRefresher(object):
+    """
+    批量刷新、预取类
+
+    把任意数量的外链按接口单次请求的上限拆分为多个请求，在速率限制下并发发出；
+    根据接口返回的当日剩余额度记录用量，额度不足的外链不再请求，结果为 quota_exceeded；
+    请求完成后按 requestId 轮询任务状态，直到全部完成或超时。
+
+    每个外链的结果为 dict，state 为：
+        success、failure、processing（超时时仍未完成）：任务状态，包含 task_id、request_id
+        invalid：接口认为外链无效
+        quota_exceeded：当日额度不足，未请求
+        error：请求失败，包含 code、error
+
+    Attributes:
+        cdn_manager: CdnManager
+        max_workers: 同时发出的请求数
+        rate: 每秒最多发出的请求数，为 None 时不限制
+        poll_interval: 第一次查询任务状态前等待的秒数，之后逐次增加，最多 max_poll_interval
+        max_poll_interval: 查询任务状态的最长间隔
+        timeout: 等待任务完成的最长秒数
+        quota: 当日剩余额度，url、dir、prefetch 分别为刷新文件、刷新目录、预取，未知时为 None
+    """
+
+    def __init__(self, cdn_manager, max_workers=4, rate=5, poll_interval=5, max_poll_interval=60, timeout=1800):
+        self.cdn_manager = cdn_manager
+        self.max_workers = max(1, max_workers)
+        self.rate = rate
+        self.rate_limiter = RateLimiter(rate)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.quota = {'url': None, 'dir': None, 'prefetch': None}
+        self.__lock = threading.Lock()
+
+    def __reserve(self, kind, chunk):
+        """
+        Returns:
+            (sent, skipped): 额度内可以请求的外链和额度不足的外链
+        """
+        with self.__lock:
+            surplus = self.quota[kind]
+            if surplus is None:
+                return chunk, []
+            sent = chunk[:max(0, surplus)]
+            self.quota[kind] = surplus - len(sent)
+            return sent, chunk[len(sent):]
+
+    def __update_quota(self, kind, surplus):
+        if surplus is None:
+            return
+        with self.__lock:
+            current = self.quota[kind]
+            self.quota[kind] = surplus if current is None else min(current, surplus)
+
+    def _send(self, kind, chunk):
+        """
+        Returns:
+            dict: 外链 -> 结果
+        """
+        results = {}
+        sent, skipped = self.__reserve(kind, chunk)
+        for url in skipped:
+            results[url] = {'state': 'quota_exceeded'}
+        if not sent:
+            return results
+
+        self.rate_limiter.wait()
+        if kind == 'url':
+            ret, info = self.cdn_manager.refresh_urls_and_dirs(sent, None)
+        elif kind == 'dir':
+            ret, info = self.cdn_manager.refresh_urls_and_dirs(None, sent)
+        else:
+            ret, info = self.cdn_manager.prefetch_urls(sent)
+
+        if not ret or ret.get('code') != 200:
+            code = (ret or {}).get('code', info.status_code)
+            error = (ret or {}).get('error') or getattr(info, 'error', None) or str(info)
+            for url in sent:
+                results[url] = {'state': 'error', 'code': code, 'error': error}
+            return results
+
+        if kind == 'prefetch':
+            self.__update_quota(kind, ret.get('surplusDay'))
+        else:
+            self.__update_quota(kind, ret.get(kind + 'SurplusDay'))
+        invalid = set(ret.get('invalidDirs' if kind == 'dir' else 'invalidUrls') or [])
+        task_ids = ret.get('taskIds') or {}
+        for url in sent:
+            if url in invalid:
+                results[url] = {'state': 'invalid'}
+            else:
+                results[url] = {'state': 'processing', 'task_id': task_ids.get(url), 'request_id': ret.get('requestId')}
+        return results
+
+    def _submit(self, chunks):
+        """
+        Args:
+            chunks: (kind, chunk) 的可迭代对象
+        """
+        results = {}
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for kind, chunk in chunks:
+                pending.append(executor.submit(self._send, kind, chunk))
+                if len(pending) >= 4 * self.max_workers:
+                    results.update(pending.popleft().result())
+            for future in pending:
+                results.update(future.result())
+        return results
+
+    def _poll(self, results, list_tasks):
+        """按 requestId 查询 processing 的任务，更新 results 中的状态"""
+        deadline = time.time() + self.timeout
+        interval = self.poll_interval
+        while True:
+            request_ids = set(
+                result['request_id'] for result in results.values()
+                if result['state'] == 'processing' and result.get('request_id')
+            )
+            if not request_ids or time.time() + interval > deadline:
+                return
+            time.sleep(interval)
+            interval = min(self.max_poll_interval, interval * 2)
+            for request_id in sorted(request_ids):
+                self.__poll_request(results, list_tasks, request_id)
+
+    def __poll_request(self, results, list_tasks, request_id):
+        page_no = 1
+        while True:
+            self.rate_limiter.wait()
+            ret, _info = list_tasks(request_id=request_id, page_no=page_no, page_size=100)
+            if not ret or ret.get('code') != 200:
+                # 查询失败时等下一轮
+                return
+            items = ret.get('items') or []
+            for item in items:
+                result = results.get(item.get('url'))
+                if result is not None and item.get('state') in _DONE_STATES:
+                    result['state'] = item['state']
+            if not items or page_no * 100 >= ret.get('total', 0):
+                return
+            page_no += 1
+
+    def refresh(self, urls=None, dirs=None, wait=True):
+        """
+        刷新文件和目录
+
+        Args:
+            urls: 文件外链的可迭代对象
+            dirs: 目录外链的可迭代对象，以 / 结尾
+            wait: 是否等待任务完成
+
+        Returns:
+            dict: 外链 -> 结果
+        """
+        def chunks():
+            for chunk in _chunks(urls, MAX_REFRESH_URLS):
+                yield 'url', chunk
+            for chunk in _chunks(dirs, MAX_REFRESH_DIRS):
+                yield 'dir', chunk
+
+        results = self._submit(chunks())
+        if wait:
+            self._poll(results, self.cdn_manager.list_refresh_tasks)
+        return results
+
+    def prefetch(self, urls, wait=True):
+        """
+        预取文件
+
+        Args:
+            urls: 文件外链的可迭代对象
+            wait: 是否等待任务完成
+
+        Returns:
+            dict: 外链 -> 结果
+        """
+        results = self._submit(('prefetch', chunk) for chunk in _chunks(urls, MAX_PREFETCH_URLS))
+        if wait:
+            self._poll(results, self.cdn_manager.list_prefetch_tasks)
+        return results
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+import calendar
+import hashlib
+import heapq
+import math
+import re
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 日志行格式，参考 https://developer.qiniu.com/fusion/manual/3847/cdn-log-format
+# 111.202.x.x HIT 0 [07/Mar/2017:20:09:32 +0800] "GET http://a.com/1.jpg HTTP/1.1" 200 1155 "-" "Mozilla/5.0"
+_LINE_RE = re.compile(r'^(\S+) \S+ \S+ \[([^\]]+)\] "([^"]*)" (\d{3}) (\d+|-)(?: "([^"]*)")?')
+
+_MONTHS = dict((name, i + 1) for i, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+))
+
+
+class LogError(RuntimeError):
+    """
+    获取日志下载链接失败
+
+    Attributes:
+        resp: 失败请求的 ResponseInfo
+    """
+
+    def __init__(self, resp):
+        super(LogError, self).__init__('get log list failed: {0}'.format(resp))
+        self.resp = resp
+
+
+def _hour_of(time_local):
+    """
+    Args:
+        time_local: 形如 07/Mar/2017:20:09:32 +0800
+
+    Returns:
+        所在小时开始的时间戳，无法解析时为 None
+    """
+    try:
+        offset = (int(time_local[22:24]) * 60 + int(time_local[24:26])) * 60
+        if time_local[21] == '-':
+            offset = -offset
+        return calendar.timegm((
+            int(time_local[7:11]), _MONTHS[time_local[3:6]], int(time_local[0:2]), int(time_local[12:14]), 0, 0
+        )) - offset
+    except (ValueError, KeyError, IndexError):
+        return None
+
+
+def _referer_host(referer):
+    if not referer or referer == '-':
+        return '-'
+    parts = referer.split('/', 3)
+    if len(parts) > 2 and parts[0].endswith(':') and not parts[1]:
+        return parts[2]
+    return referer
+
+
+class HyperLogLog(object):
+    """
+    HyperLogLog 基数估计，内存固定为 2 ** precision 字节，precision 为 14 时标准误差约 0.8%
+
+    Attributes:
+        precision: 寄存器个数的对数，4 到 16
+        registers: bytearray，可用于保存和恢复
+    """
+
+    def __init__(self, precision=14, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError('precision must be in [4, 16]')
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError('registers size mismatch')
+        self.__bits = 64 - precision
+        self.__mask = (1 << self.__bits) - 1
+
+    def add(self, value):
+        if not isinstance(value, bytes):
+            value = value.encode('utf-8')
+        x = struct.unpack('<Q', hashlib.md5(value).digest()[:8])[0]
+        index = x >> self.__bits
+        rank = self.__bits - (x & self.__mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('precision mismatch')
+        registers = self.registers
+        for i, rank in enumerate(other.registers):
+            if rank > registers[i]:
+                registers[i] = rank
+
+    def count(self):
+        m = self.size
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(b'\x00')
+        if estimate <= 2.5 * m and zeros:
+            # 小基数时使用线性计数
+            estimate = m * math.log(float(m) / zeros)
+        return int(round(estimate))
+
+
+class _TopCounter(object):
+    """
+    近似 Top N 计数，每个 key 记录 [次数, 字节数]
+
+    key 的数量超过 2 * capacity 时只保留次数最多的 capacity 个，内存有上界；
+    被淘汰的 key 之后重新出现时从 0 开始计数，高频 key 的计数基本不受影响
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key, count=1, size=0):
+        counts = self.counts
+        value = counts.get(key)
+        if value is None:
+            counts[key] = [count, size]
+            if len(counts) > 2 * self.capacity:
+                self.__prune()
+        else:
+            value[0] += count
+            value[1] += size
+
+    def __prune(self):
+        top = heapq.nlargest(self.capacity, self.counts.items(), key=lambda item: item[1][0])
+        self.counts = dict(top)
+
+    def merge(self, other):
+        for key, (count, size) in other.counts.items():
+            self.add(key, count, size)
+
+    def most_common(self, n):
+        top = heapq.nlargest(n, self.counts.items(), key=lambda item: item[1][0])
+        return [{'key': key, 'requests': count, 'bytes': size} for key, (count, size) in top]
+
+
+class LogAggregator(object):
+    """
+    CDN 日志聚合类
+
+    逐行统计请求数和流量、状态码分布、来源域名和 URL 的 Top N、每小时的请求数和流量、独立 IP 数，
+    内存占用与日志大小无关。多个聚合结果可以 merge，用于并发处理多个日志文件。
+
+    Attributes:
+        top_n: 结果中返回的 URL 和来源数
+        strip_query: 统计 URL 时是否去掉查询参数
+        requests: 请求数
+        bytes: 响应字节数
+        invalid_lines: 无法解析的行数
+        statuses: 状态码 -> 请求数
+        hours: 小时开始的时间戳 -> [请求数, 字节数]
+        ips: HyperLogLog
+    """
+
+    def __init__(self, top_n=100, strip_query=True, precision=14):
+        self.top_n = top_n
+        self.strip_query = strip_query
+        self.requests = 0
+        self.bytes = 0
+        self.invalid_lines = 0
+        self.statuses = {}
+        self.hours = {}
+        self.urls = _TopCounter(10 * top_n)
+        self.referers = _TopCounter(10 * top_n)
+        self.ips = HyperLogLog(precision)
+        self.__hour_cache = {}
+
+    def add_line(self, line):
+        match = _LINE_RE.match(line)
+        if match is None:
+            if line.strip():
+                self.invalid_lines += 1
+            return
+        ip, time_local, request, status, size, referer = match.groups()
+        size = int(size) if size != '-' else 0
+
+        # 同一小时的时间只解析一次
+        hour_key = time_local[:14] + time_local[20:]
+        hour = self.__hour_cache.get(hour_key)
+        if hour is None:
+            hour = self.__hour_cache[hour_key] = _hour_of(time_local)
+        if hour is not None:
+            value = self.hours.get(hour)
+            if value is None:
+                self.hours[hour] = [1, size]
+            else:
+                value[0] += 1
+                value[1] += size
+
+        parts = request.split(' ')
+        url = parts[1] if len(parts) > 1 else request
+        if self.strip_query:
+            url = url.split('?', 1)[0]
+
+        self.requests += 1
+        self.bytes += size
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.urls.add(url, 1, size)
+        self.referers.add(_referer_host(referer), 1, size)
+        self.ips.add(ip)
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.bytes += other.bytes
+        self.invalid_lines += other.invalid_lines
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for hour, (count, size) in other.hours.items():
+            value = self.hours.setdefault(hour, [0, 0])
+            value[0] += count
+            value[1] += size
+        self.urls.merge(other.urls)
+        self.referers.merge(other.referers)
+        self.ips.merge(other.ips)
+
+    def result(self):
+        """
+        Returns:
+            dict: requests、bytes、unique_ips、invalid_lines，
+            statuses 为状态码 -> 请求数，hours 为按时间排序的 [时间戳, 请求数, 字节数]，
+            top_urls、top_referers 为按请求数排序的 {key, requests, bytes}
+        """
+        return {
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'unique_ips': self.ips.count(),
+            'invalid_lines': self.invalid_lines,
+            'statuses': dict(self.statuses),
+            'hours': [[hour, count, size] for hour, (count, size) in sorted(self.hours.items())],
+            'top_urls': self.urls.most_common(self.top_n),
+            'top_referers': self.referers.most_common(self.top_n)
+        }
+
+
+def iter_gzip_lines(chunks):
+    """
+    流式解压 gzip 数据并按行切分
+
+    Args:
+        chunks: bytes 的可迭代对象，如 Response.iter_content()，可以包含多个连续的 gzip 成员
+
+    Yields:
+        str: 去掉换行符的行，按 utf-8 解码
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    rest = b''
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        # 多个 gzip 成员直接拼接时，上一个成员之后的数据由新的解压器处理
+        while decompressor.unused_data:
+            unused = decompressor.unused_data
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data += decompressor.decompress(unused)
+        if not data:
+            continue
+        data = rest + data
+        end = data.rfind(b'\n')
+        if end < 0:
+            rest = data
+            continue
+        rest = data[end + 1:]
+        for line in data[:end].decode('utf-8', 'replace').split('\n'):
+            yield line.rstrip('\r')
+    rest += decompressor.flush()
+    if rest:
+        for line in rest.decode('utf-8', 'replace').split('\n'):
+            yield line.rstrip('\r')
+
+
+class LogAnalyzer(object):
+    """
+    CDN 日志分析类
+
+    通过 CdnManager.get_log_list_data 获取各域名每小时的日志下载链接，多个日志文件并发下载，
+    边下载边解压、逐行聚合，不在内存或磁盘中保存完整文件；每个文件使用单独的 LogAggregator，
+    完成后合并到所在域名的结果中，下载中途失败时丢弃该文件的部分结果并重新下载。
+
+    Attributes:
+        cdn_manager: CdnManager
+        max_workers: 同时下载的文件数
+        max_retries: 每个文件最多重试次数
+        chunk_size: 每次读取的字节数
+        timeout: 下载的连接和读取超时（秒）
+        top_n、strip_query、precision: 传给 LogAggregator
+    """
+
+    def __init__(self, cdn_manager, max_workers=4, max_retries=2, chunk_size=1 << 16, timeout=(10, 60),
+                 top_n=100, strip_query=True, precision=14, session=None):
+        self.cdn_manager = cdn_manager
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.top_n = top_n
+        self.strip_query = strip_query
+        self.precision = precision
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    def new_aggregator(self):
+        return LogAggregator(top_n=self.top_n, strip_query=self.strip_query, precision=self.precision)
+
+    def log_files(self, domains, day):
+        """
+        Args:
+            domains: 域名列表
+            day: 日志日期，形如 2017-03-07
+
+        Returns:
+            list: (domain, file)，file 为 dict，包含 name、size、mtime、url
+
+        Raises:
+            LogError: 获取下载链接失败
+        """
+        ret, info = self.cdn_manager.get_log_list_data(domains, day)
+        if not ret or ret.get('code') != 200:
+            raise LogError(info)
+        files = []
+        for domain in domains:
+            for log_file in (ret.get('data') or {}).get(domain) or []:
+                files.append((domain, log_file))
+        return files
+
+    def _analyze_file(self, log_file):
+        """
+        Returns:
+            LogAggregator
+        """
+        retried = 0
+        while True:
+            aggregator = self.new_aggregator()
+            try:
+                resp = self.session.get(log_file['url'], stream=True, timeout=self.timeout)
+                try:
+                    resp.raise_for_status()
+                    for line in iter_gzip_lines(resp.iter_content(self.chunk_size)):
+                        aggregator.add_line(line)
+                finally:
+                    resp.close()
+                return aggregator
+            except (requests.RequestException, zlib.error, IOError):
+                if retried >= self.max_retries:
+                    raise
+                retried += 1
+
+    def __merge(self, results, domain, log_file, future):
+        try:
+            aggregator = future.result()
+        except (requests.RequestException, zlib.error, IOError) as e:
+            results[domain]['failed'].append((log_file.get('name') or log_file['url'], str(e)))
+            return
+        results[domain]['aggregator'].merge(aggregator)
+        results[domain]['files'] += 1
+
+    def analyze(self, domains, day):
+        """
+        下载并统计各域名一天的日志
+
+        Args:
+            domains: 域名列表
+            day: 日志日期，形如 2017-03-07
+
+        Returns:
+            dict: 域名 -> dict，aggregator 为该域名的 LogAggregator，files 为统计的文件数，
+            failed 为下载失败的 (文件名, error) 列表
+
+        Raises:
+            LogError: 获取下载链接失败
+        """
+        results = dict((domain, {'aggregator': self.new_aggregator(), 'files': 0, 'failed': []}) for domain in domains)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for domain, log_file in self.log_files(domains, day):
+                pending.append((domain, log_file, executor.submit(self._analyze_file, log_file)))
+                if len(pending) >= 2 * self.max_workers:
+                    self.__merge(results, *pending.popleft())
+            while pending:
+                self.__merge(results, *pending.popleft())
+        return results
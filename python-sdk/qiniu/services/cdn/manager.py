@@ -9,6 +9,9 @@ from enum import Enum
 
 import hashlib
 
+from .bulk import BulkRefresher
+from .logs import LogAnalyzer
+
 
 class DataType(Enum):
     BANDWIDTH = 'bandwidth'
@@ -99,6 +102,61 @@ class CdnManager(object):
         url = '{0}/v2/tune/prefetch'.format(self.server)
         return self.__post(url, body)
 
+    def list_refresh_tasks(self, request_id=None, urls=None, state=None, page_no=1, page_size=100):
+        """
+        查询刷新任务，文档 https://developer.qiniu.com/fusion/api/1229/cache-refresh#4
+
+        Args:
+           request_id: 刷新请求返回的 requestId
+           urls:       要查询的文件或目录外链列表
+           state:      任务状态，processing、success 或 failure
+           page_no:    页号，从 1 开始
+           page_size:  每页任务数
+
+        Returns:
+           一个dict变量和一个ResponseInfo对象，dict 中 items 为任务列表，包含 taskId、url、state 等
+        """
+        return self.__list_tasks('refresh', request_id, urls, state, page_no, page_size)
+
+    def list_prefetch_tasks(self, request_id=None, urls=None, state=None, page_no=1, page_size=100):
+        """
+        查询预取任务，文档 https://developer.qiniu.com/fusion/api/1227/file-prefetching#4
+
+        参数与返回值同 list_refresh_tasks
+        """
+        return self.__list_tasks('prefetch', request_id, urls, state, page_no, page_size)
+
+    def __list_tasks(self, kind, request_id, urls, state, page_no, page_size):
+        req = {'pageNo': page_no, 'pageSize': page_size}
+        if request_id:
+            req.update({'requestId': request_id})
+        if urls:
+            req.update({'urls': urls})
+        if state:
+            req.update({'state': state})
+
+        body = json.dumps(req)
+        url = '{0}/v2/tune/{1}/list'.format(self.server, kind)
+        return self.__post(url, body)
+
+    def bulk_refresh(self, urls=None, dirs=None, wait=True, **kwargs):
+        """
+        刷新任意数量的文件和目录，按接口限制自动拆分为多个请求，参数见 BulkRefresher
+
+        Returns:
+           dict: 外链 -> 结果，见 BulkRefresher.refresh
+        """
+        return BulkRefresher(self, **kwargs).refresh(urls=urls, dirs=dirs, wait=wait)
+
+    def bulk_prefetch(self, urls, wait=True, **kwargs):
+        """
+        预取任意数量的文件，按接口限制自动拆分为多个请求，参数见 BulkRefresher
+
+        Returns:
+           dict: 外链 -> 结果，见 BulkRefresher.prefetch
+        """
+        return BulkRefresher(self, **kwargs).prefetch(urls, wait=wait)
+
     def get_bandwidth_data(self, domains, start_date, end_date, granularity, data_type=None):
         """
         查询带宽数据，文档 https://developer.qiniu.com/fusion/api/traffic-bandwidth
@@ -173,6 +231,18 @@ class CdnManager(object):
         url = '{0}/v2/tune/log/list'.format(self.server)
         return self.__post(url, body)
 
+    def analyze_logs(self, domains, log_date, **kwargs):
+        """
+        并发下载并流式统计各域名一天的日志，参数见 LogAnalyzer
+
+        Returns:
+           dict: 域名 -> 统计结果，见 LogAnalyzer.analyze
+
+        Raises:
+           LogError: 获取日志下载链接失败
+        """
+        return LogAnalyzer(self, **kwargs).analyze(domains, log_date)
+
     def put_httpsconf(self, name, certid, forceHttps=False):
         """
         修改证书，文档 https://developer.qiniu.com/fusion/4246/the-domain-name#11
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+import copy
+import heapq
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # noqa
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer  # noqa
+    from SocketServer import ThreadingMixIn  # noqa
+
+from qiniu.compat import basestring
+from qiniu.utils import RateLimiter
+
+# 持久化处理状态码，参考 https://developer.qiniu.com/dora/1294/persistent-processing-status-query-prefop
+# 0 成功，1 等待处理，2 正在处理，3 处理失败，4 回调失败（处理已完成）
+_DONE_CODES = (0, 3, 4)
+_FAILED_CODE = 3
+
+
+def _state_of(status):
+    return 'failed' if status.get('code') == _FAILED_CODE else 'success'
+
+
+class PfopRunner(object):
+    """
+    批量持久化处理类
+
+    在速率限制下并发提交多个文件的持久化处理，之后按 persistentId 并发查询处理状态，
+    每个任务的查询间隔从 poll_interval 开始逐次翻倍，最多 max_poll_interval；任务完成后立即返回其结果。
+    指定 receiver 时以 run 开始时的 receiver.url 作为通知地址，通过通知得知任务完成，不再轮询，
+    只在超时时查询一次状态；receiver 需在 run 之前 start，或指定 public_url。
+
+    每个任务的结果为 dict，state 为：
+        success、failed：处理完成，status 为处理状态，与 PersistentFop.get_status 的结果相同
+        timeout：超时仍未完成，status 为最后一次查询到的状态
+        error：提交失败，包含 code、error
+    除 error 外都包含 persistent_id。
+
+    Attributes:
+        pfop: PersistentFop
+        max_workers: 同时发出的请求数
+        rate: 每秒最多发出的请求数（提交和查询），为 None 时不限制
+        poll_interval: 提交后第一次查询前等待的秒数
+        max_poll_interval: 查询的最长间隔
+        timeout: 每个任务从提交开始等待完成的最长秒数
+        receiver: 可选，PfopNotifyReceiver
+    """
+
+    def __init__(self, pfop, max_workers=4, rate=10, poll_interval=2, max_poll_interval=60, timeout=3600, receiver=None):
+        self.pfop = pfop
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = RateLimiter(rate)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.receiver = receiver
+
+    def _notify_pfop(self):
+        """
+        Returns:
+            提交任务使用的 PersistentFop，指定 receiver 时为以 receiver.url 为通知地址的副本
+
+        Raises:
+            ValueError: receiver 尚未启动且未指定 public_url，通知地址的端口还未确定
+        """
+        if self.receiver is None:
+            return self.pfop
+        if not self.receiver.public_url and not self.receiver.running:
+            raise ValueError('PfopNotifyReceiver is not started, call start() or set public_url before run()')
+        pfop = copy.copy(self.pfop)
+        pfop.notify_url = self.receiver.url
+        return pfop
+
+    def _submit(self, pfop, key, fops, kwargs):
+        """
+        Returns:
+            (persistent_id, error): 提交成功时 error 为 None
+        """
+        self.rate_limiter.wait()
+        ret, info = pfop.execute(key, fops=fops, **kwargs)
+        if ret and ret.get('persistentId'):
+            return ret['persistentId'], None
+        return None, {
+            'state': 'error',
+            'code': info.status_code,
+            'error': (ret or {}).get('error') or getattr(info, 'error', None) or str(info)
+        }
+
+    def _status(self, persistent_id):
+        self.rate_limiter.wait()
+        ret, _info = self.pfop.get_status(persistent_id)
+        return ret
+
+    def run(self, jobs, fops=None, force=None, persistent_type=None, workflow_template_id=None):
+        """
+        批量执行持久化处理
+
+        Args:
+            jobs: 源文件 key 的可迭代对象，元素也可以是 (key, fops)，按需读取
+            fops: 所有任务共用的处理操作，与 workflow_template_id 二选一
+            force、persistent_type、workflow_template_id: 见 PersistentFop.execute
+
+        Yields:
+            (key, result): 按完成顺序返回每个任务的结果
+
+        Raises:
+            ValueError: receiver 尚未启动且未指定 public_url
+        """
+        pfop = self._notify_pfop()
+        kwargs = {'force': force, 'persistent_type': persistent_type, 'workflow_template_id': workflow_template_id}
+        events = queue.Queue()
+        jobs = iter(jobs)
+        exhausted = False
+        in_flight = 0
+        submitting = 0
+        # persistent_id -> [key, 提交时间, 当前查询间隔]
+        outstanding = {}
+        # (查询时间, 序号, persistent_id)
+        due = []
+        seq = 0
+        # 提交结果处理前已收到的通知
+        early = {}
+
+        def on_done(*event):
+            return lambda future: events.put(event + (future,))
+
+        if self.receiver is not None:
+            self.receiver.subscribe(events)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while True:
+                    while not exhausted and in_flight < 2 * self.max_workers:
+                        try:
+                            job = next(jobs)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        key, job_fops = (job, fops) if isinstance(job, basestring) else job
+                        executor.submit(self._submit, pfop, key, job_fops, kwargs).add_done_callback(on_done('submit', key))
+                        in_flight += 1
+                        submitting += 1
+
+                    now = time.time()
+                    while due and due[0][0] <= now:
+                        _, _, persistent_id = heapq.heappop(due)
+                        if persistent_id in outstanding:
+                            executor.submit(self._status, persistent_id).add_done_callback(on_done('poll', persistent_id))
+                            in_flight += 1
+
+                    if not in_flight and not outstanding:
+                        return
+                    try:
+                        event = events.get(timeout=max(0, due[0][0] - now) if due else None)
+                    except queue.Empty:
+                        continue
+
+                    kind = event[0]
+                    if kind == 'notify':
+                        status = event[1]
+                        persistent_id = status.get('id')
+                        if status.get('code') not in _DONE_CODES:
+                            continue
+                        if persistent_id in outstanding:
+                            key = outstanding.pop(persistent_id)[0]
+                            yield key, {'state': _state_of(status), 'persistent_id': persistent_id, 'status': status}
+                        elif submitting:
+                            early[persistent_id] = status
+                        continue
+
+                    in_flight -= 1
+                    if kind == 'submit':
+                        submitting -= 1
+                        key, future = event[1], event[2]
+                        try:
+                            persistent_id, error = future.result()
+                        except Exception as e:
+                            persistent_id, error = None, {'state': 'error', 'code': -1, 'error': str(e)}
+                        if error is not None:
+                            yield key, error
+                        elif persistent_id in early:
+                            status = early.pop(persistent_id)
+                            yield key, {'state': _state_of(status), 'persistent_id': persistent_id, 'status': status}
+                        else:
+                            now = time.time()
+                            outstanding[persistent_id] = [key, now, self.poll_interval]
+                            delay = self.timeout if self.receiver is not None else self.poll_interval
+                            seq += 1
+                            heapq.heappush(due, (now + delay, seq, persistent_id))
+                        if not submitting:
+                            early.clear()
+                    else:
+                        persistent_id, future = event[1], event[2]
+                        if persistent_id not in outstanding:
+                            # 查询期间已收到通知
+                            continue
+                        try:
+                            status = future.result()
+                        except Exception:
+                            status = None
+                        job = outstanding[persistent_id]
+                        now = time.time()
+                        if status and status.get('code') in _DONE_CODES:
+                            del outstanding[persistent_id]
+                            yield job[0], {'state': _state_of(status), 'persistent_id': persistent_id, 'status': status}
+                        elif now >= job[1] + self.timeout:
+                            del outstanding[persistent_id]
+                            yield job[0], {'state': 'timeout', 'persistent_id': persistent_id, 'status': status}
+                        else:
+                            job[2] = min(self.max_poll_interval, job[2] * 2)
+                            seq += 1
+                            delay = job[2] * random.uniform(0.5, 1)
+                            heapq.heappush(due, (min(now + delay, job[1] + self.timeout), seq, persistent_id))
+        finally:
+            if self.receiver is not None:
+                self.receiver.unsubscribe(events)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class PfopNotifyReceiver(object):
+    """
+    持久化处理结果通知接收类
+
+    启动一个 HTTP 服务接收处理完成时七牛发出的 POST 通知（内容与 PersistentFop.get_status 的结果相同），
+    转发给使用该 receiver 的 PfopRunner。已有 Web 服务时也可以不启动，在通知接口中调用 handle_notification。
+
+    Attributes:
+        host: 监听地址
+        port: 监听端口，为 0 时由系统分配，start 后为实际端口
+        path: 接收通知的路径
+        public_url: 七牛可访问的通知地址，为 None 时使用 http://host:port/path，此时 start 之后才是有效地址
+    """
+
+    def __init__(self, host='0.0.0.0', port=0, path='/', public_url=None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.public_url = public_url
+        self.__subscribers = []
+        self.__lock = threading.Lock()
+        self.__server = None
+
+    @property
+    def running(self):
+        """是否已经 start"""
+        return self.__server is not None
+
+    @property
+    def url(self):
+        if self.public_url:
+            return self.public_url
+        return 'http://{0}:{1}{2}'.format(self.host, self.port, self.path)
+
+    def subscribe(self, events):
+        with self.__lock:
+            self.__subscribers.append(events)
+
+    def unsubscribe(self, events):
+        with self.__lock:
+            if events in self.__subscribers:
+                self.__subscribers.remove(events)
+
+    def handle_notification(self, body):
+        """
+        处理一次通知
+
+        Args:
+            body: 通知的请求体，bytes 或 str
+
+        Returns:
+            bool: 是否为有效的通知
+        """
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        try:
+            status = json.loads(body)
+        except ValueError:
+            return False
+        if not isinstance(status, dict) or not status.get('id'):
+            return False
+        with self.__lock:
+            subscribers = list(self.__subscribers)
+        for events in subscribers:
+            events.put(('notify', status))
+        return True
+
+    def start(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.split('?', 1)[0] != receiver.path:
+                    self.send_error(404)
+                    return
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if not receiver.handle_notification(body):
+                    self.send_error(400)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.__server = _ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.__server.server_address[1]
+        thread = threading.Thread(target=self.__server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
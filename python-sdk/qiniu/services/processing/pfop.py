@@ -3,6 +3,8 @@
 from qiniu import config
 from qiniu import http
 
+from .batch import PfopRunner
+
 
 class PersistentFop(object):
     """持久化处理类
@@ -88,3 +90,31 @@ class PersistentFop(object):
             'id': persistent_id
         }
         return http._get_with_auth(url, data, self.auth)
+
+    def execute_batch(self, jobs, fops=None, force=None, persistent_type=None, workflow_template_id=None, **kwargs):
+        """
+        批量执行持久化处理，并发提交并等待各任务完成
+
+        Parameters
+        ----------
+        jobs: iterable
+            源文件 key，元素也可以是 (key, fops)
+        fops: list[str], optional
+            所有任务共用的处理操作
+        force, persistent_type, workflow_template_id: optional
+            见 execute
+        kwargs: optional
+            PfopRunner 的参数，如 max_workers、rate、timeout、receiver
+
+        Returns
+        -------
+        generator
+            按完成顺序返回 (key, result)，见 PfopRunner
+        """
+        return PfopRunner(self, **kwargs).run(
+            jobs,
+            fops=fops,
+            force=force,
+            persistent_type=persistent_type,
+            workflow_template_id=workflow_template_id
+        )
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 单次批量请求最多包含的操作数
+MAX_BATCH_SIZE = 1000
+
+# 不重试的 5xx 状态码，参考 https://developer.qiniu.com/kodo/3928/error-responses
+_NO_RETRY_CODES = (501, 579)
+
+
+def _need_retry_code(code):
+    return 500 <= code < 600 and code not in _NO_RETRY_CODES
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BatchExecutor(object):
+    """
+    批量操作执行类
+
+    将任意数量的操作按单次请求的上限分批，多个批次并发请求；
+    结果中状态码为可重试的 5xx（如 573 请求过于频繁、599 服务端错误）的操作单独组成新的批次，退避后重试；
+    整个请求失败且可重试时重试该批次的全部操作。结果按输入顺序逐个返回。
+
+    Attributes:
+        bucket_manager: BucketManager
+        batch_size: 每批的操作数，不超过 1000
+        max_workers: 同时请求的批次数
+        max_retries: 每个操作最多重试次数
+        backoff: 第一次重试前等待的秒数，之后每次翻倍
+        max_backoff: 重试前最多等待的秒数
+    """
+
+    def __init__(self, bucket_manager, batch_size=MAX_BATCH_SIZE, max_workers=4, max_retries=3, backoff=0.5, max_backoff=10):
+        if not 0 < batch_size <= MAX_BATCH_SIZE:
+            raise ValueError('batch_size must be in (0, {0}]'.format(MAX_BATCH_SIZE))
+        self.bucket_manager = bucket_manager
+        self.batch_size = batch_size
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _sleep(self, retried):
+        delay = min(self.max_backoff, self.backoff * (2 ** retried))
+        if delay > 0:
+            time.sleep(delay * random.uniform(0.5, 1))
+
+    def _run_batch(self, operations):
+        """
+        Returns:
+            list: 与 operations 一一对应的结果 dict，包含 code，可能包含 data
+        """
+        results = [None] * len(operations)
+        pending = list(range(len(operations)))
+        retried = 0
+        while True:
+            ret, info = self.bucket_manager.batch([operations[i] for i in pending])
+            if isinstance(ret, list) and len(ret) == len(pending):
+                for i, result in zip(pending, ret):
+                    results[i] = result
+                failed = [i for i, result in zip(pending, ret) if _need_retry_code(result.get('code', 0))]
+            else:
+                error = {'code': info.status_code, 'data': {'error': info.error if hasattr(info, 'error') else str(info)}}
+                for i in pending:
+                    results[i] = error
+                failed = pending if info.need_retry() else []
+            if not failed or retried >= self.max_retries:
+                return results
+            self._sleep(retried)
+            retried += 1
+            pending = failed
+
+    def execute(self, operations):
+        """
+        执行批量操作
+
+        Args:
+            operations: 操作的可迭代对象，可通过 build_batch_* 构造，按需读取
+
+        Yields:
+            (operation, result): 按输入顺序返回每个操作及其结果，
+            result 类似 {"code": 200} 或 {"code": 612, "data": {"error": "no such file or directory"}}
+        """
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk in _chunks(operations, self.batch_size):
+                in_flight.append((chunk, executor.submit(self._run_batch, chunk)))
+                if len(in_flight) >= 2 * self.max_workers:
+                    chunk, future = in_flight.popleft()
+                    for item in zip(chunk, future.result()):
+                        yield item
+            while in_flight:
+                chunk, future = in_flight.popleft()
+                for item in zip(chunk, future.result()):
+                    yield item
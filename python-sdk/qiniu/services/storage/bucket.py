@@ -7,6 +7,8 @@ from qiniu.http.region import Region, ServiceName
 from qiniu.http.regions_provider import get_default_regions_provider
 
 from ._bucket_default_retrier import get_default_retrier
+from .batch_executor import BatchExecutor, MAX_BATCH_SIZE
+from .listing import ListCheckpoint, ShardedLister, iter_list_pages, prefetch, prefix_shards, range_shards
 
 
 class BucketManager(object):
@@ -98,6 +100,87 @@ class BucketManager(object):
 
         return ret, eof, info
 
+    def list_pages(self, bucket, prefix=None, marker=None, limit=None, delimiter=None, prefetch_pages=2):
+        """列举所有页:
+
+        自动处理 marker，依次返回每一页的结果。下一页在后台线程中提前请求，
+        处理当前页时下一页已在请求中；最多提前缓存 prefetch_pages 页，内存占用不随列举数量增长。
+
+        Args:
+            bucket:     空间名
+            prefix:     列举前缀
+            marker:     可选，从该列举标识符开始
+            limit:      单次列举个数限制
+            delimiter:  指定目录分隔符
+            prefetch_pages: 最多提前请求并缓存的页数，为 0 时不提前请求
+
+        Returns:
+            生成器，每个元素为一页的结果 dict，包含 items、marker，指定 delimiter 时包含 commonPrefixes
+
+        Raises:
+            ListError: 某一页请求失败，e.marker 为该页的列举标识符，可用于继续列举
+        """
+        pages = iter_list_pages(self, bucket, prefix=prefix, marker=marker, limit=limit, delimiter=delimiter)
+        if not prefetch_pages:
+            return pages
+        return prefetch(pages, max_pending=prefetch_pages)
+
+    def list_all(self, bucket, prefix=None, marker=None, limit=None, delimiter=None, prefetch_pages=2):
+        """列举所有文件:
+
+        逐个返回所有页中的文件信息，参数与 list_pages 相同。
+
+        Returns:
+            生成器，每个元素为一个文件信息 dict，类似 {"key": "<Key string>", "hash": "<Hash string>", "fsize": 1024, ...}
+
+        Raises:
+            ListError: 某一页请求失败，e.marker 为该页的列举标识符，可用于继续列举
+        """
+        for page in self.list_pages(bucket, prefix=prefix, marker=marker, limit=limit,
+                                    delimiter=delimiter, prefetch_pages=prefetch_pages):
+            for item in page.get('items') or []:
+                yield item
+
+    def list_sharded(self, bucket, prefix=None, split_points=None, delimiter='/', ordered=True, max_workers=8,
+                     checkpoint_path=None, limit=None, prefetch_pages=2):
+        """并行列举所有文件:
+
+        把 key 空间分成多个分片，每个分片一条独立的 marker 链，同时列举。
+        指定 split_points 时按分割点分成 (-, s1]、(s1, s2]、...、(sn, +) 区间；
+        否则按 delimiter 列出 prefix 下第一层的目录，每个目录一个分片。
+
+        Args:
+            bucket:         空间名
+            prefix:         列举前缀
+            split_points:   可选，key 的分割点列表
+            delimiter:      未指定 split_points 时用于划分目录的分隔符
+            ordered:        是否按 key 顺序返回，为 False 时按列举完成的先后返回，速度更快
+            max_workers:    同时列举的分片数
+            checkpoint_path: 可选，断点记录文件，使用同一文件重新列举时从上次处理到的位置继续
+            limit:          单次列举个数限制
+            prefetch_pages: 每个分片最多提前缓存的页数
+
+        Returns:
+            ShardedLister，迭代时逐个返回文件信息 dict
+
+        Raises:
+            ListError: 某一页请求失败
+        """
+        if split_points:
+            shards = range_shards(split_points, prefix=prefix)
+        else:
+            shards = prefix_shards(self, bucket, prefix=prefix, delimiter=delimiter, limit=limit)
+        return ShardedLister(
+            self,
+            bucket,
+            shards,
+            ordered=ordered,
+            max_workers=max_workers,
+            checkpoint=ListCheckpoint(checkpoint_path) if checkpoint_path else None,
+            limit=limit,
+            prefetch_pages=prefetch_pages
+        )
+
     def list_domains(self, bucket):
         """获取 Bucket 空间域名
         https://developer.qiniu.com/kodo/3949/get-the-bucket-space-domain
@@ -479,6 +562,24 @@ class BucketManager(object):
             {'op': operations}
         )
 
+    def batch_all(self, operations, batch_size=MAX_BATCH_SIZE, max_workers=4, max_retries=3):
+        """批量执行任意数量的操作:
+
+        按单次请求的上限自动分批并发请求，状态码为可重试的 5xx（如 573、599）的操作退避后单独重试。
+
+        Args:
+            operations:  操作的可迭代对象，可通过 build_batch_* 构造，按需读取
+            batch_size:  每批的操作数，不超过 1000
+            max_workers: 同时请求的批次数
+            max_retries: 每个操作最多重试次数
+
+        Returns:
+            生成器，按输入顺序返回 (operation, result)，result 类似 {"code": 200} 或
+            {"code": 612, "data": {"error": "<ErrorMessage string>"}}
+        """
+        executor = BatchExecutor(self, batch_size=batch_size, max_workers=max_workers, max_retries=max_retries)
+        return executor.execute(operations)
+
     def buckets(self):
         """获取所有空间名:
 
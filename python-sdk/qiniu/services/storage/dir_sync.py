@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from qiniu.config import _BLOCK_SIZE, get_default
+from qiniu.utils import etag_v2, urlsafe_base64_decode
+
+from .bucket import BucketManager, build_batch_delete
+from .upload_progress_recorder import UploadProgressRecorder
+from .uploaders import FormUploader, ResumeUploaderV2
+
+
+def iter_local_files(local_dir):
+    """
+    递归列出目录下的文件
+
+    Yields:
+        (relative_path, file_path): relative_path 以 / 分隔
+    """
+    for root, dirs, files in os.walk(local_dir):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            relative_path = os.path.relpath(file_path, local_dir)
+            yield relative_path.replace(os.sep, '/'), file_path
+
+
+def _hash_part_size(remote_hash, part_size):
+    """
+    计算空间中文件的 hash 时使用的分片大小
+
+    以 v2 分片上传且分片大小不是 4MB 上传的文件，hash 解码后首字节为 0x9e，其分片大小无法从 hash 得知，
+    按本次同步的 part_size 计算；其他文件（表单上传、v1 分片上传或 4MB 分片）的 hash 按 4MB 块计算，即 etag
+    """
+    try:
+        v2 = urlsafe_base64_decode(remote_hash)[:1] == b'\x9e'
+    except (TypeError, ValueError):
+        v2 = False
+    return part_size if v2 else _BLOCK_SIZE
+
+
+class DirectorySync(object):
+    """
+    目录同步类
+
+    把本地目录同步到空间的 prefix 下：列举空间中 prefix 下的文件，大小不同或 etag 不同的本地文件重新上传，
+    空间中没有的本地文件上传，大小和 etag 都相同的跳过。本地 etag 按空间中文件 hash 的类型计算：
+    v2 分片上传（分片大小不是 4MB）的文件按 part_size 计算，其他文件按 4MB 块计算，
+    因此表单上传的文件不会被误判为变化；只有以与 part_size 不同的非 4MB 分片大小上传的文件会被重新上传。指定 etag_cache 时未变化的本地文件直接使用缓存的 etag，
+    不再读取文件内容，重新同步的耗时主要取决于变化的文件。
+
+    不超过 upload_threshold 的文件使用表单上传，更大的文件使用分片上传 v2；
+    所有文件在同一个线程池中上传，分片上传的各分片在所在线程中依次上传。
+
+    Attributes:
+        auth: Auth
+        bucket: 空间名
+        local_dir: 本地目录
+        prefix: 空间中的前缀，本地文件的相对路径加上 prefix 为 key
+        delete: 是否删除空间中 prefix 下本地不存在的文件
+        max_workers: 同时上传的文件数
+        upload_threshold: 使用分片上传的文件大小下限，默认为 default_upload_threshold
+        part_size: 分片上传的分片大小
+        etag_cache: 可选，EtagCache
+        dry_run: 只统计需要上传和删除的文件，不实际上传和删除
+    """
+
+    def __init__(self, auth, bucket, local_dir, prefix='', delete=False, max_workers=4, upload_threshold=None,
+                 part_size=_BLOCK_SIZE, etag_cache=None, dry_run=False, bucket_manager=None, regions=None):
+        self.auth = auth
+        self.bucket = bucket
+        self.local_dir = local_dir
+        self.prefix = prefix or ''
+        self.delete = delete
+        self.max_workers = max(1, max_workers)
+        self.upload_threshold = upload_threshold or get_default('default_upload_threshold')
+        self.part_size = part_size
+        self.etag_cache = etag_cache
+        self.dry_run = dry_run
+        self.bucket_manager = bucket_manager or BucketManager(auth, regions=regions)
+        self.form_uploader = FormUploader(
+            bucket,
+            auth=auth,
+            regions=regions,
+            preferred_scheme=get_default('default_zone').scheme
+        )
+        self.resume_uploader = ResumeUploaderV2(
+            bucket,
+            auth=auth,
+            regions=regions,
+            part_size=part_size,
+            upload_progress_recorder=UploadProgressRecorder(),
+            concurrent_executor=None,
+            preferred_scheme=get_default('default_zone').scheme
+        )
+        self.__lock = threading.Lock()
+
+    def list_remote(self):
+        """
+        Returns:
+            dict: 空间中 prefix 下的文件，key -> (fsize, hash)
+        """
+        lister = self.bucket_manager.list_sharded(
+            self.bucket,
+            prefix=self.prefix or None,
+            ordered=False,
+            max_workers=self.max_workers
+        )
+        return dict((item['key'], (item.get('fsize'), item.get('hash'))) for item in lister)
+
+    def local_etag(self, file_path, st, part_size=None):
+        """
+        Args:
+            part_size: 计算 etag 使用的分片大小，默认为 part_size
+        """
+        part_size = part_size or self.part_size
+        if self.etag_cache:
+            etag = self.etag_cache.get(file_path, st=st, part_size=part_size)
+            if etag is not None:
+                return etag
+        etag = etag_v2(file_path, part_size=part_size, max_workers=1)
+        if self.etag_cache:
+            self.etag_cache.set(file_path, etag, st=st, part_size=part_size)
+        return etag
+
+    def upload(self, key, file_path, size):
+        """
+        Returns:
+            ret, info
+        """
+        up_token = self.auth.upload_token(self.bucket, key)
+        if size > self.upload_threshold:
+            return self.resume_uploader.upload(key, file_path=file_path, up_token=up_token)
+        return self.form_uploader.upload(key, file_path=file_path, up_token=up_token)
+
+    def _sync_file(self, key, file_path, remote, result):
+        try:
+            st = os.stat(file_path)
+            if remote is not None and remote[0] == st.st_size and \
+                    remote[1] == self.local_etag(file_path, st, _hash_part_size(remote[1], self.part_size)):
+                self.__count(result, 'skipped')
+                return
+            if self.dry_run:
+                self.__count(result, 'uploaded', st.st_size)
+                return
+            ret, info = self.upload(key, file_path, st.st_size)
+            if ret is None or not info.ok():
+                self.__fail(result, key, info.error if hasattr(info, 'error') else str(info))
+                return
+            self.__count(result, 'uploaded', st.st_size)
+        except (IOError, OSError) as e:
+            self.__fail(result, key, str(e))
+
+    def __count(self, result, name, size=0):
+        with self.__lock:
+            result[name] += 1
+            if name == 'uploaded':
+                result['uploaded_bytes'] += size
+
+    def __fail(self, result, key, error):
+        with self.__lock:
+            result['failed'].append((key, error))
+
+    def delete_orphans(self, keys, result):
+        keys = sorted(keys)
+        if self.dry_run:
+            result['deleted'] += len(keys)
+            return
+        results = self.bucket_manager.batch_all(build_batch_delete(self.bucket, keys))
+        for key, (_operation, op_result) in zip(keys, results):
+            code = op_result.get('code')
+            # 612 文件已不存在
+            if code in (200, 612):
+                result['deleted'] += 1
+            else:
+                error = (op_result.get('data') or {}).get('error', str(code))
+                result['failed'].append((key, error))
+
+    def run(self):
+        """
+        执行同步
+
+        Returns:
+            dict: uploaded、uploaded_bytes、skipped、deleted 为上传、上传字节数、跳过、删除的文件数，
+            failed 为失败的 (key, error) 列表
+
+        Raises:
+            ListError: 列举空间失败
+        """
+        result = {'uploaded': 0, 'uploaded_bytes': 0, 'skipped': 0, 'deleted': 0, 'failed': []}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 列举空间的同时遍历本地目录
+            local_files = executor.submit(lambda: list(iter_local_files(self.local_dir)))
+            remote_files = self.list_remote()
+            pending = deque()
+            for relative_path, file_path in local_files.result():
+                key = self.prefix + relative_path
+                pending.append(executor.submit(self._sync_file, key, file_path, remote_files.pop(key, None), result))
+                if len(pending) >= 4 * self.max_workers:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+
+        if self.etag_cache:
+            self.etag_cache.flush()
+        if self.delete and remote_files:
+            self.delete_orphans(remote_files, result)
+        return result
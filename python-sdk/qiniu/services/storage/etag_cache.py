@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+
+from qiniu.config import _BLOCK_SIZE
+
+
+def file_signature(st):
+    """
+    由 os.stat 结果得到判断文件是否变化的签名
+
+    Returns:
+        (dev, inode, size, mtime_ns)
+    """
+    mtime_ns = getattr(st, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(st.st_mtime * 1e9)
+    return st.st_dev, st.st_ino, st.st_size, mtime_ns
+
+
+class EtagCache(object):
+    """
+    持久化 etag 缓存类
+
+    以 SQLite 保存每个文件的 etag，文件的设备号、inode、大小和修改时间（纳秒）都未变化时直接返回保存的 etag，
+    不再重新读取文件。写入按批提交，可在多个线程间共享。
+
+    Attributes:
+        path: 缓存数据库文件路径
+        commit_every: 每写入多少条提交一次
+    """
+
+    def __init__(self, path, commit_every=1000):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.commit_every = commit_every
+        self.__lock = threading.Lock()
+        self.__pending = 0
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock:
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.execute(
+                'CREATE TABLE IF NOT EXISTS etags ('
+                'dev INTEGER NOT NULL, ino INTEGER NOT NULL, part_size INTEGER NOT NULL, '
+                'size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, etag TEXT NOT NULL, path TEXT, '
+                'PRIMARY KEY (dev, ino, part_size))'
+            )
+            self.__conn.commit()
+
+    @staticmethod
+    def __part_size(part_size):
+        # 4MB 分片的 v2 etag 与 v1 相同
+        return part_size or _BLOCK_SIZE
+
+    def get(self, file_path, st=None, part_size=None):
+        """
+        获取文件的 etag，未缓存或文件已变化时返回 None
+
+        Args:
+            file_path: 文件路径
+            st: 可选，文件的 os.stat 结果
+            part_size: 可选，v2 分片上传的分片大小
+        """
+        dev, ino, size, mtime_ns = file_signature(st or os.stat(file_path))
+        with self.__lock:
+            row = self.__conn.execute(
+                'SELECT etag FROM etags WHERE dev = ? AND ino = ? AND part_size = ? AND size = ? AND mtime_ns = ?',
+                (dev, ino, self.__part_size(part_size), size, mtime_ns)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, file_path, etag, st=None, part_size=None):
+        """
+        保存文件的 etag
+
+        Args:
+            file_path: 文件路径
+            etag: 文件的 etag
+            st: 可选，计算 etag 之前文件的 os.stat 结果，计算过程中文件被修改时下次会重新计算
+            part_size: 可选，v2 分片上传的分片大小
+        """
+        dev, ino, size, mtime_ns = file_signature(st or os.stat(file_path))
+        with self.__lock:
+            self.__conn.execute(
+                'INSERT OR REPLACE INTO etags (dev, ino, part_size, size, mtime_ns, etag, path) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (dev, ino, self.__part_size(part_size), size, mtime_ns, etag, file_path)
+            )
+            self.__pending += 1
+            if self.__pending >= self.commit_every:
+                self.__conn.commit()
+                self.__pending = 0
+
+    def flush(self):
+        """提交尚未提交的写入"""
+        with self.__lock:
+            self.__conn.commit()
+            self.__pending = 0
+
+    def close(self):
+        self.flush()
+        with self.__lock:
+            self.__conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+import time
+
+from .listing import iter_list_pages, prefetch
+
+try:
+    _chr = unichr  # noqa
+except NameError:
+    _chr = chr
+
+# putTime 的单位为 100 纳秒
+_PUT_TIME_UNIT = 10000000
+
+
+def _prefix_range(prefix):
+    """
+    Returns:
+        (lower, upper): 以 prefix 开头的 key 满足 lower <= key < upper，upper 为 None 时没有上界
+    """
+    if not prefix:
+        return '', None
+    return prefix, prefix[:-1] + _chr(ord(prefix[-1]) + 1)
+
+
+def _row(item):
+    return (
+        item['key'],
+        item.get('fsize', 0),
+        item.get('hash'),
+        item.get('mimeType'),
+        item.get('putTime', 0),
+        item.get('type', 0)
+    )
+
+
+class Inventory(object):
+    """
+    本地文件清单类
+
+    以 SQLite 保存空间中文件的 key、fsize、hash、mimeType、putTime、type，
+    按前缀重新列举同步，前缀、大小、上传时间的查询直接在本地完成，无需列举空间。
+    可在多个线程间共享。
+
+    Attributes:
+        path: 清单数据库文件路径
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock:
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.execute(
+                'CREATE TABLE IF NOT EXISTS objects ('
+                'bucket TEXT NOT NULL, key TEXT NOT NULL, fsize INTEGER NOT NULL, hash TEXT, mime_type TEXT, '
+                'put_time INTEGER NOT NULL, type INTEGER NOT NULL, PRIMARY KEY (bucket, key))'
+            )
+            self.__conn.execute('CREATE INDEX IF NOT EXISTS objects_put_time ON objects (bucket, put_time)')
+            self.__conn.execute(
+                'CREATE TABLE IF NOT EXISTS syncs ('
+                'bucket TEXT NOT NULL, prefix TEXT NOT NULL, synced_at REAL NOT NULL, PRIMARY KEY (bucket, prefix))'
+            )
+            self.__conn.commit()
+
+    @staticmethod
+    def __where(bucket, prefix):
+        lower, upper = _prefix_range(prefix)
+        if upper is None:
+            return 'bucket = ? AND key >= ?', [bucket, lower]
+        return 'bucket = ? AND key >= ? AND key < ?', [bucket, lower, upper]
+
+    def sync(self, bucket_manager, bucket, prefix='', limit=None, items=None):
+        """
+        重新列举 prefix 下的文件并更新清单
+
+        新增的文件写入清单，putTime、hash、fsize、mimeType 或 type 变化的文件更新，
+        清单中有但本次列举中没有的文件删除；其他前缀下的记录不变。列举使用单独的数据库连接，
+        列举期间可以正常查询，列举完成后在一个事务中更新。
+
+        Args:
+            bucket_manager: BucketManager
+            bucket: 空间名
+            prefix: 同步的前缀，为空时同步整个空间
+            limit: 单次列举个数限制
+            items: 可选，文件信息的可迭代对象，如 BucketManager.list_sharded 的结果，指定时不再列举
+
+        Returns:
+            dict: listed、added、updated、deleted 分别为列举到、新增、更新、删除的文件数
+
+        Raises:
+            ListError: 列举失败，此时清单不变
+        """
+        if items is None:
+            items = (
+                item
+                for page in prefetch(iter_list_pages(bucket_manager, bucket, prefix=prefix or None, limit=limit))
+                for item in page.get('items') or []
+            )
+        where, args = self.__where(bucket, prefix)
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            conn.execute(
+                'CREATE TEMP TABLE listed ('
+                'key TEXT PRIMARY KEY, fsize INTEGER, hash TEXT, mime_type TEXT, put_time INTEGER, type INTEGER)'
+            )
+            try:
+                rows = []
+                for item in items:
+                    rows.append(_row(item))
+                    if len(rows) >= 1000:
+                        conn.executemany('INSERT OR REPLACE INTO temp.listed VALUES (?, ?, ?, ?, ?, ?)', rows)
+                        rows = []
+                conn.executemany('INSERT OR REPLACE INTO temp.listed VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+                listed = conn.execute('SELECT COUNT(*) FROM temp.listed').fetchone()[0]
+                added = conn.execute(
+                    'SELECT COUNT(*) FROM temp.listed l WHERE NOT EXISTS '
+                    '(SELECT 1 FROM objects o WHERE o.bucket = ? AND o.key = l.key)',
+                    (bucket,)
+                ).fetchone()[0]
+                changed = conn.execute(
+                    'INSERT OR REPLACE INTO objects (bucket, key, fsize, hash, mime_type, put_time, type) '
+                    'SELECT ?, l.key, l.fsize, l.hash, l.mime_type, l.put_time, l.type FROM temp.listed l '
+                    'LEFT JOIN objects o ON o.bucket = ? AND o.key = l.key '
+                    'WHERE o.key IS NULL OR o.put_time != l.put_time OR o.hash IS NOT l.hash OR o.fsize != l.fsize '
+                    'OR o.mime_type IS NOT l.mime_type OR o.type != l.type',
+                    (bucket, bucket)
+                ).rowcount
+                deleted = conn.execute(
+                    'DELETE FROM objects WHERE ' + where + ' AND key NOT IN (SELECT key FROM temp.listed)',
+                    args
+                ).rowcount
+                conn.execute(
+                    'INSERT OR REPLACE INTO syncs (bucket, prefix, synced_at) VALUES (?, ?, ?)',
+                    (bucket, prefix or '', time.time())
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+        return {'listed': listed, 'added': added, 'updated': changed - added, 'deleted': deleted}
+
+    def synced_at(self, bucket, prefix=''):
+        """
+        Returns:
+            prefix 最近一次同步完成的时间戳，包含 prefix 的更短前缀同步也算在内；从未同步时为 None
+        """
+        with self.__lock:
+            rows = self.__conn.execute('SELECT prefix, synced_at FROM syncs WHERE bucket = ?', (bucket,)).fetchall()
+        times = [synced_at for synced_prefix, synced_at in rows if (prefix or '').startswith(synced_prefix)]
+        return max(times) if times else None
+
+    def summary(self, bucket, prefix=''):
+        """
+        统计 prefix 下的文件数和总大小
+
+        Returns:
+            dict: count、size，以及 types，为每种存储类型的 count、size
+        """
+        where, args = self.__where(bucket, prefix)
+        with self.__lock:
+            rows = self.__conn.execute(
+                'SELECT type, COUNT(*), COALESCE(SUM(fsize), 0) FROM objects WHERE ' + where + ' GROUP BY type',
+                args
+            ).fetchall()
+        return {
+            'count': sum(row[1] for row in rows),
+            'size': sum(row[2] for row in rows),
+            'types': dict((row[0], {'count': row[1], 'size': row[2]}) for row in rows)
+        }
+
+    def children(self, bucket, prefix='', delimiter='/'):
+        """
+        按 delimiter 统计 prefix 下第一层每个目录的文件数和总大小
+
+        Returns:
+            list: 按目录排序，每个元素为 dict，包含 prefix、count、size；
+            prefix 下第一层的文件统计在 prefix 等于参数 prefix 的元素中
+        """
+        where, args = self.__where(bucket, prefix)
+        prefix = prefix or ''
+        start = len(prefix) + 1
+        with self.__lock:
+            rows = self.__conn.execute(
+                'SELECT CASE WHEN instr(substr(key, ?), ?) > 0 THEN substr(key, 1, ? + instr(substr(key, ?), ?)) '
+                'ELSE ? END AS child, COUNT(*), COALESCE(SUM(fsize), 0) '
+                'FROM objects WHERE ' + where + ' GROUP BY child ORDER BY child',
+                [start, delimiter, start - 1 + len(delimiter) - 1, start, delimiter, prefix] + args
+            ).fetchall()
+        return [{'prefix': row[0], 'count': row[1], 'size': row[2]} for row in rows]
+
+    def find(self, bucket, prefix='', min_size=None, max_size=None, put_after=None, put_before=None,
+             mime_type=None, file_type=None, limit=1000):
+        """
+        按条件查找文件
+
+        Args:
+            bucket: 空间名
+            prefix: 前缀
+            min_size: 可选，最小文件大小（字节，含）
+            max_size: 可选，最大文件大小（字节，含）
+            put_after: 可选，上传时间晚于该时间戳（秒）
+            put_before: 可选，上传时间早于该时间戳（秒）
+            mime_type: 可选，文件类型
+            file_type: 可选，存储类型，0 标准存储，1 低频存储，2 归档存储，3 深度归档存储
+            limit: 最多返回的文件数，为 None 时不限制
+
+        Returns:
+            list: 按 key 排序的文件信息 dict，字段与列举接口相同
+        """
+        where, args = self.__where(bucket, prefix)
+        conditions = [where]
+        for condition, value in (
+            ('fsize >= ?', min_size),
+            ('fsize <= ?', max_size),
+            ('put_time > ?', None if put_after is None else int(put_after * _PUT_TIME_UNIT)),
+            ('put_time < ?', None if put_before is None else int(put_before * _PUT_TIME_UNIT)),
+            ('mime_type = ?', mime_type),
+            ('type = ?', file_type),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                args.append(value)
+        sql = 'SELECT key, fsize, hash, mime_type, put_time, type FROM objects WHERE ' + ' AND '.join(conditions) + ' ORDER BY key'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        with self.__lock:
+            rows = self.__conn.execute(sql, args).fetchall()
+        return [
+            {'key': row[0], 'fsize': row[1], 'hash': row[2], 'mimeType': row[3], 'putTime': row[4], 'type': row[5]}
+            for row in rows
+        ]
+
+    def close(self):
+        with self.__lock:
+            self.__conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+import heapq
+import os
+import threading
+from collections import deque, namedtuple
+
+from qiniu.compat import is_py2, json
+from qiniu.utils import urlsafe_base64_encode
+
+if is_py2:
+    import Queue as queue
+else:
+    import queue
+
+
+class ListError(RuntimeError):
+    """
+    列举某一页失败
+
+    Attributes:
+        resp: 失败请求的 ResponseInfo
+        marker: 失败请求使用的 marker，可从该位置继续列举
+    """
+
+    def __init__(self, resp, marker=None):
+        super(ListError, self).__init__('list failed at marker {0!r}: {1}'.format(marker, resp))
+        self.resp = resp
+        self.marker = marker
+
+
+def iter_list_pages(bucket_manager, bucket, prefix=None, marker=None, limit=None, delimiter=None):
+    """
+    依次请求列举接口，返回每一页的结果，直到没有更多数据
+
+    Yields:
+        dict: 列举接口返回的一页结果，包含 items、marker、commonPrefixes
+
+    Raises:
+        ListError: 某一页请求失败
+    """
+    while True:
+        ret, eof, info = bucket_manager.list(bucket, prefix=prefix, marker=marker, limit=limit, delimiter=delimiter)
+        if ret is None:
+            raise ListError(info, marker)
+        yield ret
+        marker = ret.get('marker')
+        if eof or not marker:
+            return
+
+
+_END = object()
+
+
+class _Failure(object):
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def _put(pending, stopped, item):
+    while not stopped.is_set():
+        try:
+            pending.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(iterable, pending, stopped):
+    try:
+        for item in iterable:
+            if not _put(pending, stopped, item):
+                return False
+    except Exception as e:
+        _put(pending, stopped, _Failure(e))
+        return False
+    return True
+
+
+def _start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, name='qiniu-prefetch')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def _drain(pending, producers=1):
+    while producers:
+        item = pending.get()
+        if item is _END:
+            producers -= 1
+            continue
+        if isinstance(item, _Failure):
+            raise item.exception
+        yield item
+
+
+class _Prefetched(object):
+    """创建时即在后台线程中开始读取 iterable，结果放入有界队列"""
+
+    def __init__(self, iterable, max_pending=2):
+        self.__pending = queue.Queue(maxsize=max(1, max_pending))
+        self.__stopped = threading.Event()
+        _start_thread(self.__produce, iterable)
+
+    def __produce(self, iterable):
+        if _produce(iterable, self.__pending, self.__stopped):
+            _put(self.__pending, self.__stopped, _END)
+
+    def __iter__(self):
+        return _drain(self.__pending)
+
+    def close(self):
+        self.__stopped.set()
+
+
+def prefetch(iterable, max_pending=2):
+    """
+    在后台线程中提前读取 iterable，读取结果放入有界队列，最多提前 max_pending 个元素
+
+    调用方处理当前元素时下一个元素已在请求中；后台线程抛出的异常在调用方读到该位置时重新抛出。
+    调用方提前结束迭代时后台线程随之停止。
+
+    Args:
+        iterable: 可迭代对象，在后台线程中迭代
+        max_pending: 队列中最多缓存的元素数
+
+    Yields:
+        iterable 中的元素，顺序不变
+    """
+    prefetched = _Prefetched(iterable, max_pending)
+    try:
+        for item in prefetched:
+            yield item
+    finally:
+        prefetched.close()
+
+
+def merge_unordered(iterables, max_workers=8, max_pending=16):
+    """
+    用 max_workers 个后台线程同时读取多个 iterable，按读到的先后顺序返回元素
+
+    同一个 iterable 中的元素顺序不变；任一 iterable 抛出的异常在调用方重新抛出，其余线程随之停止。
+
+    Args:
+        iterables: 可迭代对象的列表，每个在一个后台线程中迭代
+        max_workers: 同时读取的 iterable 数
+        max_pending: 队列中最多缓存的元素数
+
+    Yields:
+        各 iterable 中的元素
+    """
+    iterables = iter(iterables)
+    pending = queue.Queue(maxsize=max(1, max_pending))
+    stopped = threading.Event()
+    lock = threading.Lock()
+
+    def work():
+        while not stopped.is_set():
+            with lock:
+                iterable = next(iterables, None)
+            if iterable is None:
+                break
+            if not _produce(iterable, pending, stopped):
+                return
+        _put(pending, stopped, _END)
+
+    max_workers = max(1, max_workers)
+    for _ in range(max_workers):
+        _start_thread(work)
+    try:
+        for item in _drain(pending, producers=max_workers):
+            yield item
+    finally:
+        stopped.set()
+
+
+def marker_after_key(key):
+    """
+    构造从 key 之后（不含 key）开始列举的 marker
+
+    列举接口的 marker 为 {"c":0,"k":"<最后一个 key>"} 的 URL 安全 Base64 编码
+    """
+    return urlsafe_base64_encode(json.dumps({'c': 0, 'k': key}, separators=(',', ':')))
+
+
+class ListShard(namedtuple('ListShard', ['name', 'prefix', 'delimiter', 'start_after', 'end'])):
+    """
+    并行列举的一个分片，每个分片是一条独立的 marker 链
+
+    Attributes:
+        name: 分片名，作为断点记录中的键
+        prefix: 列举前缀
+        delimiter: 目录分隔符，指定时只列举 prefix 下第一层的文件
+        start_after: 可选，只列举大于该 key 的文件
+        end: 可选，只列举不大于该 key 的文件
+    """
+
+    __slots__ = ()
+
+    @property
+    def lower_bound(self):
+        if self.start_after is not None:
+            return self.start_after
+        return self.prefix or ''
+
+
+def prefix_shards(bucket_manager, bucket, prefix=None, delimiter='/', limit=None):
+    """
+    按 delimiter 列出 prefix 下的第一层目录，每个目录一个分片
+
+    另有一个带 delimiter 的分片列举 prefix 下第一层的文件。
+
+    Returns:
+        ListShard 列表
+    """
+    shards = [ListShard('delimiter:' + (prefix or ''), prefix, delimiter, None, None)]
+    for page in iter_list_pages(bucket_manager, bucket, prefix=prefix, limit=limit, delimiter=delimiter):
+        for common_prefix in page.get('commonPrefixes') or []:
+            shards.append(ListShard('prefix:' + common_prefix, common_prefix, None, None, None))
+    return shards
+
+
+def range_shards(split_points, prefix=None):
+    """
+    按分割点把 key 空间分成多个区间，每个区间一个分片
+
+    分割点 s1 < s2 < ... < sn 分出 (-, s1]、(s1, s2]、...、(sn, +) 共 n + 1 个分片
+
+    Returns:
+        ListShard 列表
+    """
+    bounds = [None] + sorted(set(split_points)) + [None]
+    return [
+        ListShard('range:{0}:{1}'.format(prefix or '', start or ''), prefix, None, start, end)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+class ListCheckpoint(object):
+    """
+    并行列举的断点记录类
+
+    以 JSON 文件保存每个分片已处理到的 marker 及是否已完成，每处理完一页写入一次
+
+    Attributes:
+        path: 断点记录文件路径
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.__lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self.__shards = json.load(f)
+        except (IOError, ValueError):
+            self.__shards = {}
+
+    def get(self, name):
+        """
+        Returns:
+            dict: marker、done，分片未开始时为 None
+        """
+        with self.__lock:
+            return self.__shards.get(name)
+
+    def update(self, name, marker=None, done=False):
+        with self.__lock:
+            state = self.__shards.setdefault(name, {'marker': None, 'done': False})
+            if marker:
+                state['marker'] = marker
+            state['done'] = state['done'] or done
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.__shards, f)
+            if os.name == 'nt' and os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmp_path, self.path)
+
+    def delete(self):
+        with self.__lock:
+            self.__shards = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class ShardedLister(object):
+    """
+    并行列举
+
+    每个分片是一条独立的 marker 链，多个分片同时列举。
+
+    ordered 为 True 时按 key 顺序返回：不带 delimiter 的分片按下界依次返回，
+    当前分片之后的 max_workers - 1 个分片同时在后台提前列举，各缓存最多 prefetch_pages 页；
+    带 delimiter 的分片与之按 key 归并。不带 delimiter 的分片之间不能有重叠。
+    ordered 为 False 时按列举完成的先后返回，吞吐不受最慢分片限制。
+
+    指定 checkpoint 时，每一页的文件全部返回给调用方后记录该分片的 marker；
+    使用同一 checkpoint 重新列举时已完成的分片跳过，其余分片从记录的 marker 继续。
+
+    Attributes:
+        bucket_manager: BucketManager
+        bucket: 空间名
+        shards: ListShard 列表
+        ordered: 是否按 key 顺序返回
+        max_workers: 同时列举的分片数
+        checkpoint: 可选，ListCheckpoint
+        limit: 单次列举个数限制
+        prefetch_pages: 每个分片最多提前缓存的页数
+    """
+
+    def __init__(self, bucket_manager, bucket, shards, ordered=True, max_workers=8, checkpoint=None,
+                 limit=None, prefetch_pages=2):
+        self.bucket_manager = bucket_manager
+        self.bucket = bucket
+        self.shards = list(shards)
+        self.ordered = ordered
+        self.max_workers = max(1, max_workers)
+        self.checkpoint = checkpoint
+        self.limit = limit
+        self.prefetch_pages = max(1, prefetch_pages)
+
+    def _shard_pages(self, shard):
+        """返回 (shard, items, marker)，分片结束时返回 (shard, None, None)"""
+        state = self.checkpoint.get(shard.name) if self.checkpoint else None
+        if state and state.get('done'):
+            return
+        if state and state.get('marker'):
+            marker = state['marker']
+        elif shard.start_after is not None:
+            marker = marker_after_key(shard.start_after)
+        else:
+            marker = None
+        pages = iter_list_pages(self.bucket_manager, self.bucket, prefix=shard.prefix, marker=marker,
+                                limit=self.limit, delimiter=shard.delimiter)
+        for page in pages:
+            items = page.get('items') or []
+            if shard.end is not None and items and items[-1]['key'] > shard.end:
+                yield shard, [item for item in items if item['key'] <= shard.end], page.get('marker')
+                break
+            yield shard, items, page.get('marker')
+        yield shard, None, None
+
+    def _items(self, pages):
+        for shard, items, marker in pages:
+            if items is None:
+                if self.checkpoint:
+                    self.checkpoint.update(shard.name, done=True)
+                continue
+            for item in items:
+                yield item
+            if self.checkpoint and marker:
+                self.checkpoint.update(shard.name, marker)
+
+    def _ordered_pages(self, shards):
+        """按顺序返回各分片的页，当前分片之后的分片同时在后台提前列举"""
+        shards = iter(shards)
+        running = deque()
+
+        def start_next():
+            shard = next(shards, None)
+            if shard is not None:
+                running.append(_Prefetched(self._shard_pages(shard), max_pending=self.prefetch_pages))
+
+        try:
+            for _ in range(self.max_workers):
+                start_next()
+            while running:
+                for page in running[0]:
+                    yield page
+                running.popleft().close()
+                start_next()
+        finally:
+            for prefetched in running:
+                prefetched.close()
+
+    def _iter_ordered(self):
+        chained = sorted((shard for shard in self.shards if not shard.delimiter), key=lambda shard: shard.lower_bound)
+        streams = [self._items(self._ordered_pages(chained))] if chained else []
+        for shard in self.shards:
+            if shard.delimiter:
+                streams.append(self._items(prefetch(self._shard_pages(shard), max_pending=self.prefetch_pages)))
+        if len(streams) == 1:
+            for item in streams[0]:
+                yield item
+            return
+        # 分片之间没有相同的 key，序号只用于避免比较 item
+        decorated = [((item['key'], i, item) for item in stream) for i, stream in enumerate(streams)]
+        for _key, _i, item in heapq.merge(*decorated):
+            yield item
+
+    def __iter__(self):
+        if self.ordered:
+            return self._iter_ordered()
+        return self._items(merge_unordered(
+            [self._shard_pages(shard) for shard in self.shards],
+            max_workers=self.max_workers,
+            max_pending=self.max_workers * self.prefetch_pages
+        ))
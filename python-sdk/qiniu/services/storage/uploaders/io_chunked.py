@@ -15,6 +15,35 @@ ChunkInfo = namedtuple(
 )
 
 
+def get_positional_fd(base_io):
+    """
+    Get the file descriptor of `base_io` for positional reads (os.pread),
+    which read at an offset without moving the shared file position,
+    so workers can read parts of the same file without a lock.
+
+    Only plain binary files are supported: wrappers that expose the fd of
+    another file (e.g. GzipFile) or have their own write buffer are not.
+
+    Parameters
+    ----------
+    base_io: IOBase
+
+    Returns
+    -------
+    int or None
+        None if positional reads are not available for `base_io`
+    """
+    if not hasattr(os, 'pread'):
+        return None
+    raw = base_io.raw if isinstance(base_io, io.BufferedReader) else base_io
+    if not isinstance(raw, io.FileIO) or raw.closed or not raw.readable():
+        return None
+    try:
+        return raw.fileno()
+    except (OSError, ValueError):
+        return None
+
+
 class IOChunked(io.IOBase):
     def __init__(
         self,
@@ -32,6 +61,8 @@ class IOChunked(io.IOBase):
         self.__chunk_end = chunk_offset + chunk_size
         self.__lock = lock
         self.__chunk_pos = 0
+        # read with os.pread without the lock if base_io is a plain file
+        self.__fd = get_positional_fd(base_io)
 
         self.buffer_size = min(buffer_size, chunk_size)
 
@@ -71,9 +102,12 @@ class IOChunked(io.IOBase):
         read_size = min(self.__rest_chunk_size, read_size)
 
         # -- ignore size argument --
-        with self.__lock:
-            self.__base_io.seek(self.__curr_base_pos)
-            data = self.__base_io.read(read_size)
+        if self.__fd is not None:
+            data = os.pread(self.__fd, read_size, self.__curr_base_pos)
+        else:
+            with self.__lock:
+                self.__base_io.seek(self.__curr_base_pos)
+                data = self.__base_io.read(read_size)
 
         self.__chunk_pos += len(data)
         return data
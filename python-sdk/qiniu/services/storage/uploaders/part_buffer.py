@@ -0,0 +1,173 @@
+import io
+import os
+import threading
+from contextlib import contextmanager
+
+from qiniu.compat import is_seekable
+
+from .io_chunked import get_positional_fd
+
+
+class PartBufferPool(object):
+    """
+    A pool of reusable part buffers.
+
+    At most `max_buffers` buffers of `part_size` bytes exist at the same time,
+    so the memory used by concurrent part uploads is capped at
+    `max_buffers * part_size` whatever the number of workers. A worker asking
+    for a buffer while all of them are in use waits for one to be released.
+    """
+
+    def __init__(self, part_size, max_buffers):
+        """
+        Parameters
+        ----------
+        part_size: int
+        max_buffers: int
+        """
+        if part_size <= 0:
+            raise ValueError('"part_size" must be positive')
+        self.part_size = part_size
+        self.max_buffers = max(1, max_buffers)
+        self.__semaphore = threading.BoundedSemaphore(self.max_buffers)
+        self.__lock = threading.Lock()
+        self.__free = []
+
+    @contextmanager
+    def buffer(self, size):
+        """
+        Parameters
+        ----------
+        size: int
+            not greater than part_size
+
+        Yields
+        -------
+        memoryview
+            a writable view of exactly `size` bytes
+        """
+        if size > self.part_size:
+            raise ValueError('"size" must not be greater than part_size')
+        self.__semaphore.acquire()
+        try:
+            with self.__lock:
+                buf = self.__free.pop() if self.__free else None
+            if buf is None:
+                buf = bytearray(self.part_size)
+            try:
+                yield memoryview(buf)[:size]
+            finally:
+                with self.__lock:
+                    self.__free.append(buf)
+        finally:
+            self.__semaphore.release()
+
+
+def read_chunk_into(base_io, chunk_info, lock, view):
+    """
+    Read a whole chunk of `base_io` into `view`.
+
+    Plain files are read with os.preadv / os.pread at the chunk offset
+    without taking the lock, other streams with a single seek and read
+    under the lock.
+
+    Parameters
+    ----------
+    base_io: IOBase
+        seekable
+    chunk_info: ChunkInfo
+    lock: Lock
+        serializes seek and read on `base_io` between workers
+    view: memoryview
+        exactly chunk_info.chunk_size bytes
+
+    Returns
+    -------
+    int
+        bytes read, less than chunk_size only if `base_io` ended early
+    """
+    if not is_seekable(base_io):
+        raise TypeError('"base_io" must be seekable')
+    fd = get_positional_fd(base_io)
+    if fd is not None:
+        return _pread_into(fd, chunk_info.chunk_offset, view)
+
+    size = chunk_info.chunk_size
+    read_size = 0
+    readinto = getattr(base_io, 'readinto', None)
+    with lock:
+        base_io.seek(chunk_info.chunk_offset)
+        while read_size < size:
+            if readinto is not None:
+                n = readinto(view[read_size:])
+            else:
+                data = base_io.read(size - read_size)
+                n = len(data) if data else 0
+                view[read_size:read_size + n] = data
+            if not n:
+                break
+            read_size += n
+    return read_size
+
+
+def _pread_into(fd, offset, view):
+    size = len(view)
+    read_size = 0
+    preadv = getattr(os, 'preadv', None)
+    while read_size < size:
+        if preadv is not None:
+            n = preadv(fd, [view[read_size:]], offset + read_size)
+        else:
+            data = os.pread(fd, size - read_size, offset + read_size)
+            n = len(data)
+            view[read_size:read_size + n] = data
+        if not n:
+            break
+        read_size += n
+    return read_size
+
+
+class PartReader(io.IOBase):
+    """
+    A seekable, read only stream over a part buffer, used as the request body
+    so the part is sent from memory instead of being read again from the file.
+    """
+
+    def __init__(self, view):
+        """
+        Parameters
+        ----------
+        view: memoryview
+        """
+        self.__view = view
+        self.__pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=0):
+        if whence == os.SEEK_SET:
+            pos = offset
+        elif whence == os.SEEK_CUR:
+            pos = self.__pos + offset
+        elif whence == os.SEEK_END:
+            pos = len(self.__view) + offset
+        else:
+            raise ValueError('whence should be 0, 1 or 2')
+        self.__pos = max(0, min(len(self.__view), pos))
+        return self.__pos
+
+    def tell(self):
+        return self.__pos
+
+    def read(self, size=-1):
+        end = len(self.__view) if size is None or size < 0 else min(len(self.__view), self.__pos + size)
+        data = self.__view[self.__pos:end]
+        self.__pos = end
+        return data
+
+    def __len__(self):
+        return len(self.__view)
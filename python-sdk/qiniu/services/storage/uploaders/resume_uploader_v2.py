@@ -16,10 +16,54 @@ from qiniu.compat import json
 
 from ._default_retrier import ProgressRecord, get_default_retrier
 from .abc import ResumeUploaderBase
-from .io_chunked import IOChunked
+from .part_buffer import PartBufferPool, PartReader, read_chunk_into
 
 
 class ResumeUploaderV2(ResumeUploaderBase):
+    """
+    Attributes
+    ----------
+    part_buffer_memory: int, optional
+        max bytes held by part buffers while uploading parts,
+        defaults to max_concurrent_workers * part_size
+    """
+
+    def __init__(
+        self,
+        bucket_name,
+        **kwargs
+    ):
+        """
+        Parameters
+        ----------
+        bucket_name: str
+        part_buffer_memory: int
+        kwargs
+            see ResumeUploaderBase
+        """
+        super(ResumeUploaderV2, self).__init__(bucket_name, **kwargs)
+
+        self.max_concurrent_workers = kwargs.get('max_concurrent_workers', 3)
+        self.part_buffer_memory = kwargs.get('part_buffer_memory', None)
+
+    def _new_part_buffer_pool(self, part_size):
+        """
+        Parameters
+        ----------
+        part_size: int
+
+        Returns
+        -------
+        PartBufferPool
+        """
+        if not self.concurrent_executor:
+            max_buffers = 1
+        elif self.part_buffer_memory:
+            max_buffers = self.part_buffer_memory // part_size
+        else:
+            max_buffers = self.max_concurrent_workers
+        return PartBufferPool(part_size, max_buffers)
+
     def _recover_from_record(
         self,
         file_name,
@@ -345,6 +389,8 @@ class ResumeUploaderV2(ResumeUploaderBase):
             # if last part uploaded, should correct the uploaded size
             uploaded_size += (data_size % context.part_size) - context.part_size
         lock = Lock()
+        # each part is read once into a pooled buffer, then hashed and sent from it
+        buffer_pool = self._new_part_buffer_pool(context.part_size)
 
         if not self.concurrent_executor:
             # upload sequentially
@@ -356,7 +402,8 @@ class ResumeUploaderV2(ResumeUploaderBase):
                     up_token=up_token,
                     upload_id=context.upload_id,
                     key=key,
-                    lock=lock
+                    lock=lock,
+                    buffer_pool=buffer_pool
                 )
                 if not resp.ok():
                     return None, resp
@@ -381,7 +428,8 @@ class ResumeUploaderV2(ResumeUploaderBase):
                     up_token=up_token,
                     upload_id=context.upload_id,
                     key=key,
-                    lock=lock
+                    lock=lock,
+                    buffer_pool=buffer_pool
                 )
                 future_chunk_dict[ftr] = chunk
 
@@ -767,7 +815,8 @@ class ResumeUploaderV2(ResumeUploaderBase):
         up_token,
         upload_id,
         key,
-        lock
+        lock,
+        buffer_pool
     ):
         """
         Parameters
@@ -779,6 +828,7 @@ class ResumeUploaderV2(ResumeUploaderBase):
         upload_id: str
         key: str
         lock: Lock
+        buffer_pool: PartBufferPool
 
         Returns
         -------
@@ -792,14 +842,49 @@ class ResumeUploaderV2(ResumeUploaderBase):
         if not bucket_name:
             bucket_name = self.bucket_name
 
-        chunked_data = IOChunked(
-            base_io=data,
-            chunk_offset=chunk_info.chunk_offset,
-            chunk_size=chunk_info.chunk_size,
-            lock=lock
-        )
-        chunk_md5 = io_md5(chunked_data)
-        chunked_data.seek(0)
+        with buffer_pool.buffer(chunk_info.chunk_size) as part_buffer:
+            read_size = read_chunk_into(data, chunk_info, lock, part_buffer)
+            part_buffer = part_buffer[:read_size]
+            chunk_md5 = io_md5([part_buffer])
+            return self.__put_part(
+                part_data=PartReader(part_buffer),
+                chunk_md5=chunk_md5,
+                chunk_info=chunk_info,
+                up_hosts=up_hosts,
+                up_token=up_token,
+                bucket_name=bucket_name,
+                upload_id=upload_id,
+                key=key
+            )
+
+    def __put_part(
+        self,
+        part_data,
+        chunk_md5,
+        chunk_info,
+        up_hosts,
+        up_token,
+        bucket_name,
+        upload_id,
+        key
+    ):
+        """
+        Parameters
+        ----------
+        part_data: PartReader
+        chunk_md5: str
+        chunk_info: ChunkInfo
+        up_hosts: list[str]
+        up_token: str
+        bucket_name: str
+        upload_id: str
+        key: str
+
+        Returns
+        -------
+        part: _ResumeUploadV2Part
+        resp: ResponseInfo
+        """
         part, resp = None, None
         for up_host in up_hosts:
             url = self.__get_url_for_upload(
@@ -811,7 +896,7 @@ class ResumeUploaderV2(ResumeUploaderBase):
             )
             ret, resp = qn_http_client.put(
                 url=url,
-                data=chunked_data,
+                data=part_data,
                 files=None,
                 headers={
                     'Content-Type': 'application/octet-stream',
@@ -825,12 +910,9 @@ class ResumeUploaderV2(ResumeUploaderBase):
                     etag=ret.get('etag', '')
                 )
                 return part, resp
-            if (
-                not is_seekable(chunked_data) or
-                not resp.need_retry()
-            ):
+            if not resp.need_retry():
                 return part, resp
-            chunked_data.seek(0)
+            part_data.seek(0)
         return part, resp
 
 
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
+import os
+import threading
+import time
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from multiprocessing import cpu_count
 from hashlib import sha1, new as hashlib_new
 from base64 import urlsafe_b64encode, urlsafe_b64decode
 from datetime import datetime, tzinfo, timedelta
@@ -123,12 +129,21 @@ def _sha1(data):
     return h.digest()
 
 
+def _etag_of_sha1s(sha1s):
+    """由各 4MB 块的 sha1 计算 etag（v1 算法）"""
+    if len(sha1s) == 0:
+        sha1s = [_sha1(b'')]
+    if len(sha1s) == 1:
+        return urlsafe_base64_encode(b'\x16' + sha1s[0])
+    return urlsafe_base64_encode(b'\x96' + _sha1(b('').join(sha1s)))
+
+
 def etag_stream(input_stream):
     """
     计算输入流的etag
 
     .. deprecated::
-        在 v2 分片上传使用 4MB 以外分片大小时无法正常工作
+        在 v2 分片上传使用 4MB 以外分片大小时无法正常工作，请使用 etag_v2
 
     Parameters
     ----------
@@ -140,17 +155,7 @@ def etag_stream(input_stream):
     str
 
     """
-    array = [_sha1(block) for block in _file_iter(input_stream, _BLOCK_SIZE)]
-    if len(array) == 0:
-        array = [_sha1(b'')]
-    if len(array) == 1:
-        data = array[0]
-        prefix = b'\x16'
-    else:
-        sha1_str = b('').join(array)
-        data = _sha1(sha1_str)
-        prefix = b'\x96'
-    return urlsafe_base64_encode(prefix + data)
+    return _etag_of_sha1s([_sha1(block) for block in _file_iter(input_stream, _BLOCK_SIZE)])
 
 
 def etag(filePath):
@@ -158,7 +163,7 @@ def etag(filePath):
     计算文件的etag:
 
     .. deprecated::
-        在 v2 分片上传使用 4MB 以外分片大小时无法正常工作
+        在 v2 分片上传使用 4MB 以外分片大小时无法正常工作，请使用 etag_v2
 
 
     Parameters
@@ -175,6 +180,154 @@ def etag(filePath):
         return etag_stream(f)
 
 
+def _default_hash_workers():
+    # sha1 计算是 CPU 密集型，线程数超过 CPU 核数没有收益
+    return min(32, cpu_count())
+
+
+def _file_block_sha1s(file_path, blocks, max_workers):
+    """
+    多线程计算文件中各块的 sha1，hashlib 处理大块数据时会释放 GIL
+
+    Args:
+        file_path: 文件路径
+        blocks:    [(偏移, 大小)]
+        max_workers: 线程数
+
+    Returns:
+        与 blocks 顺序一致的 sha1 列表
+    """
+    if not blocks:
+        return []
+    with open(file_path, 'rb') as f:
+        if not hasattr(os, 'pread'):
+            return _ordered_sha1s(_read_blocks(f, blocks), max_workers)
+
+        fd = f.fileno()
+
+        def hash_block(block):
+            offset, size = block
+            data = os.pread(fd, size, offset)
+            # 文件在计算过程中被截断时继续读取，读不到数据时按实际内容计算
+            while len(data) < size:
+                more = os.pread(fd, size - len(data), offset + len(data))
+                if not more:
+                    break
+                data += more
+            return _sha1(data)
+
+        if max_workers <= 1:
+            return [hash_block(block) for block in blocks]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(hash_block, blocks))
+
+
+def _ordered_sha1s(data_iter, max_workers):
+    """在线程池中并行计算依次读取的各块数据的 sha1，同时计算中的块数有上限以限制内存"""
+    if max_workers <= 1:
+        return [_sha1(data) for data in data_iter]
+    sha1s = []
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for data in data_iter:
+            pending.append(executor.submit(_sha1, data))
+            if len(pending) >= 2 * max_workers:
+                sha1s.append(pending.popleft().result())
+        while pending:
+            sha1s.append(pending.popleft().result())
+    return sha1s
+
+
+def _read_blocks(input_stream, blocks):
+    for offset, size in blocks:
+        input_stream.seek(offset)
+        yield input_stream.read(size)
+
+
+def _blocks_of(offset, size, block_size=_BLOCK_SIZE):
+    return [
+        (block_offset, min(block_size, offset + size - block_offset))
+        for block_offset in range(offset, offset + size, block_size)
+    ]
+
+
+def etag_parallel(file_path, max_workers=None):
+    """
+    多线程计算文件的 etag，结果与 etag 相同
+
+    Parameters
+    ----------
+    file_path: str
+        待计算 etag 的文件路径
+    max_workers: int
+        计算线程数，默认为 CPU 核数（最多 32）
+
+    Returns
+    -------
+    str
+    """
+    max_workers = max_workers or _default_hash_workers()
+    size = os.path.getsize(file_path)
+    return _etag_of_sha1s(_file_block_sha1s(file_path, _blocks_of(0, size), max_workers))
+
+
+def etag_stream_parallel(input_stream, max_workers=None):
+    """
+    多线程计算输入流的 etag，结果与 etag_stream 相同；
+    输入流在当前线程中按顺序读取，各块的 sha1 并行计算
+
+    Parameters
+    ----------
+    input_stream: io.IOBase
+        支持随机访问的文件型对象
+    max_workers: int
+        计算线程数，默认为 CPU 核数（最多 32）
+
+    Returns
+    -------
+    str
+    """
+    max_workers = max_workers or _default_hash_workers()
+    return _etag_of_sha1s(_ordered_sha1s(_file_iter(input_stream, _BLOCK_SIZE), max_workers))
+
+
+def etag_v2(file_path, part_size=_BLOCK_SIZE, max_workers=None):
+    """
+    计算以 v2 分片上传（指定分片大小）上传的文件的 etag
+
+    只有一个分片或分片大小为 4MB 时与 etag 相同；否则先按 v1 算法计算每个分片的 etag，
+    再对各分片 etag 去掉首字节后拼接计算 sha1，前缀为 0x9e
+
+    Parameters
+    ----------
+    file_path: str
+        待计算 etag 的文件路径
+    part_size: int
+        分片上传时使用的分片大小
+    max_workers: int
+        计算线程数，默认为 CPU 核数（最多 32）
+
+    Returns
+    -------
+    str
+    """
+    if part_size <= 0:
+        raise ValueError('"part_size" must be positive')
+    size = os.path.getsize(file_path)
+    if part_size == _BLOCK_SIZE or size <= part_size:
+        return etag_parallel(file_path, max_workers=max_workers)
+
+    max_workers = max_workers or _default_hash_workers()
+    parts = [_blocks_of(offset, min(part_size, size - offset)) for offset in range(0, size, part_size)]
+    sha1s = _file_block_sha1s(file_path, [block for blocks in parts for block in blocks], max_workers)
+    part_etags = []
+    start = 0
+    for blocks in parts:
+        part_etags.append(urlsafe_base64_decode(_etag_of_sha1s(sha1s[start:start + len(blocks)]))[1:])
+        start += len(blocks)
+    return urlsafe_base64_encode(b'\x9e' + _sha1(b('').join(part_etags)))
+
+
 def entry(bucket, key):
     """计算七牛API中的数据格式:
 
@@ -280,3 +433,22 @@ def deprecated(reason):
             return func(*args, **kwargs)
         return wrapper
     return decorator
+
+
+class RateLimiter(object):
+    """限制每秒开始的请求数，多个线程共享；rate 为 None 或 0 时不限制"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.__lock = threading.Lock()
+        self.__next = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.__lock:
+            now = time.time()
+            start = max(now, self.__next)
+            self.__next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
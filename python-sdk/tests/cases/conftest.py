@@ -74,7 +74,8 @@ def set_conf_default(request):
         'connection_timeout': 30,  # 链接超时为时间为30s
         'connection_retries': 3,  # 链接重试次数为3次
         'connection_pool': 10,  # 链接池个数为10
-        'default_upload_threshold': 2 * qn_config._BLOCK_SIZE  # put_file上传方式的临界默认值
+        'default_upload_threshold': 2 * qn_config._BLOCK_SIZE,  # put_file上传方式的临界默认值
+        'json_backend': None
     }
 
     _is_customized_default = {
@@ -89,7 +90,8 @@ def set_conf_default(request):
         'connection_timeout': False,
         'connection_retries': False,
         'connection_pool': False,
-        'default_upload_threshold': False
+        'default_upload_threshold': False,
+        'json_backend': False
     }
 
 
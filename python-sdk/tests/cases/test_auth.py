@@ -1,6 +1,12 @@
+import hmac
+import pickle
+from hashlib import sha1
+
 import pytest
 
-from qiniu.auth import Auth, QiniuMacAuth
+from qiniu.auth import Auth, HmacSigner, QiniuMacAuth, _path_with_query
+from qiniu.compat import urlparse
+from qiniu.utils import urlsafe_base64_encode
 
 
 @pytest.fixture(scope="module")
@@ -210,3 +216,43 @@ class TestAuth:
         )
         assert ok
 
+    def test_hmac_signer(self):
+        signer = HmacSigner('1234567890')
+        for data in ('', 'test', u'\u4e2d\u6587', b'bytes'):
+            data_bytes = data if isinstance(data, bytes) else data.encode('utf-8')
+            expect = urlsafe_base64_encode(hmac.new(b'1234567890', data_bytes, sha1).digest())
+            assert signer.sign(data) == expect
+        assert pickle.loads(pickle.dumps(signer)).sign('test') == signer.sign('test')
+
+    def test_auth_pickle(self, dummy_auth):
+        assert pickle.loads(pickle.dumps(dummy_auth)).token('test') == dummy_auth.token('test')
+
+    @pytest.mark.parametrize('url', [
+        'https://www.qiniu.com',
+        'https://www.qiniu.com?go=1',
+        'https://www.qiniu.com/?',
+        'http://upload.qiniup.com:8080/mkblk/4194304?a=1&b=2#frag',
+        'http://rs.qbox.me/stat/dGVzdA==',
+        'http://a.com/p;params?q=1',
+        '/relative/path?x=1',
+        'http://a.com/x?a=?',
+        'http://a.com/x??',
+        'http://a.com/x?#frag',
+        'a.com/p?r=http://x/y',
+        'http://a.com/p?r=http://x/y',
+        'http://a.com/a\tb?c=\n1',
+        'HTTP://A.com/Path?Q=1',
+    ])
+    def test_path_with_query(self, url):
+        parsed_url = urlparse(url)
+        path_with_query = parsed_url.path + ('?' + parsed_url.query if parsed_url.query else '')
+        assert _path_with_query(url) == (parsed_url.netloc, path_with_query)
+
+    def test_private_download_urls(self, dummy_auth, monkeypatch):
+        monkeypatch.setattr('time.time', lambda: 1700000000)
+        urls = ['http://a.com/1.jpg', 'http://a.com/2.jpg?imageView2/1/w/100']
+        signed = dummy_auth.private_download_urls(urls, expires=60)
+        assert signed == [dummy_auth.private_download_url(url, expires=60) for url in urls]
+        assert signed[0].startswith('http://a.com/1.jpg?e=1700000060&token=abcdefghklmnopq:')
+        assert signed[1].startswith('http://a.com/2.jpg?imageView2/1/w/100&e=1700000060&token=')
+        assert signed[0].split(':', 2)[2] == dummy_auth.token('http://a.com/1.jpg?e=1700000060').split(':')[1]
@@ -0,0 +1,43 @@
+import pytest
+
+from qiniu.http.default_client import qn_http_client
+
+
+def _mounted_adapter():
+    return qn_http_client.session.adapters['http://']
+
+
+class TestDefaultClientAdapter:
+    def test_adapter_kept_between_requests(self, mock_server_addr):
+        request_url = '{scheme}://{host}/echo?status=200'.format(
+            scheme=mock_server_addr.scheme,
+            host=mock_server_addr.netloc
+        )
+        qn_http_client.get(request_url)
+        adapter = _mounted_adapter()
+        for _ in range(3):
+            _ret, resp = qn_http_client.get(request_url)
+            assert resp.status_code == 200
+        assert _mounted_adapter() is adapter
+
+    @pytest.mark.parametrize(
+        'set_conf_default',
+        [
+            {
+                'connection_pool': 3,
+                'connection_retries': 7
+            }
+        ],
+        indirect=True
+    )
+    def test_adapter_rebuilt_when_conf_changed(self, mock_server_addr, set_conf_default):
+        request_url = '{scheme}://{host}/echo?status=200'.format(
+            scheme=mock_server_addr.scheme,
+            host=mock_server_addr.netloc
+        )
+        _ret, resp = qn_http_client.get(request_url)
+        assert resp.status_code == 200
+        adapter = _mounted_adapter()
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 3
+        assert adapter.max_retries.total == 7
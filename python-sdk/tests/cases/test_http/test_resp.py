@@ -1,6 +1,9 @@
+import pytest
 import requests
 
-from qiniu.http import qn_http_client, __return_wrapper as return_wrapper
+from qiniu.compat import get_json_loads, json_backends
+from qiniu import config as qn_config
+from qiniu.http import ResponseInfo, qn_http_client, __return_wrapper as return_wrapper
 
 
 class TestResponse:
@@ -62,3 +65,94 @@ class TestResponse:
         mocked_res = mock_res()
         ret, _ = return_wrapper(mocked_res)
         assert ret == {}
+
+
+class CountingResponse(object):
+    """records how often the body is read"""
+
+    def __init__(self, status_code, body, req_id='mockedReqid'):
+        self.url = 'http://fake.python-sdk.qiniu.com/'
+        self.status_code = status_code
+        self.headers = {'X-Reqid': req_id} if req_id else {}
+        self.body = body
+        self.reads = {'content': 0, 'text': 0}
+
+    @property
+    def content(self):
+        self.reads['content'] += 1
+        return self.body
+
+    @property
+    def text(self):
+        self.reads['text'] += 1
+        return self.body.decode('utf-8')
+
+
+class TestLazyResponseInfo:
+    def test_body_is_decoded_lazily_and_once(self):
+        res = CountingResponse(200, b'{"items": [{"key": "a"}], "marker": "m"}')
+        resp_info = ResponseInfo(res)
+        assert res.reads == {'content': 0, 'text': 0}
+        assert resp_info.json() == {'items': [{'key': 'a'}], 'marker': 'm'}
+        assert resp_info.json()['marker'] == 'm'
+        assert res.reads == {'content': 1, 'text': 0}
+        assert resp_info.text_body == resp_info.text_body
+        assert res.reads == {'content': 1, 'text': 1}
+        assert not hasattr(resp_info, 'error')
+
+    def test_error(self):
+        res = CountingResponse(612, b'{"error": "no such file or directory"}')
+        resp_info = ResponseInfo(res)
+        assert resp_info.error == '{"error": "no such file or directory"}'
+        assert resp_info.json() == {'error': 'no such file or directory'}
+        assert 'no such file or directory' in str(resp_info)
+        assert res.reads == {'content': 1, 'text': 1}
+
+        assert ResponseInfo(CountingResponse(599, b'null')).error == 'unknown'
+        assert ResponseInfo(CountingResponse(502, b'<html>Bad Gateway</html>')).error == '<html>Bad Gateway</html>'
+        assert ResponseInfo(CountingResponse(200, b'{}', req_id=None)).error == 'server is not qiniu'
+
+    def test_invalid_json(self):
+        res = CountingResponse(200, b'not json')
+        resp_info = ResponseInfo(res)
+        assert resp_info.json() == {}
+        assert resp_info.json() == {}
+        assert res.reads['content'] == 1
+
+    def test_connection_error(self):
+        resp_info = ResponseInfo(None, ValueError('connection refused'))
+        assert resp_info.text_body is None
+        assert resp_info.error == 'connection refused'
+        assert resp_info.json() == {}
+
+    @pytest.mark.parametrize('backend', sorted(json_backends))
+    def test_json_backends(self, backend):
+        loads = get_json_loads(backend)
+        assert loads(b'{"key": "\\u4e03\\u725b", "fsize": 1024, "putTime": 17000000000000000}') == {
+            'key': u'七牛', 'fsize': 1024, 'putTime': 17000000000000000
+        }
+        assert loads(u'[1, 2]') == [1, 2]
+
+    def test_default_json_backend_is_stdlib(self):
+        big = 123456789012345678901234567890
+        assert ResponseInfo(CountingResponse(200, '{{"a": {0}}}'.format(big).encode('utf-8'))).json() == {'a': big}
+        assert get_json_loads()(b'{"a": 1}') == {'a': 1}
+        assert get_json_loads() is get_json_loads('json')
+
+    def test_json_backend_fallback(self, monkeypatch):
+        def strict_loads(data):
+            raise ValueError('Integer exceeds 64-bit range')
+
+        monkeypatch.setitem(json_backends, 'strict', strict_loads)
+        assert get_json_loads('strict')(b'{"a": 18446744073709551616}') == {'a': 18446744073709551616}
+
+    def test_set_json_backend(self):
+        try:
+            qn_config.set_default(json_backend='json')
+            assert qn_config.get_default('json_backend') == 'json'
+            assert ResponseInfo(CountingResponse(200, b'{"a": 1}')).json() == {'a': 1}
+            with pytest.raises(ValueError):
+                qn_config.set_default(json_backend='not-a-json-backend')
+        finally:
+            qn_config._config['json_backend'] = None
+            qn_config._is_customized_default['json_backend'] = False
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+
+import pytest
+
+from qiniu import etag, main as qiniu_main
+
+
+@pytest.fixture(scope='function')
+def etag_dir(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    files = {
+        'a.bin': os.urandom(5 * 1024 * 1024),
+        'b.txt': b'hello',
+        os.path.join('sub', 'c.txt'): b'world',
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_bytes(content)
+    yield tmp_path
+
+
+def run_etag(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, 'argv', ['qiniu', 'etag'] + list(args))
+    code = 0
+    try:
+        qiniu_main.main()
+    except SystemExit as e:
+        code = e.code
+    out, err = capsys.readouterr()
+    return code, out, err
+
+
+class TestEtagCLI:
+    def test_no_cache_by_default(self, monkeypatch, capsys, etag_dir, tmp_path):
+        home = tmp_path / 'home'
+        home.mkdir()
+        monkeypatch.setenv('HOME', str(home))
+        code, out, _err = run_etag(monkeypatch, capsys, str(etag_dir / 'b.txt'))
+        assert code == 0
+        assert out.strip() == etag(str(etag_dir / 'b.txt'))
+        assert list(home.iterdir()) == []
+
+    def test_no_cache_flag_removed(self, monkeypatch, capsys, etag_dir):
+        code, _out, err = run_etag(monkeypatch, capsys, str(etag_dir / 'b.txt'), '--no-cache')
+        assert code == 2
+        assert '--no-cache' in err
+
+    def test_single_file(self, monkeypatch, capsys, etag_dir):
+        file_path = str(etag_dir / 'a.bin')
+        code, out, _err = run_etag(monkeypatch, capsys, file_path)
+        assert code == 0
+        assert out.strip() == etag(file_path)
+
+    @pytest.mark.parametrize('jobs', ['1', '3'])
+    def test_dir_and_glob_ndjson(self, monkeypatch, capsys, etag_dir, jobs):
+        cache_path = str(etag_dir.parent / 'etag-cache.sqlite3')
+        args = [str(etag_dir / 'sub'), str(etag_dir / '*.txt'), str(etag_dir / 'a.bin'), '--json', '-j', jobs, '--cache', cache_path]
+
+        code, out, _err = run_etag(monkeypatch, capsys, *args)
+        results = [json.loads(line) for line in out.splitlines()]
+        assert code == 0
+        assert [r['path'] for r in results] == [
+            str(etag_dir / 'sub' / 'c.txt'),
+            str(etag_dir / 'b.txt'),
+            str(etag_dir / 'a.bin'),
+        ]
+        assert all(r['etag'] == etag(r['path']) for r in results)
+        assert not any(r['cached'] for r in results)
+
+        code, out, _err = run_etag(monkeypatch, capsys, *args)
+        assert all(json.loads(line)['cached'] for line in out.splitlines())
+
+    def test_missing_file(self, monkeypatch, capsys, etag_dir):
+        code, out, err = run_etag(monkeypatch, capsys, str(etag_dir / 'b.txt'), str(etag_dir / 'missing'))
+        assert code == 1
+        assert out.strip() == etag(str(etag_dir / 'b.txt'))
+        assert 'missing' in err
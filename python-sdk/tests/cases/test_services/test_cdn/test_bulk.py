@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from qiniu import Auth, CdnManager
+from qiniu.services.cdn.bulk import BulkRefresher, MAX_REFRESH_DIRS, MAX_REFRESH_URLS
+
+
+class FakeResp(object):
+    def __init__(self, status_code=200, error=None):
+        self.status_code = status_code
+        self.error = error
+
+
+class FakeCdnManager(CdnManager):
+    """tasks finish after `rounds` list queries, urls containing 'bad' are invalid, urls containing 'fail' fail"""
+
+    def __init__(self, url_surplus=None, rounds=1, fail_requests=0):
+        super(FakeCdnManager, self).__init__(Auth('fake-ak', 'fake-sk'))
+        self.url_surplus = url_surplus
+        self.rounds = rounds
+        self.fail_requests = fail_requests
+        self.requests = []
+        self.tasks = {}
+        self.list_calls = 0
+        self.lock = threading.Lock()
+
+    def __submit(self, kind, urls):
+        with self.lock:
+            self.requests.append((kind, list(urls)))
+            if self.fail_requests:
+                self.fail_requests -= 1
+                return None, FakeResp(500, 'server error')
+            request_id = 'request-{0}'.format(len(self.requests))
+            task_ids = {}
+            for url in urls:
+                if 'bad' not in url:
+                    task_ids[url] = 'task-' + url
+                    self.tasks[url] = (request_id, 'failure' if 'fail' in url else 'success')
+            ret = {
+                'code': 200,
+                'requestId': request_id,
+                'taskIds': task_ids,
+                'invalidUrls' if kind != 'dir' else 'invalidDirs': [url for url in urls if 'bad' in url],
+            }
+            if self.url_surplus is not None and kind == 'url':
+                self.url_surplus -= len(urls)
+                ret['urlSurplusDay'] = self.url_surplus
+        return ret, FakeResp()
+
+    def refresh_urls_and_dirs(self, urls, dirs):
+        if urls:
+            assert not dirs
+            return self.__submit('url', urls)
+        return self.__submit('dir', dirs)
+
+    def prefetch_urls(self, urls):
+        return self.__submit('prefetch', urls)
+
+    def list_refresh_tasks(self, request_id=None, urls=None, state=None, page_no=1, page_size=100):
+        with self.lock:
+            self.list_calls += 1
+            done = self.list_calls > self.rounds - 1
+            items = [
+                {'url': url, 'state': final if done else 'processing'}
+                for url, (task_request_id, final) in sorted(self.tasks.items()) if task_request_id == request_id
+            ]
+        return {'code': 200, 'items': items[(page_no - 1) * page_size:page_no * page_size], 'total': len(items)}, FakeResp()
+
+    list_prefetch_tasks = list_refresh_tasks
+
+
+def new_refresher(cdn_manager, **kwargs):
+    kwargs.setdefault('rate', None)
+    kwargs.setdefault('poll_interval', 0)
+    return BulkRefresher(cdn_manager, **kwargs)
+
+
+def test_refresh_chunks_and_results():
+    urls = ['http://a.com/{0}.png'.format(i) for i in range(250)] + ['http://a.com/bad.png', 'http://a.com/fail.png']
+    dirs = ['http://a.com/dir{0}/'.format(i) for i in range(15)]
+    cdn_manager = FakeCdnManager()
+    results = new_refresher(cdn_manager).refresh(urls=iter(urls), dirs=iter(dirs))
+
+    sizes = sorted((kind, len(chunk)) for kind, chunk in cdn_manager.requests)
+    assert sizes == [('dir', 5), ('dir', MAX_REFRESH_DIRS), ('url', 52), ('url', MAX_REFRESH_URLS), ('url', MAX_REFRESH_URLS)]
+    assert len(results) == len(urls) + len(dirs)
+    assert results['http://a.com/bad.png'] == {'state': 'invalid'}
+    assert results['http://a.com/fail.png']['state'] == 'failure'
+    assert results['http://a.com/0.png']['state'] == 'success'
+    assert results['http://a.com/0.png']['task_id'] == 'task-http://a.com/0.png'
+    assert results['http://a.com/dir3/']['state'] == 'success'
+
+
+def test_polls_until_done():
+    cdn_manager = FakeCdnManager(rounds=3)
+    results = new_refresher(cdn_manager).prefetch(['http://a.com/{0}'.format(i) for i in range(5)])
+    assert all(result['state'] == 'success' for result in results.values())
+    assert cdn_manager.list_calls == 3
+
+
+def test_no_wait():
+    cdn_manager = FakeCdnManager()
+    results = new_refresher(cdn_manager).refresh(urls=['http://a.com/1'], wait=False)
+    assert results['http://a.com/1']['state'] == 'processing'
+    assert cdn_manager.list_calls == 0
+
+
+def test_timeout_leaves_processing():
+    cdn_manager = FakeCdnManager(rounds=100)
+    results = new_refresher(cdn_manager, poll_interval=0.01, timeout=0.05).refresh(urls=['http://a.com/1'])
+    assert results['http://a.com/1']['state'] == 'processing'
+
+
+def test_quota():
+    urls = ['http://a.com/{0}'.format(i) for i in range(450)]
+    cdn_manager = FakeCdnManager(url_surplus=250)
+    refresher = new_refresher(cdn_manager, max_workers=1)
+    results = refresher.refresh(urls=urls, wait=False)
+    states = [results[url]['state'] for url in urls]
+    assert states == ['processing'] * 250 + ['quota_exceeded'] * 200
+    assert refresher.quota['url'] == 0
+    assert sum(len(chunk) for _kind, chunk in cdn_manager.requests) == 250
+
+
+def test_request_error():
+    cdn_manager = FakeCdnManager(fail_requests=1)
+    results = new_refresher(cdn_manager).refresh(urls=['http://a.com/1', 'http://a.com/2'])
+    assert results['http://a.com/1'] == {'state': 'error', 'code': 500, 'error': 'server error'}
+
+
+def test_rate_limit():
+    cdn_manager = FakeCdnManager()
+    refresher = new_refresher(cdn_manager, rate=20, max_workers=4)
+    started = time.time()
+    refresher.refresh(urls=['http://a.com/{0}'.format(i) for i in range(500)], wait=False)
+    # 5 requests, the first starts at once and the rest are spaced 50ms apart
+    assert time.time() - started >= 0.19
+
+
+@pytest.mark.parametrize('method', ['bulk_refresh', 'bulk_prefetch'])
+def test_cdn_manager_methods(method):
+    cdn_manager = FakeCdnManager()
+    results = getattr(cdn_manager, method)(['http://a.com/1'], rate=None, poll_interval=0)
+    assert results == {'http://a.com/1': {'state': 'success', 'task_id': 'task-http://a.com/1', 'request_id': 'request-1'}}
@@ -0,0 +1,173 @@
+import gzip
+import io
+import threading
+
+import pytest
+import requests
+
+from qiniu import Auth, CdnManager, LogError
+from qiniu.services.cdn.logs import HyperLogLog, LogAggregator, LogAnalyzer, iter_gzip_lines
+
+LINE = '{ip} HIT 0 [07/Mar/2017:{hour:02d}:09:32 +0800] "GET http://a.com/{path} HTTP/1.1" {status} {size} "{referer}" "UA"'
+
+
+def log_line(ip='1.1.1.1', hour=20, path='1.jpg', status=200, size=100, referer='-'):
+    return LINE.format(ip=ip, hour=hour, path=path, status=status, size=size, referer=referer)
+
+
+def gzipped(text):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(text.encode('utf-8'))
+    return buf.getvalue()
+
+
+class FakeResp(object):
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.error = None
+
+
+class FakeDownload(object):
+    def __init__(self, body, fail_after=None):
+        self.body = body
+        self.fail_after = fail_after
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), 7):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise requests.ConnectionError('connection reset')
+            yield self.body[i:i + 7]
+
+    def close(self):
+        pass
+
+
+class FakeSession(object):
+    def __init__(self, files, fail_once=()):
+        self.files = files
+        self.fail_once = set(fail_once)
+        self.gets = []
+        self.lock = threading.Lock()
+
+    def get(self, url, stream=False, timeout=None):
+        assert stream
+        with self.lock:
+            self.gets.append(url)
+            fail = url in self.fail_once
+            self.fail_once.discard(url)
+        body = self.files[url]
+        return FakeDownload(body, fail_after=len(body) // 2 if fail else None)
+
+
+class FakeCdnManager(CdnManager):
+    def __init__(self, logs, code=200):
+        super(FakeCdnManager, self).__init__(Auth('fake-ak', 'fake-sk'))
+        self.logs = logs
+        self.code = code
+
+    def get_log_list_data(self, domains, log_date):
+        if self.code != 200:
+            return {'code': self.code, 'error': 'bad request'}, FakeResp(400)
+        data = dict((domain, [
+            {'name': url, 'size': 0, 'mtime': 0, 'url': url} for url in self.logs.get(domain, [])
+        ]) for domain in domains)
+        return {'code': 200, 'data': data}, FakeResp()
+
+
+def test_aggregator_counts():
+    aggregator = LogAggregator(top_n=2)
+    for line in [
+        log_line(path='1.jpg?x=1', size=100, referer='https://b.com/page'),
+        log_line(path='1.jpg?x=2', size=100, hour=21),
+        log_line(ip='2.2.2.2', path='2.jpg', status=404, size=10),
+        log_line(ip='3.3.3.3', path='3.jpg', size=1),
+        'garbage line',
+        '',
+    ]:
+        aggregator.add_line(line)
+    result = aggregator.result()
+    assert result['requests'] == 4
+    assert result['bytes'] == 211
+    assert result['unique_ips'] == 3
+    assert result['invalid_lines'] == 1
+    assert result['statuses'] == {'200': 3, '404': 1}
+    # 2017-03-07 20:00 +0800
+    assert result['hours'] == [[1488888000, 3, 111], [1488891600, 1, 100]]
+    assert result['top_urls'][0] == {'key': 'http://a.com/1.jpg', 'requests': 2, 'bytes': 200}
+    assert len(result['top_urls']) == 2
+    assert result['top_referers'][0] == {'key': '-', 'requests': 3, 'bytes': 111}
+    assert result['top_referers'][1]['key'] == 'b.com'
+
+
+def test_aggregator_top_urls_bounded():
+    aggregator = LogAggregator(top_n=1)
+    for i in range(1000):
+        aggregator.add_line(log_line(path='hot.jpg'))
+        aggregator.add_line(log_line(path='cold-{0}.jpg'.format(i)))
+    assert len(aggregator.urls.counts) <= 20
+    assert aggregator.result()['top_urls'] == [{'key': 'http://a.com/hot.jpg', 'requests': 1000, 'bytes': 100000}]
+
+
+def test_aggregator_merge():
+    first, second, whole = LogAggregator(), LogAggregator(), LogAggregator()
+    for i in range(200):
+        line = log_line(ip='10.0.{0}.{1}'.format(i // 100, i % 50), hour=i % 24, status=200 + i % 2)
+        (first if i % 2 else second).add_line(line)
+        whole.add_line(line)
+    first.merge(second)
+    assert first.result() == whole.result()
+
+
+def test_hyperloglog_estimate():
+    hll = HyperLogLog(12)
+    for i in range(20000):
+        hll.add('192.168.{0}.{1}'.format(i // 256, i % 256))
+    assert abs(hll.count() - 20000) < 20000 * 0.05
+    restored = HyperLogLog(12, registers=bytes(hll.registers))
+    assert restored.count() == hll.count()
+    with pytest.raises(ValueError):
+        hll.merge(HyperLogLog(10))
+
+
+def test_iter_gzip_lines_streams_members():
+    body = gzipped(log_line() + '\r\n' + log_line(path='中文.jpg') + '\n') + gzipped(log_line(hour=1))
+    lines = list(iter_gzip_lines(body[i:i + 5] for i in range(0, len(body), 5)))
+    assert lines == [log_line(), log_line(path='中文.jpg'), log_line(hour=1)]
+
+
+def test_analyzer_per_domain_with_retry():
+    logs = {
+        'a.com': ['http://log/a-20', 'http://log/a-21'],
+        'b.com': ['http://log/b-20', 'http://log/b-bad'],
+    }
+    files = {
+        'http://log/a-20': gzipped('\n'.join(log_line(ip='1.1.1.{0}'.format(i)) for i in range(50))),
+        'http://log/a-21': gzipped('\n'.join(log_line(hour=21) for _ in range(30))),
+        'http://log/b-20': gzipped(log_line(status=500) + '\n'),
+        'http://log/b-bad': b'not gzip data',
+    }
+    session = FakeSession(files, fail_once=['http://log/a-21'])
+    analyzer = LogAnalyzer(FakeCdnManager(logs), max_workers=2, max_retries=1, session=session)
+    results = analyzer.analyze(['a.com', 'b.com'], '2017-03-07')
+
+    a = results['a.com']
+    assert a['files'] == 2 and a['failed'] == []
+    # the half-read first attempt must not be counted
+    assert a['aggregator'].result()['requests'] == 80
+    assert a['aggregator'].result()['unique_ips'] == 50
+    assert session.gets.count('http://log/a-21') == 2
+
+    b = results['b.com']
+    assert b['files'] == 1
+    assert [name for name, _ in b['failed']] == ['http://log/b-bad']
+    assert b['aggregator'].result()['statuses'] == {'500': 1}
+
+
+def test_analyzer_list_error():
+    analyzer = LogAnalyzer(FakeCdnManager({}, code=400), session=FakeSession({}))
+    with pytest.raises(LogError):
+        analyzer.analyze(['a.com'], '2017-03-07')
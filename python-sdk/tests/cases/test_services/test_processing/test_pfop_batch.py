@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from qiniu import Auth, PersistentFop
+from qiniu.services.processing.batch import PfopNotifyReceiver, PfopRunner
+
+
+class FakeResp(object):
+    def __init__(self, status_code=200, error=None):
+        self.status_code = status_code
+        self.error = error
+
+
+class FakePersistentFop(PersistentFop):
+    """jobs finish after `polls` status queries, keys containing 'bad' are rejected, keys containing 'fail' fail"""
+
+    def __init__(self, auth=None, bucket='bucket', pipeline=None, notify_url=None, polls=2, on_execute=None):
+        super(FakePersistentFop, self).__init__(auth or Auth('fake-ak', 'fake-sk'), bucket, pipeline, notify_url)
+        self.polls = polls
+        self.on_execute = on_execute
+        self.lock = threading.Lock()
+        self.executed = []
+        self.queries = {}
+        self.query_times = {}
+
+    def execute(self, key, fops=None, force=None, persistent_type=None, workflow_template_id=None):
+        with self.lock:
+            self.executed.append((key, fops, self.notify_url))
+        if 'bad' in key:
+            return {'error': 'no such file'}, FakeResp(612, 'no such file')
+        persistent_id = 'id-' + key
+        if self.on_execute:
+            self.on_execute(persistent_id)
+        return {'persistentId': persistent_id}, FakeResp()
+
+    def get_status(self, persistent_id):
+        with self.lock:
+            count = self.queries[persistent_id] = self.queries.get(persistent_id, 0) + 1
+            self.query_times.setdefault(persistent_id, []).append(time.time())
+        if self.polls is None or count < self.polls:
+            return {'id': persistent_id, 'code': 2}, FakeResp()
+        return {'id': persistent_id, 'code': 3 if 'fail' in persistent_id else 0, 'items': []}, FakeResp()
+
+
+def test_run_polls_until_done():
+    pfop = FakePersistentFop(polls=3)
+    runner = PfopRunner(pfop, max_workers=2, rate=None, poll_interval=0.02, max_poll_interval=0.08)
+    results = dict(runner.run(['a.mp4', ('b.mp4', ['avthumb/mp4']), 'bad.mp4', 'fail.mp4'], fops=['avthumb/m3u8']))
+
+    assert results['a.mp4']['state'] == 'success'
+    assert results['a.mp4']['persistent_id'] == 'id-a.mp4'
+    assert results['fail.mp4']['state'] == 'failed'
+    assert results['bad.mp4'] == {'state': 'error', 'code': 612, 'error': 'no such file'}
+    assert sorted(pfop.executed) == [
+        ('a.mp4', ['avthumb/m3u8'], None),
+        ('b.mp4', ['avthumb/mp4'], None),
+        ('bad.mp4', ['avthumb/m3u8'], None),
+        ('fail.mp4', ['avthumb/m3u8'], None),
+    ]
+    assert pfop.queries['id-a.mp4'] == 3
+    # the interval between status queries grows per job
+    times = pfop.query_times['id-a.mp4']
+    assert times[2] - times[1] > (times[1] - times[0]) * 0.9
+
+
+def test_run_streams_completions():
+    pfop = FakePersistentFop(polls=1)
+    runner = PfopRunner(pfop, max_workers=2, rate=None, poll_interval=0.01)
+    completed = []
+    for key, result in runner.run('{0:03d}.mp4'.format(i) for i in range(50)):
+        completed.append(key)
+        assert result['state'] == 'success'
+    assert sorted(completed) == ['{0:03d}.mp4'.format(i) for i in range(50)]
+
+
+def test_run_timeout():
+    pfop = FakePersistentFop(polls=None)
+    runner = PfopRunner(pfop, rate=None, poll_interval=0.01, max_poll_interval=0.02, timeout=0.1)
+    started = time.time()
+    results = dict(runner.run(['slow.mp4'], fops=['avthumb/mp4']))
+    assert results['slow.mp4']['state'] == 'timeout'
+    assert results['slow.mp4']['status']['code'] == 2
+    assert time.time() - started < 1
+
+
+def test_run_with_notify_receiver():
+    with PfopNotifyReceiver(host='127.0.0.1') as receiver:
+        def notify(persistent_id):
+            # notifications may arrive before the submission result is handled
+            if persistent_id == 'id-early.mp4':
+                receiver.handle_notification(json.dumps({'id': persistent_id, 'code': 0}))
+                return
+
+            def send():
+                time.sleep(0.05)
+                requests.post(receiver.url, data=json.dumps({'id': persistent_id, 'code': 0}))
+            threading.Thread(target=send).start()
+
+        pfop = FakePersistentFop(on_execute=notify)
+        runner = PfopRunner(pfop, rate=None, poll_interval=0.01, timeout=5, receiver=receiver)
+        results = dict(runner.run(['a.mp4', 'early.mp4'], fops=['avthumb/mp4']))
+
+    assert results['a.mp4']['state'] == 'success'
+    assert results['early.mp4']['state'] == 'success'
+    # no polling in notify mode
+    assert pfop.queries == {}
+    assert len(pfop.executed) == 2
+    assert all(notify_url == receiver.url for _, _, notify_url in pfop.executed)
+    assert pfop.notify_url is None
+
+
+def test_runner_built_before_receiver_starts():
+    receiver = PfopNotifyReceiver(host='127.0.0.1')
+    pfop = FakePersistentFop(on_execute=lambda persistent_id: receiver.handle_notification(
+        json.dumps({'id': persistent_id, 'code': 0})
+    ))
+    runner = PfopRunner(pfop, rate=None, timeout=5, receiver=receiver)
+    # 端口还未确定，不能提交无效的通知地址
+    with pytest.raises(ValueError):
+        list(runner.run(['a.mp4'], fops=['avthumb/mp4']))
+    assert pfop.executed == []
+
+    with receiver:
+        results = dict(runner.run(['a.mp4'], fops=['avthumb/mp4']))
+        url = receiver.url
+    assert results['a.mp4']['state'] == 'success'
+    assert pfop.executed == [('a.mp4', ['avthumb/mp4'], url)]
+    assert ':0/' not in url
+
+
+def test_runner_with_public_url_needs_no_start():
+    receiver = PfopNotifyReceiver(public_url='https://example.com/pfop')
+    pfop = FakePersistentFop(polls=1)
+    runner = PfopRunner(pfop, rate=None, timeout=0.05, receiver=receiver)
+    results = dict(runner.run(['a.mp4'], fops=['avthumb/mp4']))
+    assert results['a.mp4']['state'] == 'success'
+    assert pfop.executed == [('a.mp4', ['avthumb/mp4'], 'https://example.com/pfop')]
+
+
+def test_notify_receiver_rejects_invalid():
+    with PfopNotifyReceiver(host='127.0.0.1', path='/pfop') as receiver:
+        assert requests.post(receiver.url, data='not json').status_code == 400
+        assert requests.post(receiver.url.replace('/pfop', '/other'), data='{"id": "x"}').status_code == 404
+        assert requests.post(receiver.url, data='{"id": "x", "code": 0}').status_code == 200
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from qiniu import Auth, BucketManager, build_batch_delete
+from qiniu.services.storage.batch_executor import BatchExecutor
+
+
+class FakeResp(object):
+    def __init__(self, status_code, error=None):
+        self.status_code = status_code
+        if error is not None:
+            self.error = error
+
+    def need_retry(self):
+        return self.status_code >= 500
+
+
+class FakeBucketManager(BucketManager):
+    """op results come from `codes`, a dict of key -> list of codes returned on successive attempts"""
+
+    def __init__(self, codes=None, request_failures=0):
+        super(FakeBucketManager, self).__init__(Auth('fake-ak', 'fake-sk'))
+        self.codes = codes or {}
+        self.request_failures = request_failures
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def batch(self, operations):
+        with self.lock:
+            self.requests.append(list(operations))
+            if self.request_failures:
+                self.request_failures -= 1
+                return None, FakeResp(599, 'server error')
+            ret = []
+            for op in operations:
+                codes = self.codes.get(op)
+                code = codes.pop(0) if codes else 200
+                ret.append({'code': code} if code == 200 else {'code': code, 'data': {'error': 'error {0}'.format(code)}})
+        return ret, FakeResp(298 if any(r['code'] != 200 for r in ret) else 200)
+
+
+def delete_ops(n):
+    return build_batch_delete('bucket', ['key-{0:05d}'.format(i) for i in range(n)])
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_chunks_and_order(max_workers):
+    operations = delete_ops(2345)
+    bucket_manager = FakeBucketManager()
+    results = list(bucket_manager.batch_all(iter(operations), max_workers=max_workers))
+    assert [op for op, _result in results] == operations
+    assert all(result == {'code': 200} for _op, result in results)
+    assert sorted(len(r) for r in bucket_manager.requests) == [345, 1000, 1000]
+
+
+def test_retry_failed_ops_only():
+    operations = delete_ops(10)
+    bucket_manager = FakeBucketManager(codes={
+        operations[2]: [573, 200],
+        operations[5]: [599, 599, 200],
+        operations[7]: [612],
+    })
+    executor = BatchExecutor(bucket_manager, batch_size=4, backoff=0)
+    results = list(executor.execute(operations))
+    assert [result['code'] for _op, result in results] == [200] * 7 + [612] + [200] * 2
+    retried = [r for r in bucket_manager.requests if len(r) < 4 and r != operations[8:]]
+    assert sorted(retried) == sorted([[operations[2]], [operations[5]], [operations[5]]])
+
+
+def test_retries_exhausted():
+    operations = delete_ops(3)
+    bucket_manager = FakeBucketManager(codes={operations[1]: [573] * 10})
+    results = list(BatchExecutor(bucket_manager, max_retries=2, backoff=0).execute(operations))
+    assert results[1] == (operations[1], {'code': 573, 'data': {'error': 'error 573'}})
+    assert len(bucket_manager.requests) == 3
+
+
+def test_request_failure():
+    operations = delete_ops(3)
+    bucket_manager = FakeBucketManager(request_failures=1)
+    results = list(BatchExecutor(bucket_manager, backoff=0).execute(operations))
+    assert all(result == {'code': 200} for _op, result in results)
+
+    bucket_manager = FakeBucketManager(request_failures=10)
+    results = list(BatchExecutor(bucket_manager, max_retries=1, backoff=0).execute(operations))
+    assert all(result == {'code': 599, 'data': {'error': 'server error'}} for _op, result in results)
+    assert len(bucket_manager.requests) == 2
+
+
+def test_batch_size_limit():
+    with pytest.raises(ValueError):
+        BatchExecutor(FakeBucketManager(), batch_size=1001)
@@ -0,0 +1,197 @@
+import threading
+import time
+
+import pytest
+
+from qiniu import Auth, BucketManager, ListError
+from qiniu.compat import json
+from qiniu.services.storage.listing import ListCheckpoint, ShardedLister, marker_after_key, range_shards
+from qiniu.utils import urlsafe_base64_decode
+
+
+class FakeResp(object):
+    status_code = 599
+
+    def __str__(self):
+        return 'fake error'
+
+
+def marker_key(marker):
+    return json.loads(urlsafe_base64_decode(marker))['k']
+
+
+class FakeBucketManager(BucketManager):
+    """serves pages of `page_size` entries from `keys`, markers are encoded like the real ones"""
+
+    def __init__(self, keys, page_size=3, fail_at=None, delay=0):
+        super(FakeBucketManager, self).__init__(Auth('fake-ak', 'fake-sk'))
+        self.keys = sorted(keys)
+        self.page_size = page_size
+        self.fail_at = fail_at
+        self.delay = delay
+        self.requested_markers = []
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def list(self, bucket, prefix=None, marker=None, limit=None, delimiter=None):
+        after = marker_key(marker) if marker else None
+        with self.lock:
+            self.requested_markers.append(after)
+            self.calls.append((prefix, after, delimiter))
+        time.sleep(self.delay)
+        if after is not None and after == self.fail_at:
+            return None, False, FakeResp()
+        entries = []
+        for k in self.keys:
+            if prefix and not k.startswith(prefix):
+                continue
+            rest = k[len(prefix or ''):]
+            if delimiter and delimiter in rest:
+                entry = ('prefix', (prefix or '') + rest[:rest.index(delimiter) + 1])
+            else:
+                entry = ('item', k)
+            if entry not in entries:
+                entries.append(entry)
+        entries = [e for e in entries if after is None or e[1] > after]
+        page = entries[:limit or self.page_size]
+        more = len(entries) > len(page)
+        ret = {'items': [{'key': k} for t, k in page if t == 'item']}
+        common_prefixes = [k for t, k in page if t == 'prefix']
+        if common_prefixes:
+            ret['commonPrefixes'] = common_prefixes
+        if more:
+            ret['marker'] = marker_after_key(page[-1][1])
+        return ret, not more, None
+
+
+@pytest.mark.parametrize('prefetch_pages', [0, 1, 2])
+def test_list_all(prefetch_pages):
+    keys = ['key-{0:03d}'.format(i) for i in range(10)]
+    bucket_manager = FakeBucketManager(keys)
+    result = [item['key'] for item in bucket_manager.list_all('bucket', prefetch_pages=prefetch_pages)]
+    assert result == keys
+    assert bucket_manager.requested_markers == [None, 'key-002', 'key-005', 'key-008']
+
+
+def test_list_all_with_prefix_and_marker():
+    keys = ['a/1', 'a/2', 'b/1', 'b/2', 'b/3', 'b/4', 'c/1']
+    bucket_manager = FakeBucketManager(keys, page_size=2)
+    assert [item['key'] for item in bucket_manager.list_all('bucket', prefix='b/')] == ['b/1', 'b/2', 'b/3', 'b/4']
+    assert [item['key'] for item in bucket_manager.list_all('bucket', marker=marker_after_key('b/2'))] == ['b/3', 'b/4', 'c/1']
+
+
+def test_next_page_prefetched_while_consuming():
+    bucket_manager = FakeBucketManager(['key-{0}'.format(i) for i in range(6)], delay=0.05)
+    pages = bucket_manager.list_pages('bucket', prefetch_pages=1)
+    next(pages)
+    time.sleep(0.2)
+    # page 2 was requested while page 1 was held by the consumer
+    assert len(bucket_manager.requested_markers) >= 2
+    # and the producer does not run further ahead than the queue allows
+    assert len(bucket_manager.requested_markers) <= 3
+    assert [item['key'] for page in pages for item in page['items']] == ['key-3', 'key-4', 'key-5']
+
+
+def test_list_error():
+    bucket_manager = FakeBucketManager(['key-{0}'.format(i) for i in range(9)], fail_at='key-5')
+    result = []
+    with pytest.raises(ListError) as exc_info:
+        for item in bucket_manager.list_all('bucket'):
+            result.append(item['key'])
+    assert result == ['key-0', 'key-1', 'key-2', 'key-3', 'key-4', 'key-5']
+    assert marker_key(exc_info.value.marker) == 'key-5'
+    assert exc_info.value.resp.status_code == 599
+
+
+def test_stop_early():
+    bucket_manager = FakeBucketManager(['key-{0:03d}'.format(i) for i in range(300)], delay=0.01)
+    items = bucket_manager.list_all('bucket', prefetch_pages=2)
+    assert next(items)['key'] == 'key-000'
+    items.close()
+    time.sleep(0.2)
+    requested = len(bucket_manager.requested_markers)
+    time.sleep(0.2)
+    assert len(bucket_manager.requested_markers) == requested < 10
+
+
+class TestShardedList:
+    keys = sorted(
+        ['top-{0}'.format(i) for i in range(4)] +
+        ['a/{0:02d}'.format(i) for i in range(7)] +
+        ['a.txt', 'b/x/{0}'.format(1), 'b/y', 'c/{0:02d}'.format(0)] +
+        ['d/{0:02d}'.format(i) for i in range(11)]
+    )
+
+    def test_marker_after_key(self):
+        bucket_manager = FakeBucketManager(['k1', 'k2', 'k3'])
+        ret, _eof, _info = bucket_manager.list('bucket', marker=marker_after_key('k1'))
+        assert [item['key'] for item in ret['items']] == ['k2', 'k3']
+
+    @pytest.mark.parametrize('max_workers', [1, 2, 8])
+    def test_prefix_shards_ordered(self, max_workers):
+        bucket_manager = FakeBucketManager(self.keys)
+        lister = bucket_manager.list_sharded('bucket', max_workers=max_workers)
+        assert sorted(shard.prefix or '' for shard in lister.shards) == ['', 'a/', 'b/', 'c/', 'd/']
+        assert [item['key'] for item in lister] == self.keys
+        # each directory is listed by its own marker chain
+        assert ('d/', None, None) in bucket_manager.calls
+
+    def test_prefix_shards_unordered(self):
+        bucket_manager = FakeBucketManager(self.keys)
+        result = [item['key'] for item in bucket_manager.list_sharded('bucket', ordered=False, max_workers=3)]
+        assert sorted(result) == self.keys
+        assert len(result) == len(self.keys)
+
+    def test_prefix_shards_under_prefix(self):
+        bucket_manager = FakeBucketManager(self.keys)
+        result = [item['key'] for item in bucket_manager.list_sharded('bucket', prefix='b/')]
+        assert result == ['b/x/1', 'b/y']
+
+    @pytest.mark.parametrize('ordered', [True, False])
+    def test_range_shards(self, ordered):
+        bucket_manager = FakeBucketManager(self.keys)
+        lister = bucket_manager.list_sharded('bucket', split_points=['c/00', 'a/03', 'top'], ordered=ordered, max_workers=2)
+        assert [(shard.start_after, shard.end) for shard in lister.shards] == [
+            (None, 'a/03'), ('a/03', 'c/00'), ('c/00', 'top'), ('top', None)
+        ]
+        result = [item['key'] for item in lister]
+        assert (result if ordered else sorted(result)) == self.keys
+
+    def test_range_shards_with_prefix(self):
+        bucket_manager = FakeBucketManager(self.keys)
+        result = [item['key'] for item in bucket_manager.list_sharded('bucket', prefix='d/', split_points=['d/04'])]
+        assert result == ['d/{0:02d}'.format(i) for i in range(11)]
+
+    @pytest.mark.parametrize('ordered', [True, False])
+    def test_resume_from_checkpoint(self, tmp_path, ordered):
+        checkpoint_path = str(tmp_path / 'list-checkpoint.json')
+        bucket_manager = FakeBucketManager(self.keys, fail_at='d/05')
+        result = []
+        with pytest.raises(ListError):
+            for item in bucket_manager.list_sharded('bucket', ordered=ordered, checkpoint_path=checkpoint_path):
+                result.append(item['key'])
+
+        checkpoint = ListCheckpoint(checkpoint_path)
+        assert checkpoint.get('prefix:d/')['done'] is False
+        assert marker_key(checkpoint.get('prefix:d/')['marker']) == 'd/05'
+
+        bucket_manager.fail_at = None
+        bucket_manager.calls = []
+        resumed = [item['key'] for item in bucket_manager.list_sharded('bucket', ordered=ordered, checkpoint_path=checkpoint_path)]
+        # every key is returned at least once and nothing before the checkpoint of a shard is returned again
+        assert sorted(set(result + resumed)) == self.keys
+        assert [k for k in resumed if k.startswith('d/')] == ['d/{0:02d}'.format(i) for i in range(6, 11)]
+        for shard_name in ['prefix:a/', 'prefix:b/', 'prefix:c/']:
+            if checkpoint.get(shard_name) and checkpoint.get(shard_name)['done']:
+                assert all(prefix != shard_name[len('prefix:'):] for prefix, _after, _delimiter in bucket_manager.calls)
+
+    def test_stop_early(self):
+        bucket_manager = FakeBucketManager(['{0}/{1:03d}'.format(d, i) for d in 'abcdef' for i in range(100)], delay=0.01)
+        lister = ShardedLister(bucket_manager, 'bucket', range_shards(['b', 'c', 'd', 'e']), max_workers=3, prefetch_pages=1)
+        items = iter(lister)
+        assert next(items)['key'] == 'a/000'
+        items.close()
+        time.sleep(0.2)
+        requested = len(bucket_manager.requested_markers)
+        time.sleep(0.2)
+        assert len(bucket_manager.requested_markers) == requested < 20
@@ -0,0 +1,146 @@
+import os
+import threading
+
+import pytest
+
+from qiniu import Auth, etag
+from qiniu.utils import etag_v2
+from qiniu.http import ResponseInfo
+from qiniu.services.storage.dir_sync import DirectorySync, iter_local_files
+from qiniu.services.storage.etag_cache import EtagCache
+
+
+class FakeResp(object):
+    status_code = 200
+    url = 'http://fake-up-host'
+    text = '{}'
+    headers = {'X-Reqid': 'fake-reqid'}
+
+
+class FakeBucketManager(object):
+    def __init__(self, remote):
+        self.remote = remote
+        self.deleted = []
+
+    def list_sharded(self, bucket, prefix=None, ordered=True, max_workers=8):
+        return [
+            {'key': key, 'fsize': fsize, 'hash': file_hash}
+            for key, (fsize, file_hash) in sorted(self.remote.items())
+            if not prefix or key.startswith(prefix)
+        ]
+
+    def batch_all(self, operations):
+        for operation in operations:
+            self.deleted.append(operation)
+            yield operation, {'code': 200}
+
+
+@pytest.fixture(scope='function')
+def local_dir(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'same.txt').write_bytes(b'same content')
+    (tmp_path / 'changed.txt').write_bytes(b'new content!')
+    (tmp_path / 'sub' / 'new.bin').write_bytes(b'x' * 4096)
+    yield tmp_path
+
+
+@pytest.fixture(scope='function')
+def uploads(monkeypatch):
+    uploaded = {}
+    lock = threading.Lock()
+
+    def fake_upload(name):
+        def upload(self, key, file_path=None, **kwargs):
+            with lock:
+                uploaded[key] = (name, file_path)
+            return {'key': key, 'hash': etag(file_path)}, ResponseInfo(FakeResp())
+        return upload
+
+    monkeypatch.setattr('qiniu.services.storage.uploaders.FormUploader.upload', fake_upload('form'))
+    monkeypatch.setattr('qiniu.services.storage.uploaders.ResumeUploaderV2.upload', fake_upload('resume'))
+    yield uploaded
+
+
+def remote_of(local_dir, prefix):
+    return {
+        prefix + 'same.txt': (12, etag(str(local_dir / 'same.txt'))),
+        prefix + 'changed.txt': (12, etag(str(local_dir / 'same.txt'))),
+        prefix + 'orphan.txt': (3, 'orphan-hash'),
+    }
+
+
+def new_sync(local_dir, bucket_manager, **kwargs):
+    return DirectorySync(Auth('fake-ak', 'fake-sk'), 'bucket', str(local_dir), bucket_manager=bucket_manager, **kwargs)
+
+
+def test_iter_local_files(local_dir):
+    assert [relative_path for relative_path, _file_path in iter_local_files(str(local_dir))] == [
+        'changed.txt', 'same.txt', 'sub/new.bin'
+    ]
+
+
+def test_sync(local_dir, uploads):
+    bucket_manager = FakeBucketManager(remote_of(local_dir, 'backup/'))
+    result = new_sync(local_dir, bucket_manager, prefix='backup/', upload_threshold=1024).run()
+    assert result == {'uploaded': 2, 'uploaded_bytes': 12 + 4096, 'skipped': 1, 'deleted': 0, 'failed': []}
+    assert uploads == {
+        'backup/changed.txt': ('form', str(local_dir / 'changed.txt')),
+        'backup/sub/new.bin': ('resume', str(local_dir / 'sub' / 'new.bin')),
+    }
+    assert bucket_manager.deleted == []
+
+
+def test_sync_delete_orphans(local_dir, uploads):
+    bucket_manager = FakeBucketManager(remote_of(local_dir, ''))
+    result = new_sync(local_dir, bucket_manager, delete=True).run()
+    assert result['deleted'] == 1
+    assert len(bucket_manager.deleted) == 1
+    assert bucket_manager.deleted[0].startswith('delete/')
+
+
+def test_dry_run(local_dir, uploads):
+    bucket_manager = FakeBucketManager(remote_of(local_dir, ''))
+    result = new_sync(local_dir, bucket_manager, delete=True, dry_run=True).run()
+    assert result == {'uploaded': 2, 'uploaded_bytes': 12 + 4096, 'skipped': 1, 'deleted': 1, 'failed': []}
+    assert uploads == {}
+    assert bucket_manager.deleted == []
+
+
+def test_etag_cache(local_dir, tmp_path_factory, uploads, monkeypatch):
+    cache_path = str(tmp_path_factory.mktemp('cache') / 'etag_cache.sqlite3')
+    bucket_manager = FakeBucketManager(remote_of(local_dir, ''))
+    with EtagCache(cache_path) as cache:
+        new_sync(local_dir, bucket_manager, etag_cache=cache).run()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('unchanged files should not be hashed again')
+
+    monkeypatch.setattr('qiniu.services.storage.dir_sync.etag_v2', fail)
+    with EtagCache(cache_path) as cache:
+        result = new_sync(local_dir, bucket_manager, etag_cache=cache).run()
+    assert result['skipped'] == 1
+    assert result['failed'] == []
+
+
+@pytest.mark.parametrize('remote_part_size, uploaded', [
+    # 表单上传或 4MB 分片上传，hash 按 4MB 块计算
+    (None, False),
+    (4 * 1024 * 1024, False),
+    # 与本次分片大小相同的 v2 分片上传
+    (2 * 1024 * 1024, False),
+    # 无法得知的其他分片大小，只能重新上传
+    (1024 * 1024, True),
+])
+def test_compare_by_remote_hash_type(tmp_path, uploads, remote_part_size, uploaded):
+    file_path = tmp_path / 'big.bin'
+    file_path.write_bytes(os.urandom(9 * 1024 * 1024))
+    if remote_part_size is None:
+        remote_hash = etag(str(file_path))
+    else:
+        remote_hash = etag_v2(str(file_path), part_size=remote_part_size)
+    bucket_manager = FakeBucketManager({'big.bin': (9 * 1024 * 1024, remote_hash)})
+
+    result = new_sync(tmp_path, bucket_manager, part_size=2 * 1024 * 1024).run()
+    assert result['failed'] == []
+    assert result['uploaded'] == int(uploaded)
+    assert result['skipped'] == int(not uploaded)
@@ -0,0 +1,42 @@
+import os
+
+from qiniu.services.storage.etag_cache import EtagCache
+
+
+class TestEtagCache:
+    def test_get_and_set(self, tmp_path):
+        file_path = str(tmp_path / 'file')
+        with open(file_path, 'wb') as f:
+            f.write(b'hello')
+        with EtagCache(str(tmp_path / 'cache' / 'etag.sqlite3'), commit_every=1) as cache:
+            assert cache.get(file_path) is None
+            cache.set(file_path, 'fake-etag')
+            assert cache.get(file_path) == 'fake-etag'
+            assert cache.get(file_path, part_size=8 * 1024 * 1024) is None
+            # 4MB parts give the same etag as v1
+            assert cache.get(file_path, part_size=4 * 1024 * 1024) == 'fake-etag'
+
+    def test_persistent(self, tmp_path):
+        file_path = str(tmp_path / 'file')
+        cache_path = str(tmp_path / 'etag.sqlite3')
+        with open(file_path, 'wb') as f:
+            f.write(b'hello')
+        with EtagCache(cache_path) as cache:
+            cache.set(file_path, 'fake-etag')
+        with EtagCache(cache_path) as cache:
+            assert cache.get(file_path) == 'fake-etag'
+
+    def test_changed_file_missed(self, tmp_path):
+        file_path = str(tmp_path / 'file')
+        with open(file_path, 'wb') as f:
+            f.write(b'hello')
+        with EtagCache(str(tmp_path / 'etag.sqlite3')) as cache:
+            cache.set(file_path, 'fake-etag')
+            st = os.stat(file_path)
+            os.utime(file_path, (st.st_atime, st.st_mtime + 10))
+            assert cache.get(file_path) is None
+
+            cache.set(file_path, 'fake-etag-2')
+            with open(file_path, 'ab') as f:
+                f.write(b'!')
+            assert cache.get(file_path) is None
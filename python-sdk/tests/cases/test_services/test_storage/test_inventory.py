@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from qiniu import Auth, BucketManager, ListError
+from qiniu.services.storage.inventory import Inventory
+
+
+class FakeBucketManager(BucketManager):
+    def __init__(self, objects, page_size=2):
+        super(FakeBucketManager, self).__init__(Auth('fake-ak', 'fake-sk'))
+        self.objects = objects
+        self.page_size = page_size
+        self.fail = False
+        self.prefixes = []
+        self.lock = threading.Lock()
+
+    def list(self, bucket, prefix=None, marker=None, limit=None, delimiter=None):
+        with self.lock:
+            self.prefixes.append(prefix)
+        if self.fail:
+            return None, False, 'fake error'
+        keys = sorted(k for k in self.objects if (not prefix or k.startswith(prefix)) and (marker is None or k > marker))
+        page = keys[:self.page_size]
+        ret = {'items': [dict(self.objects[k], key=k) for k in page]}
+        more = len(keys) > len(page)
+        if more:
+            ret['marker'] = page[-1]
+        return ret, not more, None
+
+
+def obj(fsize, put_time, mime_type='image/png', file_type=0, file_hash=None):
+    return {
+        'fsize': fsize,
+        'putTime': put_time * 10000000,
+        'mimeType': mime_type,
+        'type': file_type,
+        'hash': file_hash or 'hash-{0}-{1}'.format(fsize, put_time)
+    }
+
+
+@pytest.fixture(scope='function')
+def objects():
+    return {
+        'a/1.png': obj(100, 1000),
+        'a/2.png': obj(200, 2000),
+        'a/sub/3.txt': obj(300, 3000, mime_type='text/plain'),
+        'b/1.png': obj(400, 4000, file_type=1),
+        'top.txt': obj(5, 5000, mime_type='text/plain'),
+    }
+
+
+@pytest.fixture(scope='function')
+def inventory(tmp_path):
+    with Inventory(str(tmp_path / 'inventory.sqlite3')) as inventory:
+        yield inventory
+
+
+def test_sync_and_queries(inventory, objects):
+    bucket_manager = FakeBucketManager(objects)
+    assert inventory.synced_at('bucket') is None
+    assert inventory.sync(bucket_manager, 'bucket') == {'listed': 5, 'added': 5, 'updated': 0, 'deleted': 0}
+    assert inventory.synced_at('bucket', 'a/') is not None
+
+    assert inventory.summary('bucket') == {
+        'count': 5, 'size': 1005, 'types': {0: {'count': 4, 'size': 605}, 1: {'count': 1, 'size': 400}}
+    }
+    assert inventory.summary('bucket', 'a/')['size'] == 600
+    assert inventory.summary('other-bucket')['count'] == 0
+    assert inventory.children('bucket') == [
+        {'prefix': '', 'count': 1, 'size': 5},
+        {'prefix': 'a/', 'count': 3, 'size': 600},
+        {'prefix': 'b/', 'count': 1, 'size': 400},
+    ]
+    assert inventory.children('bucket', 'a/') == [
+        {'prefix': 'a/', 'count': 2, 'size': 300},
+        {'prefix': 'a/sub/', 'count': 1, 'size': 300},
+    ]
+
+    assert [item['key'] for item in inventory.find('bucket', min_size=200, max_size=400)] == ['a/2.png', 'a/sub/3.txt', 'b/1.png']
+    assert [item['key'] for item in inventory.find('bucket', put_after=2000, put_before=5000)] == ['a/sub/3.txt', 'b/1.png']
+    assert [item['key'] for item in inventory.find('bucket', 'a/', mime_type='image/png', limit=1)] == ['a/1.png']
+    assert inventory.find('bucket', file_type=1) == [dict(objects['b/1.png'], key='b/1.png')]
+
+
+def test_incremental_sync(inventory, objects):
+    bucket_manager = FakeBucketManager(objects)
+    inventory.sync(bucket_manager, 'bucket')
+
+    objects['a/2.png'] = obj(250, 6000)
+    objects['a/3.png'] = obj(10, 6000)
+    del objects['a/1.png']
+    del objects['b/1.png']
+    bucket_manager.prefixes = []
+    assert inventory.sync(bucket_manager, 'bucket', prefix='a/') == {'listed': 3, 'added': 1, 'updated': 1, 'deleted': 1}
+    assert set(bucket_manager.prefixes) == {'a/'}
+    # b/ was not re-listed, its record is kept until b/ is synced
+    assert [item['key'] for item in inventory.find('bucket')] == ['a/2.png', 'a/3.png', 'a/sub/3.txt', 'b/1.png', 'top.txt']
+    assert inventory.find('bucket', 'a/2.png')[0]['fsize'] == 250
+
+    assert inventory.sync(bucket_manager, 'bucket', prefix='a/') == {'listed': 3, 'added': 0, 'updated': 0, 'deleted': 0}
+    assert inventory.sync(bucket_manager, 'bucket', prefix='b/') == {'listed': 0, 'added': 0, 'updated': 0, 'deleted': 1}
+
+
+def test_sync_from_items(inventory, objects):
+    items = [dict(value, key=key) for key, value in sorted(objects.items())]
+    assert inventory.sync(None, 'bucket', items=iter(items))['added'] == 5
+
+
+def test_failed_sync_keeps_inventory(inventory, objects):
+    bucket_manager = FakeBucketManager(objects)
+    inventory.sync(bucket_manager, 'bucket')
+    bucket_manager.fail = True
+    with pytest.raises(ListError):
+        inventory.sync(bucket_manager, 'bucket')
+    assert inventory.summary('bucket')['count'] == 5
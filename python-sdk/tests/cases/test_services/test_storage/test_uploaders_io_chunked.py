@@ -0,0 +1,102 @@
+import gzip
+import io
+import os
+import threading
+from concurrent import futures
+
+import pytest
+
+from qiniu.services.storage.uploaders.io_chunked import ChunkInfo, IOChunked, get_positional_fd
+from qiniu.services.storage.uploaders.part_buffer import read_chunk_into
+
+requires_pread = pytest.mark.skipif(not hasattr(os, 'pread'), reason='os.pread is not available')
+
+
+class ForbiddenLock(object):
+    """fails the test if the reader takes the lock"""
+
+    def __enter__(self):
+        raise AssertionError('lock should not be used')
+
+    def __exit__(self, *args):
+        pass
+
+
+class CountingLock(object):
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        self.count += 1
+
+    def __exit__(self, *args):
+        self._lock.release()
+
+
+@pytest.fixture(scope='function')
+def chunked_file(tmp_path):
+    content = os.urandom(64 * 1024 + 123)
+    file_path = tmp_path / 'chunked-file'
+    file_path.write_bytes(content)
+    yield str(file_path), content
+
+
+def _read_all(chunked):
+    return b''.join(iter(lambda: chunked.read(1), b''))
+
+
+class TestPositionalRead:
+    @requires_pread
+    def test_positional_fd(self, chunked_file):
+        file_path, _content = chunked_file
+        with open(file_path, 'rb') as f:
+            assert get_positional_fd(f) == f.fileno()
+        with open(file_path, 'rb', buffering=0) as f:
+            assert get_positional_fd(f) == f.fileno()
+        with gzip.GzipFile(fileobj=io.BytesIO(), mode='wb') as f:
+            assert get_positional_fd(f) is None
+        assert get_positional_fd(io.BytesIO(b'data')) is None
+
+    @requires_pread
+    def test_io_chunked_reads_file_without_lock(self, chunked_file):
+        file_path, content = chunked_file
+        with open(file_path, 'rb') as f:
+            chunked = IOChunked(f, chunk_offset=1000, chunk_size=5000, lock=ForbiddenLock(), buffer_size=1024)
+            assert _read_all(chunked) == content[1000:6000]
+            chunked.seek(0)
+            assert _read_all(chunked) == content[1000:6000]
+
+    def test_io_chunked_stream_uses_lock(self):
+        content = os.urandom(4096)
+        lock = CountingLock()
+        chunked = IOChunked(io.BytesIO(content), chunk_offset=100, chunk_size=1000, lock=lock, buffer_size=300)
+        assert _read_all(chunked) == content[100:1100]
+        assert lock.count == 4
+
+    @requires_pread
+    def test_read_chunk_into_file_without_lock(self, chunked_file):
+        file_path, content = chunked_file
+        chunk = ChunkInfo(chunk_no=3, chunk_offset=len(content) - 500, chunk_size=500)
+        view = memoryview(bytearray(500))
+        with open(file_path, 'rb') as f:
+            assert read_chunk_into(f, chunk, ForbiddenLock(), view) == 500
+        assert view.tobytes() == content[-500:]
+
+    def test_concurrent_chunks(self, chunked_file):
+        file_path, content = chunked_file
+        chunk_size = 4096
+        chunks = [
+            ChunkInfo(chunk_no=i + 1, chunk_offset=offset, chunk_size=min(chunk_size, len(content) - offset))
+            for i, offset in enumerate(range(0, len(content), chunk_size))
+        ]
+        lock = threading.Lock()
+        with open(file_path, 'rb') as f:
+            def read_chunk(chunk):
+                chunked = IOChunked(f, chunk.chunk_offset, chunk.chunk_size, lock, buffer_size=1000)
+                return _read_all(chunked)
+
+            with futures.ThreadPoolExecutor(max_workers=8) as executor:
+                parts = list(executor.map(read_chunk, chunks))
+        assert b''.join(parts) == content
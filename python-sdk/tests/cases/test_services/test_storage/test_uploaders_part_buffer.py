@@ -0,0 +1,156 @@
+import hashlib
+import io
+import threading
+import time
+from concurrent import futures
+
+import pytest
+
+from qiniu import Auth
+from qiniu.http import ResponseInfo
+from qiniu.services.storage.uploaders import resume_uploader_v2
+from qiniu.services.storage.uploaders.io_chunked import ChunkInfo
+from qiniu.services.storage.uploaders.part_buffer import PartBufferPool, PartReader, read_chunk_into
+from qiniu.services.storage.uploaders.resume_uploader_v2 import ResumeUploaderV2, _ResumeUploadV2Context
+
+
+class CountingIO(io.BytesIO):
+    def __init__(self, *args, **kwargs):
+        super(CountingIO, self).__init__(*args, **kwargs)
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        data = super(CountingIO, self).read(size)
+        self.read_bytes += len(data)
+        return data
+
+    def readinto(self, b):
+        n = super(CountingIO, self).readinto(b)
+        self.read_bytes += n
+        return n
+
+
+class FakeResp(object):
+    status_code = 200
+
+    def ok(self):
+        return True
+
+    def need_retry(self):
+        return False
+
+
+class TestPartBufferPool:
+    def test_buffers_are_reused(self):
+        pool = PartBufferPool(part_size=16, max_buffers=2)
+        with pool.buffer(16) as view:
+            first = view.obj
+        with pool.buffer(8) as view:
+            assert view.obj is first
+            assert len(view) == 8
+
+    def test_size_over_part_size(self):
+        pool = PartBufferPool(part_size=16, max_buffers=1)
+        with pytest.raises(ValueError):
+            with pool.buffer(17):
+                pass
+
+    def test_concurrent_buffers_capped(self):
+        pool = PartBufferPool(part_size=16, max_buffers=2)
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def use_buffer(_):
+            with pool.buffer(16):
+                with lock:
+                    state['current'] += 1
+                    state['peak'] = max(state['peak'], state['current'])
+                time.sleep(0.01)
+                with lock:
+                    state['current'] -= 1
+
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(use_buffer, range(32)))
+        assert state['peak'] == 2
+
+
+class TestReadChunkInto:
+    @pytest.mark.parametrize('use_readinto', [True, False])
+    def test_read_chunk(self, use_readinto):
+        content = bytes(bytearray(range(256))) * 4
+        base_io = CountingIO(content)
+        if not use_readinto:
+            base_io.readinto = None
+        view = memoryview(bytearray(100))
+        read_size = read_chunk_into(base_io, ChunkInfo(chunk_no=2, chunk_offset=100, chunk_size=100), threading.Lock(), view)
+        assert read_size == 100
+        assert view.tobytes() == content[100:200]
+
+    def test_read_chunk_at_eof(self):
+        view = memoryview(bytearray(10))
+        read_size = read_chunk_into(io.BytesIO(b'abcdef'), ChunkInfo(chunk_no=1, chunk_offset=2, chunk_size=10), threading.Lock(), view)
+        assert read_size == 4
+        assert view[:read_size].tobytes() == b'cdef'
+
+
+class TestPartReader:
+    def test_read_and_seek(self):
+        reader = PartReader(memoryview(b'0123456789'))
+        assert len(reader) == 10
+        assert bytes(reader.read(4)) == b'0123'
+        assert reader.tell() == 4
+        assert bytes(reader.read()) == b'456789'
+        assert not reader.read(1)
+        reader.seek(0)
+        assert bytes(reader.read(100)) == b'0123456789'
+        reader.seek(-3, io.SEEK_END)
+        assert bytes(reader.read()) == b'789'
+
+
+class TestResumeUploaderV2Parts:
+    @pytest.mark.parametrize('concurrent', [True, False])
+    def test_upload_parts_reads_once(self, monkeypatch, concurrent):
+        part_size = 1024
+        content = bytes(bytearray(i % 251 for i in range(part_size * 5 + 100)))
+        data = CountingIO(content)
+        sent = {}
+        sent_lock = threading.Lock()
+
+        def fake_put(url, data, files, headers):
+            body = b''.join(bytes(block) for block in iter(lambda: data.read(300), b''))
+            part_no = int(url.rsplit('/', 1)[-1])
+            with sent_lock:
+                sent[part_no] = body
+            assert headers['Content-MD5'] == hashlib.md5(body).hexdigest()
+            return {'etag': 'etag-{0}'.format(part_no)}, FakeResp()
+
+        monkeypatch.setattr(resume_uploader_v2.qn_http_client, 'put', fake_put)
+        auth = Auth('fake-ak', 'fake-sk')
+        uploader = ResumeUploaderV2(
+            'fake-bucket',
+            auth=auth,
+            max_concurrent_workers=4,
+            part_buffer_memory=2 * part_size,
+            **({} if concurrent else {'concurrent_executor': None})
+        )
+        context = _ResumeUploadV2Context(
+            up_hosts=['http://fake-up-host'],
+            upload_id='fake-upload-id',
+            expired_at=int(time.time()) + 3600,
+            part_size=part_size,
+            parts=[],
+            modify_time=0,
+            resumed=False
+        )
+        _part, resp = uploader.upload_parts(
+            up_token=auth.upload_token('fake-bucket'),
+            data=data,
+            data_size=len(content),
+            context=context,
+            key='fake-key'
+        )
+
+        assert not isinstance(resp, ResponseInfo) or resp.ok()
+        assert sorted(p.part_no for p in context.parts) == [1, 2, 3, 4, 5, 6]
+        assert b''.join(sent[i] for i in sorted(sent)) == content
+        assert data.read_bytes == len(content)
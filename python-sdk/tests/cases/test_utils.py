@@ -1,5 +1,9 @@
+import io
+import os
 from datetime import datetime, timedelta, tzinfo
 
+import pytest
+
 from qiniu import utils, compat
 
 
@@ -143,3 +147,45 @@ class TestUtils:
         base_dt = datetime(year=2011, month=8, day=3)
         now_dt = datetime.now()
         assert int((now_dt - base_dt).total_seconds()) == utils.dt2ts(now_dt) - utils.dt2ts(base_dt)
+
+
+@pytest.fixture(scope='module', params=[0, 5, 4 * 1024 * 1024, 4 * 1024 * 1024 + 1, 10 * 1024 * 1024 + 7])
+def etag_file(request, tmp_path_factory):
+    file_path = tmp_path_factory.mktemp('etag') / 'etag-{0}'.format(request.param)
+    file_path.write_bytes(os.urandom(request.param))
+    yield str(file_path)
+
+
+class TestEtag:
+    def test_empty_etag(self, tmp_path):
+        file_path = tmp_path / 'empty'
+        file_path.write_bytes(b'')
+        assert utils.etag(str(file_path)) == 'Fto5o-5ea0sNMlW_75VgGJCv2AcJ'
+        assert utils.etag_parallel(str(file_path)) == 'Fto5o-5ea0sNMlW_75VgGJCv2AcJ'
+
+    @pytest.mark.parametrize('max_workers', [1, 4])
+    def test_etag_parallel(self, etag_file, max_workers):
+        expect = utils.etag(etag_file)
+        assert utils.etag_parallel(etag_file, max_workers=max_workers) == expect
+        with open(etag_file, 'rb') as f:
+            assert utils.etag_stream_parallel(f, max_workers=max_workers) == expect
+            assert f.tell() == 0
+
+    def test_etag_v2_same_as_v1(self, etag_file):
+        expect = utils.etag(etag_file)
+        assert utils.etag_v2(etag_file, part_size=4 * 1024 * 1024) == expect
+        assert utils.etag_v2(etag_file, part_size=16 * 1024 * 1024) == expect
+
+    def test_etag_v2_parts(self, tmp_path):
+        part_size = 3 * 1024 * 1024
+        content = os.urandom(2 * part_size + 100)
+        file_path = tmp_path / 'etag-v2'
+        file_path.write_bytes(content)
+
+        part_etags = [
+            utils.urlsafe_base64_decode(utils.etag_stream(io.BytesIO(content[offset:offset + part_size])))[1:]
+            for offset in range(0, len(content), part_size)
+        ]
+        expect = utils.urlsafe_base64_encode(b'\x9e' + utils._sha1(b''.join(part_etags)))
+        assert utils.etag_v2(str(file_path), part_size=part_size, max_workers=3) == expect
+        assert utils.etag_v2(str(file_path), part_size=part_size) != utils.etag(str(file_path))
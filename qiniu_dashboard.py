@@ -1,9 +1,21 @@
+import os
+import gzip
 import time
 import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
 from flask import Flask, render_template_string, request, jsonify
 
-from config import QINIU_CONFIG
-from api_manager import QiniuAPIManager
+from config import QINIU_CONFIG, DASHBOARD_CONFIG, PREWARM_CONFIG
+from api_manager import get_shared_api_manager, InventoryUnavailable
+from cdn_aggregate import aggregate_cdn
+from stats_store import parse_local_time
+from downsample import summarize, downsample, METHODS as DOWNSAMPLE_METHODS
+from prewarm import PrewarmScheduler, hot_views
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只使用 gzip
+    brotli = None
 
 
 def format_bytes(bytes_size):
@@ -30,6 +42,12 @@ REGION = QINIU_CONFIG['region']
 
 app = Flask(__name__)
 
+# 查询上游接口的共享线程池，限制同时发出的请求数
+query_executor = ThreadPoolExecutor(
+    max_workers=DASHBOARD_CONFIG['max_workers'],
+    thread_name_prefix='qiniu-stats'
+)
+
 # HTML模板 - 简化图表版
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
@@ -813,6 +831,11 @@ HTML_TEMPLATE = '''
             document.getElementById('refresh-select').addEventListener('change', applyRefreshInterval);
         });
 
+        // 每个图表的最大点数：约每像素一个点，超出时服务端降采样并保留峰值
+        function chartMaxPoints() {
+            return Math.min(2000, Math.max(300, Math.round(window.innerWidth)));
+        }
+
         async function loadData() {
             const beginDate = document.getElementById('begin_date').value;
             const endDate = document.getElementById('end_date').value;
@@ -851,12 +874,17 @@ HTML_TEMPLATE = '''
                 const response = await fetch('/api/get_stats', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ begin, end, granularity, bucket_name: bucketName, region: region })  // 添加bucket_name和region参数
+                    // 添加bucket_name和region参数，使用列式数据格式，按图表宽度在服务端降采样
+                    body: JSON.stringify({ begin, end, granularity, bucket_name: bucketName, region: region, format: 'columnar', max_points: chartMaxPoints() })
                 });
                 const result = await response.json();
 
                 if (result.success) {
-                    displayData(result.data);
+                    // 部分指标查询失败或超时时，其余指标照常显示
+                    if (result.errors && Object.keys(result.errors).length > 0) {
+                        console.warn('部分指标查询失败:', result.errors, result.timings);
+                    }
+                    displayData(columnarToSeries(result.data), result.summary);
                 } else {
                     alert('加载数据失败: ' + result.message);
                 }
@@ -867,7 +895,20 @@ HTML_TEMPLATE = '''
             }
         }
 
-        function displayData(data) {
+        // 将列式数据转换为各指标的 { labels, values }，共用同一时间轴的指标只生成一次标签
+        function columnarToSeries(columnar) {
+            // 标签由服务端按上游返回的时间生成，不受浏览器时区影响
+            const axisLabels = columnar.labels;
+            const series = {};
+            Object.keys(columnar.series).forEach(name => {
+                const column = columnar.series[name];
+                series[name] = { labels: axisLabels[column.axis], values: column.values };
+            });
+            return series;
+        }
+
+        // 统计卡片使用服务端在降采样前计算的 summary（合计/峰值/最新值），图表使用降采样后的数据
+        function displayData(data, summary) {
             // 显示统计卡片
             const statsGridElement = document.getElementById('statsGrid');
             const chartsGridElement = document.getElementById('chartsGrid');
@@ -880,39 +921,39 @@ HTML_TEMPLATE = '''
             }
 
             // 更新统计数据
-            if (data.storage.length > 0) {
-                const latest = data.storage[data.storage.length - 1];
+            if (summary.storage.points > 0) {
+                const latest = summary.storage.latest;
                 const storageElement = document.getElementById('stat-storage');
                 if (storageElement) {
-                    storageElement.textContent = formatBytesAuto(latest.value);
+                    storageElement.textContent = formatBytesAuto(latest);
                 }
             }
 
-            if (data.files.length > 0) {
-                const latest = data.files[data.files.length - 1];
+            if (summary.files.points > 0) {
+                const latest = summary.files.latest;
                 const filesElement = document.getElementById('stat-files');
                 if (filesElement) {
-                    filesElement.textContent = latest.value.toLocaleString();
+                    filesElement.textContent = latest.toLocaleString();
                 }
             }
 
-            if (data.flowOut.length > 0) {
-                const total = data.flowOut.reduce((sum, item) => sum + item.value, 0);
+            if (summary.flowOut.points > 0) {
+                const total = summary.flowOut.total;
                 const flowOutElement = document.getElementById('stat-flow-out');
                 if (flowOutElement) {
                     flowOutElement.textContent = formatBytes(total);
                 }
             }
 
-            if (data.putRequests.length > 0) {
-                const total = data.putRequests.reduce((sum, item) => sum + item.value, 0);
+            if (summary.putRequests.points > 0) {
+                const total = summary.putRequests.total;
                 document.getElementById('stat-put').textContent = total.toLocaleString();
             }
 
             // CDN计费流量：与 test-cdn.py 同源（/v2/tune/flux），value 为字节，合计后以 GB 显示
             const cdnTrafficElement = document.getElementById('stat-cdn-traffic');
-            if (cdnTrafficElement && data.cdnTraffic && data.cdnTraffic.length > 0) {
-                const totalBytes = data.cdnTraffic.reduce((sum, item) => sum + item.value, 0);
+            if (cdnTrafficElement && summary.cdnTraffic && summary.cdnTraffic.points > 0) {
+                const totalBytes = summary.cdnTraffic.total;
                 const totalGb = totalBytes / (1024 * 1024 * 1024);
                 cdnTrafficElement.textContent = totalGb.toFixed(4) + ' GB';
             } else if (cdnTrafficElement) {
@@ -921,23 +962,23 @@ HTML_TEMPLATE = '''
 
             // CDN带宽峰值：与 test-cdn.py 同源（/v2/tune/bandwidth），API 返回 bps，取所选时间范围内峰值并显示为 Mbps/Gbps
             const cdnBandwidthElement = document.getElementById('stat-cdn-bandwidth');
-            if (cdnBandwidthElement && data.cdnBandwidth && data.cdnBandwidth.length > 0) {
-                const peakBps = Math.max(...data.cdnBandwidth.map(item => item.value));
+            if (cdnBandwidthElement && summary.cdnBandwidth && summary.cdnBandwidth.points > 0) {
+                const peakBps = summary.cdnBandwidth.peak;
                 cdnBandwidthElement.textContent = formatBandwidth(peakBps);
             } else if (cdnBandwidthElement) {
                 cdnBandwidthElement.textContent = '暂无数据';
             }
 
-            if (data.cdnFlow.length > 0) {
-                const total = data.cdnFlow.reduce((sum, item) => sum + item.value, 0);
+            if (summary.cdnFlow.points > 0) {
+                const total = summary.cdnFlow.total;
                 const cdnElement = document.getElementById('stat-cdn');
                 if (cdnElement) {
                     cdnElement.textContent = formatBytes(total);
                 }
             }
 
-            if (data.getRequests.length > 0) {
-                const total = data.getRequests.reduce((sum, item) => sum + item.value, 0);
+            if (summary.getRequests.points > 0) {
+                const total = summary.getRequests.total;
                 const getElement = document.getElementById('stat-get');
                 if (getElement) {
                     getElement.textContent = total.toLocaleString();
@@ -945,8 +986,8 @@ HTML_TEMPLATE = '''
             }
 
             // 绘制图表
-            drawChart8(data.cdnTraffic || []);   // CDN计费流量（test-cdn.py 同源，单位 GB）
-            drawChart7(data.cdnBandwidth || []);  // CDN带宽峰值
+            drawChart8(data.cdnTraffic);        // CDN计费流量（test-cdn.py 同源，单位 GB）
+            drawChart7(data.cdnBandwidth);      // CDN带宽峰值
             drawChart4(data.cdnFlow);           // CDN回源流量
             drawChart5(data.getRequests);       // GET请求次数
             drawChart6(data.putRequests);       // PUT请求次数
@@ -961,7 +1002,7 @@ HTML_TEMPLATE = '''
                 tooltip: { trigger: 'axis' },
                 xAxis: {
                     type: 'category',
-                    data: data.map(item => item.time)
+                    data: data.labels
                 },
                 yAxis: {
                     type: 'value',
@@ -970,7 +1011,7 @@ HTML_TEMPLATE = '''
                 series: [{
                     type: 'line',
                     smooth: true,
-                    data: data.map(item => item.value),
+                    data: data.values,
                     areaStyle: { opacity: 0.3 },
                     lineStyle: { color: '#667eea', width: 3 },
                     itemStyle: { color: '#667eea' }
@@ -985,12 +1026,12 @@ HTML_TEMPLATE = '''
                 tooltip: { trigger: 'axis' },
                 xAxis: {
                     type: 'category',
-                    data: data.map(item => item.time)
+                    data: data.labels
                 },
                 yAxis: { type: 'value' },
                 series: [{
                     type: 'bar',
-                    data: data.map(item => item.value),
+                    data: data.values,
                     itemStyle: { color: '#764ba2' }
                 }],
                 grid: { left: '10%', right: '5%', bottom: '10%', top: '5%' }
@@ -1003,7 +1044,7 @@ HTML_TEMPLATE = '''
                 tooltip: { trigger: 'axis' },
                 xAxis: {
                     type: 'category',
-                    data: data.map(item => item.time)
+                    data: data.labels
                 },
                 yAxis: {
                     type: 'value',
@@ -1012,7 +1053,7 @@ HTML_TEMPLATE = '''
                 series: [{
                     type: 'line',
                     smooth: true,
-                    data: data.map(item => item.value),
+                    data: data.values,
                     areaStyle: { opacity: 0.3 },
                     lineStyle: { color: '#4facfe', width: 3 },
                     itemStyle: { color: '#4facfe' }
@@ -1032,20 +1073,20 @@ HTML_TEMPLATE = '''
         function drawChart8(data) {
             // CDN计费流量：与 test-cdn.py 同源（/v2/tune/flux），后端 value 为字节，图表统一用 GB
             const chart = echarts.init(document.getElementById('chart8'));
-            const gbData = (data || []).map(item => bytesToGb(item.value));
+            const gbData = data.values.map(bytesToGb);
             chart.setOption({
                 tooltip: {
                     trigger: 'axis',
                     formatter: function(params) {
                         const idx = params[0].dataIndex;
-                        const raw = (data && data[idx]) ? data[idx].value : 0;
+                        const raw = data.values[idx] || 0;
                         return params[0].name + '<br/>CDN计费流量: <strong>' + formatGb(raw) + '</strong>';
                     }
                 },
                 grid: { left: '10%', right: '5%', bottom: '10%', top: '10%', containLabel: true },
                 xAxis: {
                     type: 'category',
-                    data: (data || []).map(item => item.time),
+                    data: data.labels,
                     axisLabel: { rotate: 45, fontSize: 12 },
                     axisLine: { lineStyle: { color: '#999' } }
                 },
@@ -1079,7 +1120,7 @@ HTML_TEMPLATE = '''
                 tooltip: { trigger: 'axis' },
                 xAxis: {
                     type: 'category',
-                    data: data.map(item => item.time)
+                    data: data.labels
                 },
                 yAxis: {
                     type: 'value',
@@ -1088,7 +1129,7 @@ HTML_TEMPLATE = '''
                 series: [{
                     type: 'line',
                     smooth: true,
-                    data: data.map(item => item.value),
+                    data: data.values,
                     areaStyle: { opacity: 0.3 },
                     lineStyle: { color: '#f093fb', width: 3 },
                     itemStyle: { color: '#f093fb' }
@@ -1119,7 +1160,7 @@ HTML_TEMPLATE = '''
                 },
                 xAxis: {
                     type: 'category',
-                    data: data.map(item => item.time),
+                    data: data.labels,
                     axisLabel: {
                         rotate: 45,
                         fontSize: 12
@@ -1162,7 +1203,7 @@ HTML_TEMPLATE = '''
                 series: [{
                     name: 'GET 请求',
                     type: 'bar',
-                    data: data.map(item => item.value),
+                    data: data.values,
                     itemStyle: {
                         color: {
                             type: 'linear',
@@ -1230,7 +1271,7 @@ HTML_TEMPLATE = '''
                 },
                 xAxis: {
                     type: 'category',
-                    data: data.map(item => item.time),
+                    data: data.labels,
                     axisLabel: {
                         rotate: 45,
                         fontSize: 12
@@ -1273,7 +1314,7 @@ HTML_TEMPLATE = '''
                 series: [{
                     name: 'PUT 请求',
                     type: 'bar',
-                    data: data.map(item => item.value),
+                    data: data.values,
                     itemStyle: {
                         color: {
                             type: 'linear',
@@ -1322,7 +1363,7 @@ HTML_TEMPLATE = '''
         function drawChart7(data) {
             // 总带宽峰值趋势：API 返回 bps，按日显示带宽，单位 Mbps/Gbps
             const chart = echarts.init(document.getElementById('chart7'));
-            const bpsData = (data || []).map(item => item.value);
+            const bpsData = data.values;
             chart.setOption({
                 tooltip: {
                     trigger: 'axis',
@@ -1341,7 +1382,7 @@ HTML_TEMPLATE = '''
                 },
                 xAxis: {
                     type: 'category',
-                    data: (data || []).map(item => item.time),
+                    data: data.labels,
                     axisLabel: { rotate: 45, fontSize: 12 },
                     axisLine: { lineStyle: { color: '#999' } }
                 },
@@ -1438,6 +1479,30 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+@app.after_request
+def compress_json_response(response):
+    """按浏览器的 Accept-Encoding 压缩较大的 JSON 响应"""
+    min_bytes = DASHBOARD_CONFIG.get('compress_min_bytes')
+    if (min_bytes is None or response.mimetype != 'application/json'
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+
+    accept_encoding = request.headers.get('Accept-Encoding', '').lower()
+    if brotli is not None and 'br' in accept_encoding:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in accept_encoding:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response.headers.add('Vary', 'Accept-Encoding')
+    return response
+
+
 @app.route('/')
 def index():
     return render_template_string(HTML_TEMPLATE, bucket_name=BUCKET_NAME, region=REGION)
@@ -1446,8 +1511,8 @@ def index():
 def get_stats():
     """获取所有统计数据"""
     try:
-        # 创建API管理器
-        api_manager = QiniuAPIManager(ACCESS_KEY, SECRET_KEY)
+        # 复用同一组密钥的API管理器及其连接池
+        api_manager = get_shared_api_manager(ACCESS_KEY, SECRET_KEY)
 
         # 获取时间范围
         if request.method == 'POST':
@@ -1458,6 +1523,9 @@ def get_stats():
             # 获取前端传递的存储桶名称和区域，如果没有则使用默认值
             bucket_name = data.get('bucket_name', BUCKET_NAME)
             region = data.get('region', 'z2')  # 默认使用华南-广东区域
+            response_format = data.get('format', 'rows')
+            max_points = data.get('max_points')
+            downsample_method = data.get('downsample', 'minmax')
         else:
             # 默认使用配置文件中的存储桶名称和区域
             bucket_name = BUCKET_NAME
@@ -1469,133 +1537,340 @@ def get_stats():
             begin_time = today
             end_time = end_of_today
             granularity = 'day'
+            response_format = request.args.get('format', 'rows')
+            max_points = request.args.get('max_points')
+            downsample_method = request.args.get('downsample', 'minmax')
+
+        tasks = build_stats_tasks(api_manager, bucket_name, region, begin_time, end_time, granularity)
+
+        # 并发查询各项数据，单项失败或超时不影响其他指标
+        result_data, breakdowns, timings, errors = run_stats_queries(tasks, DASHBOARD_CONFIG['request_deadline'])
+
+        # 合计、峰值等在降采样前计算，保证统计卡片（如带宽峰值）准确
+        summary = {name: summarize(series) for name, series in result_data.items()}
+        # max_points 指定每个图表的最大点数，超出时在服务端降采样
+        max_points = int(max_points) if str(max_points or '').isdigit() else None
+        if max_points:
+            if downsample_method not in DOWNSAMPLE_METHODS:
+                downsample_method = 'minmax'
+            result_data = {
+                name: downsample(series, max_points, downsample_method)
+                for name, series in result_data.items()
+            }
 
-        # 查询各项数据
-        storage_result = api_manager.get_storage_usage(
-            bucket_name=bucket_name,
-            begin_time=begin_time,
-            end_time=end_time,
-            granularity=granularity
-        )
+        # 列式格式（format=columnar）按指标返回数值数组，默认仍为逐点的 {'time', 'value'} 列表
+        if response_format == 'columnar':
+            payload = series_to_columnar(result_data)
+        else:
+            payload = {name: series_to_rows(series) for name, series in result_data.items()}
 
-        files_result = api_manager.get_file_count(
-            bucket_name=bucket_name,
-            begin_time=begin_time,
-            end_time=end_time,
-            granularity=granularity
-        )
+        return jsonify({
+            'success': True,
+            'format': response_format,
+            'data': payload,
+            'summary': summary,
+            'breakdowns': breakdowns,
+            'timings': timings,
+            'errors': errors
+        })
 
-        flow_out_result = api_manager.get_blob_io_stats(
-            bucket_name=bucket_name,
-            begin_time=begin_time,
-            end_time=end_time,
-            granularity=granularity,
-            select='flow',
-            metric='flow_out',
-            region=region  # 传递区域参数
-        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
 
-        cdn_flow_result = api_manager.get_blob_io_stats(
-            bucket_name=bucket_name,
-            begin_time=begin_time,
-            end_time=end_time,
-            granularity=granularity,
-            select='flow',
-            metric='cdn_flow_out',
-            region=region  # 传递区域参数
-        )
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    """获取查询结果缓存的命中统计"""
+    api_manager = get_shared_api_manager(ACCESS_KEY, SECRET_KEY)
+    return jsonify({
+        'success': True,
+        'data': api_manager.cache.stats()
+    })
 
-        get_requests_result = api_manager.get_blob_io_stats(
-            bucket_name=bucket_name,
-            begin_time=begin_time,
-            end_time=end_time,
-            granularity=granularity,
-            select='hits',
-            metric='hits',
-            region=region  # 传递区域参数
-        )
 
-        put_requests_result = api_manager.get_put_requests_stats(
-            bucket_name=bucket_name,
-            begin_time=begin_time,
-            end_time=end_time,
-            granularity=granularity,
-            region=region  # 传递区域参数
+@app.route('/api/inventory', methods=['GET'])
+def inventory():
+    """按前缀统计文件数与存储量（本地文件清单），包括下一级各目录的统计"""
+    api_manager = get_shared_api_manager(ACCESS_KEY, SECRET_KEY)
+    try:
+        data = api_manager.get_prefix_inventory(
+            bucket_name=request.args.get('bucket') or BUCKET_NAME,
+            prefix=request.args.get('prefix', ''),
+            refresh=request.args.get('refresh') in ('1', 'true')
         )
+    except InventoryUnavailable as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    return jsonify({
+        'success': True,
+        'data': data
+    })
 
-        # 获取CDN流量/带宽数据：时间用 YYYY-MM-DD，且为闭区间
-        # 前端 end 可能因开区间加 1 秒变成次日 00:00:00（如 20260131235959 -> 20260201000000），需还原为用户选的最后一天
-        start_d = datetime.datetime.strptime(begin_time[:8], '%Y%m%d').date()
-        end_d = datetime.datetime.strptime(end_time[:8], '%Y%m%d').date()
-        if end_time[8:14] == '000000':  # 结束时间为当日 00:00:00，说明用户选的是前一天 23:59:59
-            end_d = end_d - datetime.timedelta(days=1)
-        start_date_formatted = start_d.strftime('%Y-%m-%d')
-        end_date_formatted = end_d.strftime('%Y-%m-%d')
-        
-        # CDN 流量接口最多 30 天，超过则只查前 30 天
-        span_days = (end_d - start_d).days + 1
-        end_date_flux = (start_d + datetime.timedelta(days=29)) if span_days > 30 else end_d
-        end_date_formatted_flux = end_date_flux.strftime('%Y-%m-%d')
-        
-        # 使用 config 中的 cdn_domains，与 test-cdn.py 一致
-        cdn_domains = QINIU_CONFIG.get('cdn_domains', [])
-        cdn_traffic_result = api_manager.get_cdn_traffic_stats(
+
+@app.route('/api/cdn_logs', methods=['GET'])
+def cdn_logs():
+    """统计 CDN 域名一天的访问日志（Top URL、状态码、来源、每小时流量、独立 IP）"""
+    api_manager = get_shared_api_manager(ACCESS_KEY, SECRET_KEY)
+    day = request.args.get('day')
+    try:
+        day = datetime.datetime.strptime(day, '%Y-%m-%d').date() if day else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': f'day 参数应为 YYYY-MM-DD 格式的日期: {day}'
+        }), 400
+    try:
+        domains = request.args.get('domains')
+        data = api_manager.get_cdn_log_stats(
+            domains=domains.split(';') if domains else None,
+            day=day,
+            refresh=request.args.get('refresh') in ('1', 'true')
+        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """获取查询缓存、并发请求合并与后台预热的统计"""
+    api_manager = get_shared_api_manager(ACCESS_KEY, SECRET_KEY)
+    return jsonify({
+        'success': True,
+        'data': {
+            'cache': api_manager.cache.stats(),
+            'coalescing': api_manager.coalescing_stats(),
+            'prewarm': prewarm_scheduler.stats() if prewarm_scheduler else None
+        }
+    })
+
+
+def _timed_call(func, kwargs):
+    """执行查询并记录耗时（毫秒）"""
+    started = time.perf_counter()
+    result = func(**kwargs)
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+def build_stats_tasks(api_manager, bucket_name, region, begin_time, end_time, granularity):
+    """
+    构建各项指标的查询任务，页面查询与后台预热共用
+
+    Returns:
+        dict: 指标名称 -> (查询函数, 参数, 解析函数)
+    """
+    # 获取CDN流量/带宽数据：时间用 YYYY-MM-DD，且为闭区间
+    # 前端 end 可能因开区间加 1 秒变成次日 00:00:00（如 20260131235959 -> 20260201000000），需还原为用户选的最后一天
+    start_d = datetime.datetime.strptime(begin_time[:8], '%Y%m%d').date()
+    end_d = datetime.datetime.strptime(end_time[:8], '%Y%m%d').date()
+    if end_time[8:14] == '000000':  # 结束时间为当日 00:00:00，说明用户选的是前一天 23:59:59
+        end_d = end_d - datetime.timedelta(days=1)
+    start_date_formatted = start_d.strftime('%Y-%m-%d')
+    end_date_formatted = end_d.strftime('%Y-%m-%d')
+    # CDN 接口单次最多查询 30/31 天，更长的范围由 API 管理器拆分为多个窗口请求
+
+    # 使用 config 中的 cdn_domains，与 test-cdn.py 一致
+    cdn_domains = QINIU_CONFIG.get('cdn_domains', [])
+
+    storage_kwargs = dict(bucket_name=bucket_name, begin_time=begin_time, end_time=end_time, granularity=granularity)
+    io_kwargs = dict(storage_kwargs, region=region)  # 传递区域参数
+    tasks = {
+        'storage': (api_manager.get_storage_usage, storage_kwargs, parse_times_datas),
+        'files': (api_manager.get_file_count, storage_kwargs, parse_times_datas),
+        'flowOut': (api_manager.get_blob_io_stats, dict(io_kwargs, select='flow', metric='flow_out'), parse_blob_io),
+        'cdnFlow': (api_manager.get_blob_io_stats, dict(io_kwargs, select='flow', metric='cdn_flow_out'), parse_blob_io),
+        'getRequests': (api_manager.get_blob_io_stats, dict(io_kwargs, select='hits', metric='hits'), parse_blob_io),
+        'putRequests': (api_manager.get_put_requests_stats, io_kwargs, parse_blob_io),
+        'cdnTraffic': (api_manager.get_cdn_traffic_stats, dict(
             domains=cdn_domains,
             start_date=start_date_formatted,
-            end_date=end_date_formatted_flux,
+            end_date=end_date_formatted,
             granularity=granularity
-        )
-        
-        # 获取CDN计费带宽数据（fusion.qiniuapi.com /v2/tune/bandwidth，与 test-cdn.py 一致，最多 31 天）
-        cdn_bandwidth_result = api_manager.get_cdn_bandwidth_stats(
+        ), parse_cdn_traffic),
+        # 获取CDN计费带宽数据（fusion.qiniuapi.com /v2/tune/bandwidth，与 test-cdn.py 一致）
+        'cdnBandwidth': (api_manager.get_cdn_bandwidth_stats, dict(
             domains=cdn_domains,
             start_date=start_date_formatted,
             end_date=end_date_formatted,
             granularity=granularity
-        )
-
-        # 处理数据
-        result_data = {
-            'storage': parse_times_datas(storage_result),
-            'files': parse_times_datas(files_result),
-            'flowOut': parse_blob_io(flow_out_result),
-            'cdnFlow': parse_blob_io(cdn_flow_result),
-            'getRequests': parse_blob_io(get_requests_result),
-            'putRequests': parse_blob_io(put_requests_result),
-            'cdnTraffic': parse_cdn_traffic(cdn_traffic_result),
-            'cdnBandwidth': parse_cdn_bandwidth(cdn_bandwidth_result)
+        ), parse_cdn_bandwidth)
+    }
+    return tasks
+
+
+def prewarm_views():
+    """当前需要预热的视图，未配置存储空间时使用默认存储空间"""
+    buckets = PREWARM_CONFIG.get('buckets') or [{'bucket_name': BUCKET_NAME, 'region': REGION}]
+    return hot_views(buckets, PREWARM_CONFIG['days'])
+
+
+def _warm_query(api_manager, since, func, kwargs):
+    """重新查询一项指标并刷新 since 之前写入的缓存，上游返回错误或只返回了本地数据时视为失败"""
+    with api_manager.refresh_open_windows(since):
+        result = func(**kwargs)
+    if result.get('status_code') != 200 or result.get('partial'):
+        return False
+    data = result.get('data')
+    # CDN 接口出错时 HTTP 状态码仍可能为 200
+    return not isinstance(data, dict) or data.get('code', 200) == 200
+
+
+def prewarm_jobs(view):
+    """将一个预热视图拆分为各项指标的查询任务"""
+    api_manager = get_shared_api_manager(ACCESS_KEY, SECRET_KEY)
+    tasks = build_stats_tasks(api_manager, **view)
+    # 多个视图共享“今天”的查询，同一轮中已刷新过的缓存不再重复请求
+    since = time.monotonic()
+    return [
+        lambda func=func, kwargs=kwargs: _warm_query(api_manager, since, func, kwargs)
+        for func, kwargs, _ in tasks.values()
+    ]
+
+
+# 热门查询后台预热，在 __main__ 中启动
+prewarm_scheduler = PrewarmScheduler(
+    prewarm_views,
+    prewarm_jobs,
+    interval=PREWARM_CONFIG['interval'],
+    jitter=PREWARM_CONFIG['jitter'],
+    max_workers=PREWARM_CONFIG['max_workers'],
+    max_backoff=PREWARM_CONFIG['max_backoff']
+) if PREWARM_CONFIG.get('enabled') else None
+
+
+def should_start_prewarm(use_reloader):
+    """
+    是否在当前进程中启动预热
+
+    使用自动重载时 Werkzeug 的父进程只负责监视文件变化，应用运行在设置了 WERKZEUG_RUN_MAIN=true 的子进程中，
+    只在子进程中启动，避免两个进程同时预热
+    """
+    if prewarm_scheduler is None:
+        return False
+    return not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+
+def run_stats_queries(tasks, deadline):
+    """
+    通过共享线程池并发执行各项查询
+
+    Args:
+        tasks (dict): 指标名称 -> (查询函数, 参数, 解析函数)，解析函数返回 (数据, 明细) 时明细单独返回
+        deadline (float): 整体超时时间（秒），超时未完成的指标返回空数据
+
+    Returns:
+        tuple: (各指标解析后的数据, 各指标明细, 各指标耗时信息, 各指标错误信息)
+    """
+    started = time.perf_counter()
+    futures = {
+        name: query_executor.submit(_timed_call, func, kwargs)
+        for name, (func, kwargs, _) in tasks.items()
+    }
+    wait(futures.values(), timeout=deadline)
+
+    result_data, breakdowns, timings, errors = {}, {}, {}, {}
+    for name, future in futures.items():
+        parser = tasks[name][2]
+        result_data[name] = {'times': [], 'values': []}
+        if not future.done():
+            # 超时的查询仍在线程池中执行完毕，但结果不再等待
+            future.cancel()
+            timings[name] = {'ms': round((time.perf_counter() - started) * 1000, 1), 'status': 'timeout'}
+            errors[name] = f'查询超时（>{deadline}s）'
+            continue
+        try:
+            result, elapsed = future.result()
+            parsed = parser(result)
+            if isinstance(parsed, tuple):
+                result_data[name], breakdowns[name] = parsed
+            else:
+                result_data[name] = parsed
+        except Exception as e:
+            timings[name] = {'ms': round((time.perf_counter() - started) * 1000, 1), 'status': 'error'}
+            errors[name] = str(e)
+            continue
+        timings[name] = {'ms': elapsed, 'status': 'ok', 'status_code': result.get('status_code')}
+        if result.get('status_code') != 200:
+            timings[name]['status'] = 'error'
+            errors[name] = result.get('error') or f"状态码 {result.get('status_code')}"
+        elif result.get('partial'):
+            # 部分日期上游请求失败，返回的是本地已保存的数据
+            timings[name]['status'] = 'partial'
+            errors[name] = result.get('error')
+    timings['total'] = {'ms': round((time.perf_counter() - started) * 1000, 1)}
+    return result_data, breakdowns, timings, errors
+
+
+def series_to_rows(series):
+    """将 {'times': [...], 'values': [...]} 转换为逐点的 [{'time': 'MM-DD', 'value': v}] 格式"""
+    return [
+        {'time': datetime.datetime.fromtimestamp(ts).strftime('%m-%d'), 'value': value}
+        for ts, value in zip(series['times'], series['values'])
+    ]
+
+
+def axis_labels(times):
+    """
+    生成时间轴的标签，按服务端本地时间格式化，与 parse_local_time 的解析一致，
+    即上游返回的日期时间原样显示；小时/5分钟粒度时带上时分
+    """
+    local_times = [datetime.datetime.fromtimestamp(ts) for ts in times]
+    with_time = any(t.hour or t.minute for t in local_times)
+    return [t.strftime('%m-%d %H:%M' if with_time else '%m-%d') for t in local_times]
+
+
+def series_to_columnar(result_data):
+    """
+    将各指标数据转换为列式格式：时间点完全相同的指标共用一个时间戳数组
+
+    Returns:
+        dict: {'axes': [时间戳数组, ...], 'labels': [各时间轴的标签数组, ...],
+               'series': {指标名: {'axis': 时间轴序号, 'dtype': 'int'/'float', 'values': [...]}}}
+    """
+    axes, axis_index, columns = [], {}, {}
+    for name, series in result_data.items():
+        key = tuple(series['times'])
+        if key not in axis_index:
+            axis_index[key] = len(axes)
+            axes.append(series['times'])
+        values = series['values']
+        columns[name] = {
+            'axis': axis_index[key],
+            'dtype': 'int' if all(isinstance(v, int) for v in values) else 'float',
+            'values': values
         }
+    return {'axes': axes, 'labels': [axis_labels(times) for times in axes], 'series': columns}
 
-        return jsonify({
-            'success': True,
-            'data': result_data
-        })
-
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': str(e)
-        }), 500
 
 def parse_times_datas(result):
     """解析 times/datas 格式"""
-    data = []
+    series = {'times': [], 'values': []}
     if result.get('status_code') == 200 and result.get('data'):
         api_data = result['data']
         if api_data.get('times') and api_data.get('datas'):
-            for i in range(len(api_data['times'])):
-                timestamp = api_data['times'][i]
-                value = api_data['datas'][i]
-                date = datetime.datetime.fromtimestamp(timestamp)
-                data.append({
-                    'time': date.strftime('%m-%d'),
-                    'value': value
-                })
-    return data
+            for timestamp, value in zip(api_data['times'], api_data['datas']):
+                series['times'].append(int(timestamp))
+                series['values'].append(value)
+    return series
 
 def parse_blob_io(result):
     """解析 blob_io 格式"""
-    data = []
+    series = {'times': [], 'values': []}
     if result.get('status_code') == 200 and result.get('data'):
         api_data = result['data']
         if isinstance(api_data, list):
@@ -1603,111 +1878,56 @@ def parse_blob_io(result):
                 if item and item.get('values'):
                     # 根据实际返回的数据结构提取值
                     value = 0
-                    if 'values' in item:
-                        values = item['values']
-                        # 优先查找flow，然后是hits
-                        if 'flow' in values:
-                            value = values['flow']
-                        elif 'hits' in values:
-                            value = values['hits']
-                    time_str = item.get('time', '')
-                    # 提取日期部分
-                    if 'T' in time_str:
-                        date_part = time_str.split('T')[0]
-                        month_day = '-'.join(date_part.split('-')[1:3])
-                    else:
-                        month_day = time_str
-                    data.append({
-                        'time': month_day,
-                        'value': value
-                    })
-    return data
-
-
-def parse_cdn_traffic(result):
-    """解析 CDN 流量数据格式"""
-    data = []
+                    values = item['values']
+                    # 优先查找flow，然后是hits
+                    if 'flow' in values:
+                        value = values['flow']
+                    elif 'hits' in values:
+                        value = values['hits']
+                    # 时间形如 2026-01-01T00:00:00+08:00
+                    timestamp = parse_local_time(item.get('time'))
+                    if timestamp is None:
+                        continue
+                    series['times'].append(timestamp)
+                    series['values'].append(value)
+    return series
+
+
+def _parse_cdn_series(result):
+    """
+    解析 CDN 流量/带宽数据格式，所有域名的国内外数据一次聚合
+
+    Returns:
+        tuple: (合计序列, 按区域和域名的明细)
+    """
+    series = {'times': [], 'values': []}
+    breakdown = {'regions': {}, 'domains': {}}
     if result.get('status_code') == 200 and result.get('data'):
         api_data = result['data']
         
         # 检查返回的数据结构（time/data 可能为 None，如“今天”无数据时）
         if api_data.get('code') == 200:
-            time_points = api_data.get('time') or []
-            data_points = api_data.get('data') or {}
+            aggregated = aggregate_cdn(api_data)
+            breakdown = {'regions': aggregated['regions'], 'domains': aggregated['domains']}
             
-            # 初始化总流量数据，长度与时间点相同
-            total_values = [0] * len(time_points)
-            
-            # 将所有域名的流量数据累加
-            for domain, domain_data in data_points.items():
-                china_data = (domain_data or {}).get('china') or []
-                oversea_data = (domain_data or {}).get('oversea') or []
-                
-                # 累加国内外流量数据到总流量数组
-                for i in range(min(len(total_values), len(china_data))):
-                    total_values[i] += china_data[i]
-                
-                for i in range(min(len(total_values), len(oversea_data))):
-                    if i < len(total_values):
-                        total_values[i] += oversea_data[i]
-            
-            # 为每个时间点创建数据项
-            for i, time_point in enumerate(time_points):
-                if i < len(total_values):
-                    # 提取日期部分，格式为 YYYY-MM-DD HH:MM:SS
-                    if ' ' in time_point:
-                        date_part = time_point.split(' ')[0]  # 取日期部分 YYYY-MM-DD
-                        month_day = '-'.join(date_part.split('-')[1:3])  # MM-DD格式
-                    else:
-                        month_day = time_point
-                    data.append({
-                        'time': month_day,
-                        'value': total_values[i]
-                    })
-    return data
+            # 时间形如 YYYY-MM-DD HH:MM:SS
+            for time_point, value in zip(aggregated['time'], aggregated['total']):
+                timestamp = parse_local_time(time_point)
+                if timestamp is None:
+                    continue
+                series['times'].append(timestamp)
+                series['values'].append(value)
+    return series, breakdown
+
+
+def parse_cdn_traffic(result):
+    """解析 CDN 流量数据格式"""
+    return _parse_cdn_series(result)
 
 
 def parse_cdn_bandwidth(result):
     """解析 CDN 计费带宽数据格式"""
-    data = []
-    if result.get('status_code') == 200 and result.get('data'):
-        api_data = result['data']
-        
-        # 检查返回的数据结构
-        if api_data.get('code') == 200:
-            time_points = api_data.get('time') or []
-            data_points = api_data.get('data') or {}
-            
-            # 初始化总带宽数据，长度与时间点相同
-            total_values = [0] * len(time_points)
-            
-            # 将所有域名的带宽数据累加
-            for domain, domain_data in data_points.items():
-                china_data = (domain_data or {}).get('china') or []
-                oversea_data = (domain_data or {}).get('oversea') or []
-                
-                # 累加国内外带宽数据到总带宽数组
-                for i in range(min(len(total_values), len(china_data))):
-                    total_values[i] += china_data[i]
-                
-                for i in range(min(len(total_values), len(oversea_data))):
-                    if i < len(total_values):
-                        total_values[i] += oversea_data[i]
-            
-            # 为每个时间点创建数据项
-            for i, time_point in enumerate(time_points):
-                if i < len(total_values):
-                    # 提取日期部分，格式为 YYYY-MM-DD HH:MM:SS
-                    if ' ' in time_point:
-                        date_part = time_point.split(' ')[0]  # 取日期部分 YYYY-MM-DD
-                        month_day = '-'.join(date_part.split('-')[1:3])  # MM-DD格式
-                    else:
-                        month_day = time_point
-                    data.append({
-                        'time': month_day,
-                        'value': total_values[i]
-                    })
-    return data
+    return _parse_cdn_series(result)
 
 if __name__ == '__main__':
     print("=" * 60)
@@ -1719,4 +1939,8 @@ if __name__ == '__main__':
     print("按 Ctrl+C 停止服务")
     print("=" * 60)
 
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    debug = False
+    if should_start_prewarm(use_reloader=debug):
+        prewarm_scheduler.start()
+
+    app.run(host='0.0.0.0', port=5000, debug=debug)
@@ -0,0 +1,126 @@
+"""
+统计查询结果缓存
+
+已经完全结束的时间窗口（结束后超过数据稳定时间）的数据不会再变化，按 LRU 策略长期保留；
+包含“今天”的时间窗口数据仍在变化，只缓存较短的 TTL。
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class StatsCache:
+    """
+    线程安全的 TTL + LRU 缓存
+
+    Args:
+        max_entries (int): 最多缓存的条目数，超出时淘汰最久未使用的条目
+        open_ttl (float): 未结束时间窗口的缓存有效期（秒）
+        clock (callable): 返回单调时间（秒）的函数，默认为 time.monotonic
+    """
+    def __init__(self, max_entries=512, open_ttl=60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.open_ttl = open_ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.refreshes = 0
+
+    def get(self, key, refresh_before=None):
+        """
+        获取缓存结果，未命中或已过期时返回 None
+
+        Args:
+            key: 缓存键
+            refresh_before (float): 可选的 clock() 时间，未结束时间窗口的条目早于该时间写入时视为未命中，
+                供预热任务在过期前重新查询；同一轮预热中已刷新过的条目直接命中
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if refresh_before is not None and expires_at is not None and expires_at - self.open_ttl < refresh_before:
+                self.refreshes += 1
+                return None
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, closed):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 查询结果，写入后视为只读
+            closed (bool): 时间窗口是否已经结束，已结束的不设过期时间
+        """
+        expires_at = None if closed else self._clock() + self.open_ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'refreshes': self.refreshes,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def is_closed_window(end_time, settle_seconds=0, now=None):
+    """
+    判断 /v6 接口的时间窗口是否已经结束
+
+    Args:
+        end_time (str): 结束时间 YYYYMMDDHHMMSS（开区间）
+        settle_seconds (int): 结束后等待上游统计数据稳定的时间（秒）
+        now (float): 可选的当前时间戳，默认为 time.time()
+    """
+    if not end_time:
+        return False
+    end = time.mktime(time.strptime(str(end_time), '%Y%m%d%H%M%S'))
+    return end + settle_seconds <= (time.time() if now is None else now)
+
+
+def is_closed_date(end_date, settle_seconds=0, now=None):
+    """
+    判断 CDN 接口的时间窗口是否已经结束
+
+    Args:
+        end_date (str): 结束日期 YYYY-MM-DD（闭区间）
+        settle_seconds (int): 结束后等待上游统计数据稳定的时间（秒）
+        now (float): 可选的当前时间戳，默认为 time.time()
+    """
+    if not end_date:
+        return False
+    end = time.mktime(time.strptime(end_date, '%Y-%m-%d')) + 86400
+    return end + settle_seconds <= (time.time() if now is None else now)
@@ -0,0 +1,259 @@
+"""
+统计数据本地持久化存储
+
+将各统计接口返回的时间序列按数据点存入 SQLite，并记录哪些自然日的数据已经完整保存。
+查询时只向上游请求缺失的日期区间，已结束的日期不再重复下载；上游不可用时返回已保存的数据。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import datetime
+import threading
+
+
+def _day_start(day):
+    """自然日零点（本地时间）的时间戳"""
+    return int(time.mktime(day.timetuple()))
+
+
+def parse_local_time(time_str):
+    """
+    解析接口返回的时间字符串为时间戳，支持 2026-01-01T00:00:00+08:00 和 2026-01-01 00:00:00
+
+    时区信息被忽略，按字符串中的日期时间归属本地自然日，与页面显示的日期一致；无法解析时返回 None
+    """
+    if not time_str:
+        return None
+    try:
+        local_time = datetime.datetime.fromisoformat(time_str).replace(tzinfo=None)
+    except ValueError:
+        return None
+    return int(time.mktime(local_time.timetuple()))
+
+
+# ---- 各接口返回格式与数据点之间的转换 ----
+
+def split_times_datas(data):
+    """拆分 /v6/space、/v6/count 返回的 times/datas 格式"""
+    data = data or {}
+    times = data.get('times') or []
+    datas = data.get('datas') or []
+    return [(int(ts), value) for ts, value in zip(times, datas)]
+
+
+def join_times_datas(points):
+    return {
+        'times': [ts for ts, _ in points],
+        'datas': [value for _, value in points]
+    }
+
+
+def split_blob_io(data):
+    """拆分 /v6/blob_io、/v6/rs_put 返回的列表格式，时间形如 2026-01-01T00:00:00+08:00"""
+    points = []
+    for item in data if isinstance(data, list) else []:
+        ts = parse_local_time(item.get('time')) if item else None
+        if ts is not None:
+            points.append((ts, item))
+    return points
+
+
+def join_blob_io(points):
+    return [item for _, item in points]
+
+
+def split_cdn(data):
+    """拆分 CDN 流量/带宽接口返回的 time/data 格式，时间形如 2026-01-01 00:00:00"""
+    data = data or {}
+    if data.get('code') != 200:
+        return []
+    time_points = data.get('time') or []
+    domains = data.get('data') or {}
+    points = []
+    for i, time_point in enumerate(time_points):
+        ts = parse_local_time(time_point)
+        if ts is None:
+            continue
+        point = {}
+        for domain, domain_data in domains.items():
+            china = (domain_data or {}).get('china') or []
+            oversea = (domain_data or {}).get('oversea') or []
+            point[domain] = [
+                china[i] if i < len(china) else 0,
+                oversea[i] if i < len(oversea) else 0
+            ]
+        points.append((ts, point))
+    return points
+
+
+def join_cdn(points):
+    domains = []
+    for _, point in points:
+        for domain in point:
+            if domain not in domains:
+                domains.append(domain)
+    data = {domain: {'china': [], 'oversea': []} for domain in domains}
+    for _, point in points:
+        for domain in domains:
+            china, oversea = point.get(domain, (0, 0))
+            data[domain]['china'].append(china)
+            data[domain]['oversea'].append(oversea)
+    return {
+        'code': 200,
+        'time': [time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) for ts, _ in points],
+        'data': data
+    }
+
+
+def is_success(codec, result):
+    """接口是否成功返回；CDN 接口出错时 HTTP 状态码仍可能为 200，需检查返回体中的 code"""
+    if result.get('status_code') != 200:
+        return False
+    return codec != 'cdn' or (result.get('data') or {}).get('code') == 200
+
+
+CODECS = {
+    'times_datas': (split_times_datas, join_times_datas),
+    'blob_io': (split_blob_io, join_blob_io),
+    'cdn': (split_cdn, join_cdn)
+}
+
+
+class StatsStore:
+    """
+    基于 SQLite 的时间序列存储
+
+    Args:
+        path (str): 数据库文件路径
+        settle_seconds (int): 自然日结束后多久视为数据已稳定（上游统计存在延迟），稳定后不再重新下载
+    """
+    def __init__(self, path, settle_seconds=3 * 3600):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.settle_seconds = settle_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS points ('
+                'series TEXT NOT NULL, ts INTEGER NOT NULL, point TEXT NOT NULL, '
+                'PRIMARY KEY (series, ts))'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS coverage ('
+                'series TEXT NOT NULL, day TEXT NOT NULL, fetched_at INTEGER NOT NULL, '
+                'PRIMARY KEY (series, day))'
+            )
+
+    @staticmethod
+    def series_key(name, params):
+        """由接口名称和除时间外的查询参数生成序列标识"""
+        return name + '|' + '&'.join(f'{k}={v}' for k, v in sorted(params.items()))
+
+    def is_settled(self, day):
+        """该自然日的数据是否已经稳定"""
+        day_end = _day_start(day + datetime.timedelta(days=1))
+        return day_end + self.settle_seconds <= time.time()
+
+    def covered_days(self, series, begin_day, end_day):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT day FROM coverage WHERE series = ? AND day BETWEEN ? AND ?',
+                (series, begin_day.isoformat(), end_day.isoformat())
+            ).fetchall()
+        return {datetime.date.fromisoformat(row[0]) for row in rows}
+
+    def missing_ranges(self, series, begin_day, end_day):
+        """
+        计算需要向上游请求的日期区间
+
+        Returns:
+            list: [(开始日期, 结束日期)]，均为闭区间，相邻的缺失日期合并为一个区间
+        """
+        covered = self.covered_days(series, begin_day, end_day)
+        ranges = []
+        day = begin_day
+        while day <= end_day:
+            if day in covered:
+                day += datetime.timedelta(days=1)
+                continue
+            start = day
+            while day + datetime.timedelta(days=1) <= end_day and day + datetime.timedelta(days=1) not in covered:
+                day += datetime.timedelta(days=1)
+            ranges.append((start, day))
+            day += datetime.timedelta(days=1)
+        return ranges
+
+    def save(self, series, points, begin_day, end_day):
+        """保存一个日期区间的数据点，并将其中已稳定的日期标记为完整"""
+        now = int(time.time())
+        settled = []
+        day = begin_day
+        while day <= end_day:
+            if self.is_settled(day):
+                settled.append((series, day.isoformat(), now))
+            day += datetime.timedelta(days=1)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM points WHERE series = ? AND ts >= ? AND ts < ?',
+                (series, _day_start(begin_day), _day_start(end_day + datetime.timedelta(days=1)))
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO points (series, ts, point) VALUES (?, ?, ?)',
+                [(series, ts, json.dumps(point)) for ts, point in points]
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO coverage (series, day, fetched_at) VALUES (?, ?, ?)',
+                settled
+            )
+
+    def load(self, series, begin_ts, end_ts):
+        """读取 [begin_ts, end_ts) 内的数据点"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT ts, point FROM points WHERE series = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                (series, begin_ts, end_ts)
+            ).fetchall()
+        return [(ts, json.loads(point)) for ts, point in rows]
+
+    def query(self, series, codec, begin_day, end_day, fetch, end_ts=None):
+        """
+        查询一个日期区间的数据，只向上游请求缺失的部分
+
+        Args:
+            series (str): 序列标识
+            codec (str): 返回格式，见 CODECS
+            begin_day (date): 开始日期
+            end_day (date): 结束日期（闭区间）
+            fetch (callable): fetch(开始日期, 结束日期) -> 接口结果字典
+            end_ts (int): 可选，只返回该时间戳之前的数据点
+
+        Returns:
+            dict: 与接口结果相同结构的字典；部分区间请求失败时带有 partial 和 error 字段
+        """
+        split, join = CODECS[codec]
+        failed = None
+        for start, end in self.missing_ranges(series, begin_day, end_day):
+            result = fetch(start, end)
+            if not is_success(codec, result):
+                failed = result
+                continue
+            self.save(series, split(result.get('data')), start, end)
+
+        range_end = _day_start(end_day + datetime.timedelta(days=1))
+        points = self.load(series, _day_start(begin_day), min(end_ts, range_end) if end_ts else range_end)
+        if failed is not None and not points:
+            return failed
+        result = {
+            'status_code': 200,
+            'data': join(points)
+        }
+        if failed is not None:
+            result['partial'] = True
+            result['error'] = failed.get('error') or f"状态码 {failed.get('status_code')}"
+        return result
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# 仪表盘模块位于项目根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """本地存储位于临时目录、不启用文件清单的 API 管理器"""
+    import api_manager
+    from stats_store import StatsStore
+
+    monkeypatch.setitem(api_manager.STORE_CONFIG, 'enabled', False)
+    monkeypatch.setitem(api_manager.INVENTORY_CONFIG, 'enabled', False)
+    instance = api_manager.QiniuAPIManager('fake-ak', 'fake-sk')
+    instance.store = StatsStore(str(tmp_path / 'stats.sqlite3'), settle_seconds=3600)
+    yield instance
+    instance.close()
@@ -0,0 +1,38 @@
+import datetime
+
+import pytest
+
+import qiniu_dashboard
+
+
+class StubAPIManager:
+    def __init__(self):
+        self.calls = []
+
+    def get_cdn_log_stats(self, domains=None, day=None, refresh=False):
+        self.calls.append((domains, day, refresh))
+        return {'a.com': {'requests': 1}}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = StubAPIManager()
+    monkeypatch.setattr(qiniu_dashboard, 'get_shared_api_manager', lambda *args: stub)
+    return stub
+
+
+@pytest.mark.parametrize('day', ['yesterday', '2024-13-01', '2024-02-30', '20240301', '2024-03-01T00:00'])
+def test_malformed_day_returns_400(stub, day):
+    response = qiniu_dashboard.app.test_client().get('/api/cdn_logs', query_string={'day': day})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert stub.calls == []
+
+
+def test_valid_day(stub):
+    response = qiniu_dashboard.app.test_client().get('/api/cdn_logs?day=2024-03-01&domains=a.com;b.com&refresh=1')
+    assert response.status_code == 200
+    assert stub.calls == [(['a.com', 'b.com'], datetime.date(2024, 3, 1), True)]
+
+    qiniu_dashboard.app.test_client().get('/api/cdn_logs')
+    assert stub.calls[-1] == (None, None, False)
@@ -0,0 +1,111 @@
+import datetime
+
+from api_manager import merge_cdn_data
+from cdn_aggregate import aggregate_cdn
+
+D = datetime.date
+
+
+def days_between(begin, end):
+    return [begin + datetime.timedelta(days=i) for i in range((end - begin).days + 1)]
+
+
+class FakeFusion:
+    """按请求的日期返回每天一个数据点，值为当天的日；empty 中的窗口返回空数据，failing 中的窗口返回错误"""
+
+    def __init__(self, empty=(), failing=()):
+        self.empty = set(empty)
+        self.failing = set(failing)
+        self.windows = []
+
+    def __call__(self, api_path, payload):
+        window = (D.fromisoformat(payload['startDate']), D.fromisoformat(payload['endDate']))
+        self.windows.append(window)
+        if window in self.failing:
+            return {'status_code': 200, 'data': {'code': 400031, 'error': 'invalid date range'}}
+        if window in self.empty:
+            return {'status_code': 200, 'data': {'code': 200, 'time': [], 'data': {}}}
+        days = days_between(*window)
+        return {'status_code': 200, 'data': {
+            'code': 200,
+            'time': [d.strftime('%Y-%m-%d 00:00:00') for d in days],
+            'data': {'a.com': {'china': [d.day for d in days], 'oversea': [0] * len(days)}}
+        }}
+
+
+def payload(begin, end):
+    return {'startDate': begin, 'endDate': end, 'granularity': 'day', 'domains': 'a.com'}
+
+
+def test_windows_across_month_boundaries(manager):
+    manager.store = None
+    manager._fusion_request = fusion = FakeFusion()
+    result = manager._query_cdn('bandwidth', payload('2024-01-01', '2024-03-31'))
+
+    # 单次最多 31 天，闰年二月跨入三月
+    assert sorted(fusion.windows) == [
+        (D(2024, 1, 1), D(2024, 1, 31)),
+        (D(2024, 2, 1), D(2024, 3, 2)),
+        (D(2024, 3, 3), D(2024, 3, 31)),
+    ]
+    data = result['data']
+    assert data['time'] == [d.strftime('%Y-%m-%d 00:00:00') for d in days_between(D(2024, 1, 1), D(2024, 3, 31))]
+    assert data['data']['a.com']['china'] == [d.day for d in days_between(D(2024, 1, 1), D(2024, 3, 31))]
+
+
+def test_single_window_is_not_split(manager):
+    manager.store = None
+    manager._fusion_request = fusion = FakeFusion()
+    manager._query_cdn('flux', payload('2024-01-17', '2024-02-15'))
+    assert fusion.windows == [(D(2024, 1, 17), D(2024, 2, 15))]
+
+
+def test_windows_start_after_closed_days(manager):
+    manager._fusion_request = fusion = FakeFusion()
+    manager._query_cdn('flux', payload('2024-01-01', '2024-01-10'))
+    fusion.windows.clear()
+
+    result = manager._query_cdn('flux', payload('2024-01-01', '2024-02-15'))
+    # 已保存的日期不再请求，缺失区间从 01-11 开始按 30 天拆分
+    assert sorted(fusion.windows) == [
+        (D(2024, 1, 11), D(2024, 2, 9)),
+        (D(2024, 2, 10), D(2024, 2, 15)),
+    ]
+    assert result['data']['data']['a.com']['china'] == [d.day for d in days_between(D(2024, 1, 1), D(2024, 2, 15))]
+
+
+def test_empty_window(manager):
+    manager.store = None
+    manager._fusion_request = FakeFusion(empty=[(D(2024, 1, 31), D(2024, 2, 29))])
+    result = manager._query_cdn('flux', payload('2024-01-01', '2024-03-05'))
+
+    assert result['status_code'] == 200
+    data = result['data']
+    expected = days_between(D(2024, 1, 1), D(2024, 1, 30)) + days_between(D(2024, 3, 1), D(2024, 3, 5))
+    assert data['time'] == [d.strftime('%Y-%m-%d 00:00:00') for d in expected]
+    assert aggregate_cdn(data)['total'] == [d.day for d in expected]
+
+
+def test_failing_window_returns_its_error(manager):
+    manager.store = None
+    manager._fusion_request = FakeFusion(failing=[(D(2024, 1, 31), D(2024, 2, 29))])
+    result = manager._query_cdn('flux', payload('2024-01-01', '2024-03-05'))
+    assert result['data']['code'] == 400031
+
+
+def test_merge_pads_domains_and_drops_duplicate_points():
+    first = {'code': 200, 'time': ['2024-01-31 00:00:00'], 'data': {'a.com': {'china': [1], 'oversea': [2]}}}
+    empty = {'code': 200, 'time': [], 'data': {}}
+    second = {'code': 200, 'time': ['2024-01-31 00:00:00', '2024-02-01 00:00:00'], 'data': {
+        'a.com': {'china': [9, 3], 'oversea': [9, 4]},
+        'b.com': {'china': [9, 5]}
+    }}
+    assert merge_cdn_data([first, empty, second]) == {
+        'code': 200,
+        'time': ['2024-01-31 00:00:00', '2024-02-01 00:00:00'],
+        'data': {
+            'a.com': {'china': [1, 3], 'oversea': [2, 4]},
+            'b.com': {'china': [0, 5], 'oversea': [0, 0]}
+        }
+    }
+    assert merge_cdn_data([]) == {'code': 200, 'time': [], 'data': {}}
@@ -0,0 +1,49 @@
+import os
+import time
+
+import pytest
+
+from qiniu_dashboard import parse_blob_io, parse_cdn_traffic, series_to_columnar
+
+
+@pytest.fixture
+def server_tz():
+    """将服务端时区切换为指定时区，结束后恢复"""
+    original = os.environ.get('TZ')
+
+    def set_tz(tz):
+        os.environ['TZ'] = tz
+        time.tzset()
+
+    yield set_tz
+    if original is None:
+        os.environ.pop('TZ', None)
+    else:
+        os.environ['TZ'] = original
+    time.tzset()
+
+
+def blob_io_result(times):
+    return {'status_code': 200, 'data': [{'time': t, 'values': {'flow': 1}} for t in times]}
+
+
+@pytest.mark.parametrize('tz', ['UTC', 'Asia/Shanghai', 'America/New_York'])
+def test_daily_labels_follow_upstream_dates(server_tz, tz):
+    server_tz(tz)
+    series = parse_blob_io(blob_io_result(['2026-01-01T00:00:00+08:00', '2026-01-02T00:00:00+08:00']))
+    columnar = series_to_columnar({'flow': series})
+    assert columnar['labels'] == [['01-01', '01-02']]
+
+
+def test_hourly_labels_follow_upstream_times(server_tz):
+    server_tz('UTC')
+    result = {'status_code': 200, 'data': {
+        'code': 200,
+        'time': ['2026-01-01 00:00:00', '2026-01-01 08:00:00'],
+        'data': {'a.com': {'china': [1, 2], 'oversea': [0, 0]}}
+    }}
+    series, _ = parse_cdn_traffic(result)
+    blob = parse_blob_io(blob_io_result(['2026-01-01T00:00:00+08:00', '2026-01-01T08:00:00+08:00']))
+    columnar = series_to_columnar({'cdn': series, 'flow': blob})
+    assert columnar['labels'] == [['01-01 00:00', '01-01 08:00']]
+    assert columnar['series']['cdn']['axis'] == columnar['series']['flow']['axis']
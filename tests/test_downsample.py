@@ -0,0 +1,109 @@
+import datetime
+import math
+import random
+
+import pytest
+
+import qiniu_dashboard
+from downsample import downsample, lttb, minmax, summarize
+
+
+def make_series(count, seed=1):
+    rng = random.Random(seed)
+    times = [1709222400 + i * 300 for i in range(count)]
+    values = [int(1000 + 500 * math.sin(i / 50.0) + rng.randint(0, 100)) for i in range(count)]
+    return times, values
+
+
+@pytest.mark.parametrize('method', [minmax, lttb])
+@pytest.mark.parametrize('count, max_points', [(9000, 800), (1001, 100), (10, 4), (7, 5)])
+def test_keeps_endpoints_and_limits_length(method, count, max_points):
+    times, values = make_series(count)
+    out_times, out_values = method(times, values, max_points)
+
+    assert len(out_times) == len(out_values) <= max_points
+    assert out_times[0] == times[0] and out_values[0] == values[0]
+    assert out_times[-1] == times[-1] and out_values[-1] == values[-1]
+    # 时间单调递增，且每个点都来自原序列
+    assert out_times == sorted(set(out_times))
+    index = dict(zip(times, values))
+    assert all(index[t] == v for t, v in zip(out_times, out_values))
+
+
+@pytest.mark.parametrize('method', [minmax, lttb])
+def test_short_series_unchanged(method):
+    times, values = make_series(50)
+    assert method(times, values, 50) == (times, values)
+    assert method(times, values, 100) == (times, values)
+
+
+def test_lttb_output_length_is_exact():
+    times, values = make_series(5000)
+    assert len(lttb(times, values, 300)[0]) == 300
+
+
+def test_minmax_preserves_peaks():
+    times, values = make_series(8928)
+    values[1234] = 10 ** 9
+    values[4321] = -5
+    _, out_values = minmax(times, values, 200)
+    assert max(out_values) == 10 ** 9
+    assert min(out_values) == -5
+
+
+def test_downsample_dispatch():
+    times, values = make_series(1000)
+    series = {'times': times, 'values': values}
+    assert downsample(series, None) is series
+    assert downsample(series, 2000) is series
+    assert downsample(series, 100, 'lttb') == dict(zip(('times', 'values'), lttb(times, values, 100)))
+
+
+class StubAPIManager:
+    """CDN 带宽为 31 天 5 分钟粒度、含一个尖峰的序列，其余指标为空"""
+
+    def __init__(self, times, values):
+        self.times = times
+        self.values = values
+
+    def get_cdn_bandwidth_stats(self, **kwargs):
+        return {'status_code': 200, 'data': {
+            'code': 200,
+            'time': [datetime.datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S') for t in self.times],
+            'data': {'a.com': {'china': self.values, 'oversea': [0] * len(self.values)}}
+        }}
+
+    def __getattr__(self, name):
+        return lambda **kwargs: {'status_code': 200, 'data': None}
+
+
+def test_summary_computed_before_downsampling(monkeypatch):
+    times, values = make_series(8928)
+    values[5000] = 10 ** 9
+    stub = StubAPIManager(times, values)
+    monkeypatch.setattr(qiniu_dashboard, 'get_shared_api_manager', lambda *args: stub)
+
+    client = qiniu_dashboard.app.test_client()
+    response = client.post('/api/get_stats', json={
+        'begin': '20240301000000', 'end': '20240401000000', 'granularity': '5min',
+        'format': 'columnar', 'max_points': 500, 'downsample': 'lttb'
+    })
+    body = response.get_json()
+    assert body['success']
+
+    summary = body['summary']['cdnBandwidth']
+    assert summary['points'] == 8928
+    assert summary['total'] == sum(values)
+    assert summary['peak'] == 10 ** 9
+    assert summary['latest'] == values[-1]
+
+    column = body['data']['series']['cdnBandwidth']
+    assert len(column['values']) <= 500
+    assert len(body['data']['axes'][column['axis']]) == len(column['values'])
+
+
+def test_summarize():
+    assert summarize({'times': [1, 2, 3], 'values': [5, 9, 4]}) == {
+        'total': 18, 'peak': 9, 'peak_time': 2, 'latest': 4, 'points': 3
+    }
+    assert summarize({'times': [], 'values': []})['points'] == 0
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+import api_manager
+import qiniu_dashboard
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def without_inventory_module(monkeypatch):
+    """模拟安装的是没有 inventory 模块的 PyPI 版本 qiniu"""
+    monkeypatch.setitem(sys.modules, 'qiniu.services.storage.inventory', None)
+
+
+def test_dashboard_imports_without_inventory_module():
+    code = (
+        "import sys; sys.modules['qiniu.services.storage.inventory'] = None; "
+        "import api_manager, qiniu_dashboard"
+    )
+    subprocess.check_call([sys.executable, '-c', code], cwd=ROOT)
+
+
+def test_inventory_endpoint_returns_503_without_module(monkeypatch, tmp_path, without_inventory_module):
+    monkeypatch.setitem(api_manager.STORE_CONFIG, 'enabled', False)
+    monkeypatch.setitem(api_manager.INVENTORY_CONFIG, 'path', str(tmp_path / 'inventory.sqlite3'))
+    manager = api_manager.QiniuAPIManager('fake-ak', 'fake-sk')
+    monkeypatch.setattr(qiniu_dashboard, 'get_shared_api_manager', lambda *args: manager)
+    try:
+        assert manager.inventory is None
+        response = qiniu_dashboard.app.test_client().get('/api/inventory?prefix=a/')
+        assert response.status_code == 503
+        body = response.get_json()
+        assert body['success'] is False
+        assert 'python-sdk' in body['message']
+    finally:
+        manager.close()
+    assert not (tmp_path / 'inventory.sqlite3').exists()
+
+
+def test_inventory_endpoint_returns_503_when_disabled(manager, monkeypatch):
+    monkeypatch.setattr(qiniu_dashboard, 'get_shared_api_manager', lambda *args: manager)
+    response = qiniu_dashboard.app.test_client().get('/api/inventory')
+    assert response.status_code == 503
+    assert response.get_json()['message'] == '本地文件清单未启用'
+
+
+@pytest.fixture
+def inventory_manager(monkeypatch, tmp_path):
+    """使用临时文件清单的 API 管理器，sync_inventory 阻塞到 release 后写入 items"""
+    monkeypatch.setitem(api_manager.STORE_CONFIG, 'enabled', False)
+    monkeypatch.setitem(api_manager.INVENTORY_CONFIG, 'path', str(tmp_path / 'inventory.sqlite3'))
+    manager = api_manager.QiniuAPIManager('fake-ak', 'fake-sk')
+    manager.release = threading.Event()
+    manager.items = [{'key': 'a/1.txt', 'fsize': 10, 'hash': 'h1', 'mimeType': 'text/plain', 'putTime': 1, 'type': 0}]
+    manager.sync_calls = []
+
+    def sync_inventory(bucket_name=None, prefix=''):
+        manager.sync_calls.append((bucket_name, prefix))
+        manager.release.wait(5)
+        if manager.items is None:
+            raise RuntimeError('list failed')
+        return manager.inventory.sync(None, bucket_name, prefix, items=manager.items)
+
+    manager.sync_inventory = sync_inventory
+    monkeypatch.setattr(qiniu_dashboard, 'get_shared_api_manager', lambda *args: manager)
+    yield manager
+    manager.release.set()
+    manager.close()
+
+
+def wait_sync(manager, bucket, prefix):
+    assert wait([manager._inventory_syncs[(bucket, prefix)]], timeout=5).done
+
+
+def test_inventory_syncs_in_background(inventory_manager):
+    client = qiniu_dashboard.app.test_client()
+    # 从未同步时立即返回空清单，在后台列举
+    data = client.get('/api/inventory?bucket=b&prefix=a/').get_json()['data']
+    assert data['syncing'] is True
+    assert data['synced_at'] is None
+    assert data['summary']['count'] == 0
+    # 同步期间重复查询不会重复列举
+    assert client.get('/api/inventory?bucket=b&prefix=a/').get_json()['data']['syncing'] is True
+    assert inventory_manager.sync_calls == [('b', 'a/')]
+
+    inventory_manager.release.set()
+    wait_sync(inventory_manager, 'b', 'a/')
+    data = client.get('/api/inventory?bucket=b&prefix=a/').get_json()['data']
+    assert data['syncing'] is False
+    assert data['synced_at'] is not None
+    assert data['sync'] == {'listed': 1, 'added': 1, 'updated': 0, 'deleted': 0}
+    assert data['summary']['count'] == 1
+    # 清单未过期时不再列举
+    assert inventory_manager.sync_calls == [('b', 'a/')]
+
+
+def test_inventory_refresh_and_sync_error(inventory_manager):
+    client = qiniu_dashboard.app.test_client()
+    inventory_manager.release.set()
+    client.get('/api/inventory?bucket=b&prefix=a/')
+    wait_sync(inventory_manager, 'b', 'a/')
+
+    inventory_manager.items = None
+    client.get('/api/inventory?bucket=b&prefix=a/&refresh=1')
+    wait_sync(inventory_manager, 'b', 'a/')
+    data = client.get('/api/inventory?bucket=b&prefix=a/').get_json()['data']
+    assert len(inventory_manager.sync_calls) == 2
+    assert data['sync'] == {'error': 'list failed'}
+    # 列举失败时保留之前的清单
+    assert data['summary']['count'] == 1
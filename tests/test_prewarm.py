@@ -0,0 +1,117 @@
+import datetime
+import threading
+
+import pytest
+
+import qiniu_dashboard
+from prewarm import PrewarmScheduler, hot_views
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(results, clock, **kwargs):
+    """每个视图一个任务，按 results 依次返回每轮任务的结果"""
+    rounds = iter(results)
+
+    def make_jobs(view):
+        ok = next(rounds)
+        if isinstance(ok, Exception):
+            def job():
+                raise ok
+            return [job]
+        return [lambda: ok]
+
+    kwargs = dict(dict(interval=40, jitter=0, max_backoff=300, clock=clock), **kwargs)
+    return PrewarmScheduler(lambda: ['today'], make_jobs, **kwargs)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_schedule_backs_off_on_failure(clock):
+    scheduler = make_scheduler([True, False, RuntimeError('upstream'), False, False, True], clock)
+    delays = []
+    for _ in range(6):
+        scheduler.run_once()
+        delays.append(scheduler.schedule_next())
+        assert scheduler.next_run == clock.now + delays[-1]
+        clock.now += delays[-1]
+    scheduler.stop()
+
+    # 失败时按 interval * 2^失败次数 退避，不超过 max_backoff，成功后恢复
+    assert delays == [40, 80, 160, 300, 300, 40]
+    stats = scheduler.stats()
+    assert stats['runs'] == 6
+    assert stats['consecutive_failures'] == 0
+    assert stats['last_run'] == clock.now - 40
+
+
+def test_jitter_stays_in_range(clock):
+    scheduler = make_scheduler([], clock, interval=40, jitter=5)
+    delays = [scheduler.next_delay() for _ in range(200)]
+    scheduler.stop()
+    assert all(35 <= delay <= 45 for delay in delays)
+
+
+def test_run_once_records_duration(clock):
+    def make_jobs(view):
+        def job():
+            clock.now += 0.25
+            return True
+        return [job]
+
+    scheduler = PrewarmScheduler(lambda: ['a'], make_jobs, max_workers=1, clock=clock)
+    assert scheduler.run_once() == 0
+    scheduler.stop()
+    assert scheduler.stats()['last_duration_ms'] == 250.0
+
+
+def test_start_is_idempotent_and_stop_is_final():
+    ran = threading.Event()
+    views = []
+
+    def make_views():
+        views.append(1)
+        ran.set()
+        return []
+
+    scheduler = PrewarmScheduler(make_views, lambda view: [], interval=3600, jitter=0)
+    scheduler.start()
+    scheduler.start()
+    assert ran.wait(5)
+    assert scheduler.stats()['running']
+
+    scheduler.stop(timeout=5)
+    assert not scheduler.stats()['running']
+    # 停止后再次启动无效
+    scheduler.start()
+    assert not scheduler.stats()['running']
+    assert views == [1]
+
+
+def test_prewarm_skipped_in_reloader_parent(monkeypatch):
+    monkeypatch.setattr(qiniu_dashboard, 'prewarm_scheduler', object())
+    monkeypatch.delenv('WERKZEUG_RUN_MAIN', raising=False)
+    assert qiniu_dashboard.should_start_prewarm(use_reloader=False)
+    assert not qiniu_dashboard.should_start_prewarm(use_reloader=True)
+    monkeypatch.setenv('WERKZEUG_RUN_MAIN', 'true')
+    assert qiniu_dashboard.should_start_prewarm(use_reloader=True)
+
+    monkeypatch.setattr(qiniu_dashboard, 'prewarm_scheduler', None)
+    assert not qiniu_dashboard.should_start_prewarm(use_reloader=False)
+
+
+def test_hot_views():
+    views = hot_views([{'bucket_name': 'b', 'region': 'z0'}], [1, 7], today=datetime.date(2024, 3, 1))
+    assert [(v['begin_time'], v['end_time']) for v in views] == [
+        ('20240301000000', '20240302000000'),
+        ('20240224000000', '20240302000000'),
+    ]
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from qiniu_dashboard import build_stats_tasks, run_stats_queries
+
+
+def times_datas(value):
+    return {'status_code': 200, 'data': {'times': [1709222400], 'datas': [value]}}
+
+
+def blob_io(value):
+    return {'status_code': 200, 'data': [{'time': '2024-03-01T00:00:00+08:00', 'values': {'flow': value, 'hits': value}}]}
+
+
+def cdn(value):
+    return {'status_code': 200, 'data': {
+        'code': 200, 'time': ['2024-03-01 00:00:00'], 'data': {'a.com': {'china': [value], 'oversea': [0]}}
+    }}
+
+
+class StubAPIManager:
+    """get_file_count 抛出异常、get_cdn_bandwidth_stats 阻塞到 release，rs_put 返回上游错误，其余立即成功"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def get_storage_usage(self, **kwargs):
+        return times_datas(100)
+
+    def get_file_count(self, **kwargs):
+        raise RuntimeError('boom')
+
+    def get_blob_io_stats(self, **kwargs):
+        return dict(blob_io(7), partial=True, error='状态码 503') if kwargs['metric'] == 'hits' else blob_io(5)
+
+    def get_put_requests_stats(self, **kwargs):
+        return {'status_code': 401, 'error': 'bad token', 'data': None}
+
+    def get_cdn_traffic_stats(self, **kwargs):
+        return cdn(9)
+
+    def get_cdn_bandwidth_stats(self, **kwargs):
+        self.release.wait(5)
+        return cdn(3)
+
+
+@pytest.fixture
+def stub():
+    stub = StubAPIManager()
+    yield stub
+    stub.release.set()
+
+
+def test_partial_results_with_error_and_timeout(stub):
+    tasks = build_stats_tasks(stub, 'b', 'z0', '20240301000000', '20240302000000', 'day')
+    result_data, _breakdowns, timings, errors = run_stats_queries(tasks, 0.3)
+
+    # 成功的指标不受其他指标失败或超时影响
+    assert result_data['storage']['values'] == [100]
+    assert result_data['cdnTraffic']['values'] == [9]
+    assert timings['storage']['status'] == 'ok'
+    assert timings['storage']['status_code'] == 200
+
+    assert timings['files']['status'] == 'error'
+    assert errors['files'] == 'boom'
+    assert result_data['files'] == {'times': [], 'values': []}
+
+    assert timings['cdnBandwidth']['status'] == 'timeout'
+    assert errors['cdnBandwidth'] == '查询超时（>0.3s）'
+    assert result_data['cdnBandwidth'] == {'times': [], 'values': []}
+    assert timings['total']['ms'] < 2000
+
+    assert timings['putRequests']['status'] == 'error'
+    assert errors['putRequests'] == 'bad token'
+
+    assert timings['getRequests']['status'] == 'partial'
+    assert errors['getRequests'] == '状态码 503'
+    assert result_data['getRequests']['values'] == [7]
+
+    assert set(errors) == {'files', 'cdnBandwidth', 'putRequests', 'getRequests'}
+
+
+def test_parser_error_is_collected(stub):
+    stub.release.set()
+
+    def bad_parser(result):
+        raise ValueError('unexpected format')
+
+    tasks = {
+        'storage': (stub.get_storage_usage, {}, bad_parser),
+        'cdnBandwidth': (stub.get_cdn_bandwidth_stats, {}, lambda result: {'times': [1], 'values': [2]}),
+    }
+    result_data, _breakdowns, timings, errors = run_stats_queries(tasks, 5)
+    assert errors == {'storage': 'unexpected format'}
+    assert timings['storage']['status'] == 'error'
+    assert result_data['storage'] == {'times': [], 'values': []}
+    assert result_data['cdnBandwidth'] == {'times': [1], 'values': [2]}
@@ -0,0 +1,84 @@
+import time
+
+from stats_cache import StatsCache, is_closed_date, is_closed_window
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_open_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = StatsCache(open_ttl=60, clock=clock)
+    cache.set('k', 'v', closed=False)
+
+    clock.now += 59
+    assert cache.get('k') == 'v'
+    clock.now += 1
+    assert cache.get('k') is None
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['size'] == 0
+
+
+def test_closed_entry_never_expires():
+    clock = FakeClock()
+    cache = StatsCache(open_ttl=60, clock=clock)
+    cache.set('k', 'v', closed=True)
+    clock.now += 10 ** 6
+    assert cache.get('k') == 'v'
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = StatsCache(max_entries=2, clock=FakeClock())
+    cache.set('a', 1, closed=True)
+    cache.set('b', 2, closed=True)
+    # 访问 a 后 b 成为最久未使用的条目
+    assert cache.get('a') == 1
+    cache.set('c', 3, closed=True)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3 and stats['misses'] == 1
+
+
+def test_refresh_before_skips_only_stale_open_entries():
+    clock = FakeClock()
+    cache = StatsCache(open_ttl=60, clock=clock)
+    cache.set('open', 1, closed=False)
+    cache.set('closed', 2, closed=True)
+
+    clock.now += 10
+    since = clock.now
+    assert cache.get('open', refresh_before=since) is None
+    assert cache.get('closed', refresh_before=since) == 2
+
+    # 本轮预热中重新写入的条目直接命中
+    cache.set('open', 3, closed=False)
+    assert cache.get('open', refresh_before=since) == 3
+    assert cache.stats()['refreshes'] == 1
+
+
+def test_is_closed_window():
+    end = time.mktime(time.strptime('20240302000000', '%Y%m%d%H%M%S'))
+    assert not is_closed_window('20240302000000', now=end - 1)
+    assert is_closed_window('20240302000000', now=end)
+    assert not is_closed_window('20240302000000', settle_seconds=3600, now=end + 3599)
+    assert is_closed_window('20240302000000', settle_seconds=3600, now=end + 3600)
+    assert not is_closed_window(None, now=end)
+
+
+def test_is_closed_date_includes_end_day():
+    # 结束日期为闭区间，次日零点之后才结束
+    end = time.mktime(time.strptime('2024-03-02', '%Y-%m-%d')) + 86400
+    assert not is_closed_date('2024-03-02', now=end - 1)
+    assert is_closed_date('2024-03-02', now=end)
+    assert not is_closed_date('2024-03-02', settle_seconds=600, now=end + 599)
+    assert is_closed_date('2024-03-02', settle_seconds=600, now=end + 600)
+    assert not is_closed_date('', now=end)
@@ -0,0 +1,176 @@
+import datetime
+import time
+
+from stats_store import StatsStore
+
+D = datetime.date
+
+
+def day_ts(day):
+    return int(time.mktime(day.timetuple()))
+
+
+def days_between(begin, end):
+    return [begin + datetime.timedelta(days=i) for i in range((end - begin).days + 1)]
+
+
+def space_result(begin, end):
+    """/v6/space 按天返回的结果，每天的值为当天的日"""
+    days = days_between(begin, end)
+    return {'status_code': 200, 'data': {'times': [day_ts(d) for d in days], 'datas': [d.day for d in days]}}
+
+
+def test_missing_ranges_merges_adjacent_days(tmp_path):
+    store = StatsStore(str(tmp_path / 's.sqlite3'))
+    assert store.missing_ranges('s', D(2024, 3, 1), D(2024, 3, 10)) == [(D(2024, 3, 1), D(2024, 3, 10))]
+
+    store.save('s', [], D(2024, 3, 3), D(2024, 3, 4))
+    store.save('s', [], D(2024, 3, 8), D(2024, 3, 8))
+    assert store.missing_ranges('s', D(2024, 3, 1), D(2024, 3, 10)) == [
+        (D(2024, 3, 1), D(2024, 3, 2)),
+        (D(2024, 3, 5), D(2024, 3, 7)),
+        (D(2024, 3, 9), D(2024, 3, 10)),
+    ]
+    # 区间两端都已覆盖
+    assert store.missing_ranges('s', D(2024, 3, 3), D(2024, 3, 8)) == [(D(2024, 3, 5), D(2024, 3, 7))]
+    assert store.missing_ranges('s', D(2024, 3, 3), D(2024, 3, 4)) == []
+    # 其他序列不受影响
+    assert store.missing_ranges('other', D(2024, 3, 3), D(2024, 3, 3)) == [(D(2024, 3, 3), D(2024, 3, 3))]
+
+
+def test_save_marks_only_settled_days(tmp_path):
+    store = StatsStore(str(tmp_path / 's.sqlite3'), settle_seconds=3600)
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    before = today - datetime.timedelta(days=3)
+    points = [(day_ts(d), d.day) for d in days_between(before, today)]
+    store.save('s', points, before, today)
+
+    covered = store.covered_days('s', before, today)
+    assert today not in covered
+    assert before in covered
+    # 昨天结束不足 settle_seconds 时同样不标记
+    assert (yesterday in covered) == store.is_settled(yesterday)
+    # 未结束日期的数据点仍可读取，下次查询会重新下载
+    assert len(store.load('s', day_ts(before), day_ts(today) + 86400)) == 4
+    assert store.missing_ranges('s', before, today)[-1][1] == today
+
+
+def test_save_replaces_points_in_range(tmp_path):
+    store = StatsStore(str(tmp_path / 's.sqlite3'))
+    store.save('s', [(day_ts(D(2024, 3, 1)), 1), (day_ts(D(2024, 3, 2)), 2)], D(2024, 3, 1), D(2024, 3, 2))
+    store.save('s', [(day_ts(D(2024, 3, 2)), 20)], D(2024, 3, 2), D(2024, 3, 2))
+    assert store.load('s', day_ts(D(2024, 3, 1)), day_ts(D(2024, 3, 3))) == [
+        (day_ts(D(2024, 3, 1)), 1), (day_ts(D(2024, 3, 2)), 20)
+    ]
+
+
+def test_query_fetches_only_missing_ranges(tmp_path):
+    store = StatsStore(str(tmp_path / 's.sqlite3'))
+    fetched = []
+
+    def fetch(start, end):
+        fetched.append((start, end))
+        return space_result(start, end)
+
+    store.query('s', 'times_datas', D(2024, 3, 5), D(2024, 3, 6), fetch)
+    result = store.query('s', 'times_datas', D(2024, 3, 1), D(2024, 3, 10), fetch)
+
+    assert fetched == [
+        (D(2024, 3, 5), D(2024, 3, 6)),
+        (D(2024, 3, 1), D(2024, 3, 4)),
+        (D(2024, 3, 7), D(2024, 3, 10)),
+    ]
+    assert result['data']['datas'] == list(range(1, 11))
+    assert 'partial' not in result
+
+
+def test_query_partial_failure(tmp_path):
+    store = StatsStore(str(tmp_path / 's.sqlite3'))
+    points = [(day_ts(d), d.day) for d in days_between(D(2024, 3, 1), D(2024, 3, 2))]
+    store.save('s', points, D(2024, 3, 1), D(2024, 3, 2))
+
+    def fetch(start, end):
+        return {'status_code': 503, 'error': 'unavailable', 'data': None}
+
+    result = store.query('s', 'times_datas', D(2024, 3, 1), D(2024, 3, 4), fetch)
+    assert result['partial'] is True
+    assert result['error'] == 'unavailable'
+    assert result['data']['datas'] == [1, 2]
+    # 失败的区间不标记为已覆盖
+    assert store.missing_ranges('s', D(2024, 3, 1), D(2024, 3, 4)) == [(D(2024, 3, 3), D(2024, 3, 4))]
+
+    # 没有任何已保存的数据时返回上游的错误结果
+    assert store.query('s', 'times_datas', D(2024, 4, 1), D(2024, 4, 2), fetch)['status_code'] == 503
+
+
+def test_query_stat_requests_missing_days(manager):
+    calls = []
+
+    def make_request(api_endpoint, params):
+        calls.append((params['begin'], params['end']))
+        begin = datetime.datetime.strptime(params['begin'], '%Y%m%d%H%M%S').date()
+        end = datetime.datetime.strptime(params['end'], '%Y%m%d%H%M%S').date() - datetime.timedelta(days=1)
+        return space_result(begin, end)
+
+    manager._make_request = make_request
+    params = {'g': 'day', 'bucket': 'b', '$region': 'z0'}
+    manager._query_stat('space', dict(params, begin='20240305000000', end='20240307000000'))
+    result = manager._query_stat('space', dict(params, begin='20240301000000', end='20240311000000'))
+
+    assert calls == [
+        ('20240305000000', '20240307000000'),
+        ('20240301000000', '20240305000000'),
+        ('20240307000000', '20240311000000'),
+    ]
+    assert result['data']['datas'] == list(range(1, 11))
+
+    # 其他存储空间是不同的序列
+    manager._query_stat('space', dict(params, bucket='c', begin='20240305000000', end='20240306000000'))
+    assert calls[-1] == ('20240305000000', '20240306000000')
+
+
+def test_query_stat_bypasses_store_for_partial_day_windows(manager):
+    calls = []
+
+    def make_request(api_endpoint, params):
+        calls.append(params)
+        return space_result(D(2024, 3, 1), D(2024, 3, 1))
+
+    manager._make_request = make_request
+    params = {'g': 'hour', 'begin': '20240301120000', 'end': '20240302000000'}
+    manager._query_stat('space', params)
+    manager._query_stat('space', params)
+    # 不是从零点开始的查询不能按自然日拼接，直接请求上游（由查询缓存负责去重）
+    assert calls == [params, params]
+    assert manager.store.missing_ranges(
+        StatsStore.series_key('fake-ak:space', {'g': 'hour'}), D(2024, 3, 1), D(2024, 3, 1)
+    ) == [(D(2024, 3, 1), D(2024, 3, 1))]
+
+
+def test_query_cdn_does_not_persist_open_days(manager):
+    today = datetime.date.today()
+    begin = today - datetime.timedelta(days=2)
+    fetched = []
+
+    def fusion_request(api_path, payload):
+        start = datetime.date.fromisoformat(payload['startDate'])
+        end = datetime.date.fromisoformat(payload['endDate'])
+        fetched.append((start, end))
+        days = days_between(start, end)
+        return {'status_code': 200, 'data': {
+            'code': 200,
+            'time': [d.strftime('%Y-%m-%d 00:00:00') for d in days],
+            'data': {'a.com': {'china': [1] * len(days), 'oversea': [0] * len(days)}}
+        }}
+
+    manager._fusion_request = fusion_request
+    payload = {'startDate': begin.isoformat(), 'endDate': today.isoformat(), 'granularity': 'day', 'domains': 'a.com'}
+    manager._query_cdn('flux', payload)
+    result = manager._query_cdn('flux', payload)
+
+    # 第二次查询只重新下载尚未稳定的日期，今天始终重新下载
+    assert fetched[0] == (begin, today)
+    assert fetched[-1][1] == today
+    assert fetched[-1][0] > begin
+    assert result['data']['data']['a.com']['china'] == [1, 1, 1]